@@ -0,0 +1,163 @@
+import gzip
+import io
+import os
+import re
+import tarfile
+import zipfile
+
+from extractors import BOUNDED_EXTRACTORS, MAX_WORDS, _LimitedReader, _WordBudget
+
+# Budgets per archive - reading stops at whichever is hit first
+MAX_ARCHIVE_BYTES = 16_000_000  # uncompressed bytes read (member data + skipped tar data)
+MAX_MEMBER_BYTES = 2_000_000    # larger members are listed by name only
+MAX_MEMBERS = 2000              # member names listed
+
+# Members whose text is read as-is
+TEXT_MEMBER_EXTS = {".txt", ".csv", ".md", ".html"}
+
+
+def _name_words(name):
+    """Words of a member's path, e.g. "2024/invoice_march.pdf" → "invoice march"."""
+    return " ".join(re.split(r"[^A-Za-z]+", os.path.splitext(name)[0])).strip()
+
+
+def _member_text(data, ext, max_words):
+    """Bounded text of one member's bytes ("" for unsupported types)."""
+    if ext in TEXT_MEMBER_EXTS:
+        return " ".join(data.decode("utf-8", errors="ignore").split()[:max_words])
+    extractor = BOUNDED_EXTRACTORS.get(ext)
+    if extractor is None:
+        return ""
+    try:
+        # The bounded extractors accept file objects, so nothing touches the disk
+        return extractor(io.BytesIO(data), max_words=max_words)
+    except Exception:
+        return ""
+
+
+def _wanted(name, size):
+    ext = os.path.splitext(name)[1].lower()
+    return (ext in TEXT_MEMBER_EXTS or ext in BOUNDED_EXTRACTORS) and size <= MAX_MEMBER_BYTES
+
+
+# ===== FORMAT READERS =====
+# Each yields (member name, size, opener) - opener() returns a readable
+# file object for the member, or is None when its data cannot be read
+
+def _zip_members(file_path):
+    with zipfile.ZipFile(file_path) as zf:
+        # The listing comes from the central directory; data is only read on open
+        for info in zf.infolist():
+            if not info.is_dir():
+                yield info.filename, info.file_size, lambda info=info: zf.open(info)
+
+
+def _tar_members(fileobj, max_bytes):
+    # Stream mode ("r|"): members are read in order, never seeking back
+    with tarfile.open(fileobj=fileobj, mode="r|") as tf:
+        for member in tf:
+            if member.offset_data > max_bytes:
+                break   # skipping to later members would read past the budget
+            if member.isfile():
+                yield member.name, member.size, lambda member=member: tf.extractfile(member)
+
+
+def _tar_file_members(file_path, max_bytes):
+    with open(file_path, "rb") as f:
+        yield from _tar_members(f, max_bytes)
+
+
+def _gzip_members(file_path, max_bytes):
+    with gzip.open(file_path, "rb") as gz:
+        head = gz.read(512)
+        gz.seek(0)
+        if head[257:262] == b"ustar":
+            yield from _tar_members(gz, max_bytes)
+        else:
+            # A single compressed file, named like the archive without .gz
+            inner = os.path.basename(file_path)[:-3] if file_path.lower().endswith(".gz") else ""
+            yield inner, 0, lambda: gz
+
+
+def _rar_members(file_path):
+    import rarfile  # optional, needs the unrar tool
+    with rarfile.RarFile(file_path) as rf:
+        for info in rf.infolist():
+            if not info.is_dir():
+                yield info.filename, info.file_size, lambda info=info: rf.open(info)
+
+
+def _7z_members(file_path):
+    import py7zr  # optional
+    with py7zr.SevenZipFile(file_path, mode="r") as archive:
+        # Names only: members of a solid 7z block can only be decompressed
+        # from the start of the block, which defeats the byte budget
+        for info in archive.list():
+            if not info.is_directory:
+                yield info.filename, info.uncompressed, None
+
+
+def _members(file_path, ext, max_bytes):
+    if ext == ".zip":
+        return _zip_members(file_path)
+    if ext == ".tar":
+        return _tar_file_members(file_path, max_bytes)
+    if ext == ".gz":
+        return _gzip_members(file_path, max_bytes)
+    if ext == ".rar":
+        return _rar_members(file_path)
+    if ext == ".7z":
+        return _7z_members(file_path)
+    return iter(())
+
+
+def extract_archive_text(file_path, ext=None, max_words=MAX_WORDS, max_bytes=MAX_ARCHIVE_BYTES):
+    """
+    Preview of an archive without unpacking it to disk.
+
+    Lists the members and reads bounded text from supported ones (plain
+    text, PDF, DOCX, PPTX, XLSX) until max_bytes of uncompressed data were
+    read. Member names take at most half of the word budget, the rest goes
+    to member text.
+
+    Args:
+        file_path: Archive to read (.zip, .tar, .gz/.tar.gz, .rar, .7z)
+        ext: Real type if it differs from the extension (sniffed content)
+        max_words: Word budget of the preview
+        max_bytes: Uncompressed bytes read at most
+
+    Returns:
+        Preview text ("" if the archive cannot be read, or its optional
+        reader - rarfile, py7zr - is not installed)
+    """
+    ext = ext or os.path.splitext(file_path)[1].lower()
+    names = _WordBudget(max_words // 2)
+    texts = []
+    remaining = max_bytes
+    text_words = 0
+    try:
+        for count, (name, size, opener) in enumerate(_members(file_path, ext, max_bytes)):
+            if count >= MAX_MEMBERS:
+                break
+            names.add(_name_words(name))
+            if opener is None or remaining <= 0 or text_words >= max_words or not _wanted(name, size or 0):
+                continue
+            with opener() as raw:
+                data = _LimitedReader(raw, min(remaining, MAX_MEMBER_BYTES)).read()
+            remaining -= len(data)
+            text = _member_text(data, os.path.splitext(name)[1].lower(), max_words - text_words)
+            if text:
+                texts.append(text)
+                text_words += len(text.split())
+    except ImportError:
+        return ""
+    except Exception:
+        # Corrupt or truncated archive - keep what was read
+        pass
+
+    preview = _WordBudget(max_words)
+    preview.add(names.text())
+    for text in texts:
+        if preview.add(text):
+            break
+    return preview.text()
@@ -0,0 +1,398 @@
+import argparse
+import os
+
+
+def _cmd_parity(args):
+    from embeddings import load_embedding_backend, check_parity, benchmark_backend
+    keyword_sets = None
+    if args.keywords_file:
+        with open(args.keywords_file, encoding="utf-8") as f:
+            keyword_sets = [line.strip() for line in f if line.strip()]
+    categories = [c.strip() for c in args.categories.split(",")] if args.categories else None
+
+    reference = load_embedding_backend("torch")
+    candidate = load_embedding_backend("onnx", quantize=not args.fp32)
+    report = check_parity(reference, candidate, keyword_sets, categories, threshold=args.threshold)
+
+    print(f"Decision agreement at {args.threshold}: {report['agreement']:.1%}")
+    print(f"Max score difference: {report['max_score_diff']:.4f}")
+    for keywords, ref, cand in report["flipped"]:
+        print(f"   flipped: '{keywords}' torch={ref} onnx={cand}")
+    print(f"Throughput: torch {benchmark_backend(reference):.0f} texts/s, "
+          f"onnx {benchmark_backend(candidate):.0f} texts/s")
+
+
+def _cmd_compare_matchers(args):
+    from embeddings import load_embedding_backend
+    from lexical import compare_engines
+    keyword_sets = None
+    if args.keywords_file:
+        with open(args.keywords_file, encoding="utf-8") as f:
+            keyword_sets = [line.strip() for line in f if line.strip()]
+    categories = [c.strip() for c in args.categories.split(",")] if args.categories else None
+
+    report = compare_engines(lambda: load_embedding_backend(args.embeddings or "torch"),
+                             keyword_sets, categories, threshold=args.threshold)
+    print(f"Decision agreement with embeddings: {report['agreement']:.1%}")
+    for keywords, embedding, lexical in report["flipped"]:
+        print(f"   differs: '{keywords}' embedding={embedding} lexical={lexical}")
+    for engine in ["embedding", "lexical"]:
+        print(f"{engine:>9}: {report['files_per_sec'][engine]:.0f} files/s, "
+              f"{report['memory_mb'][engine]:.1f} MB")
+
+
+def _cmd_organize(args):
+    from logic import organize_files_smart
+    destination = args.dest or os.path.join(os.path.dirname(os.path.abspath(args.folder)), "Organized_Files")
+    organize_files_smart(
+        args.folder,
+        destination,
+        user_query=args.query,
+        include_subfolders=not args.top_level,
+        streaming=args.streaming,
+        build_index=not args.no_index
+    )
+
+
+def _cmd_queue_create(args):
+    from jobqueue import create_job
+    create_job(args.db, args.folder, user_query=args.query, include_subfolders=not args.top_level)
+
+
+def _cmd_queue_work(args):
+    from jobqueue import run_worker, run_workers
+    if args.processes > 1:
+        run_workers(args.db, args.processes, cores=args.cores, batch_size=args.batch_size)
+    else:
+        run_worker(args.db, batch_size=args.batch_size)
+
+
+def _cmd_queue_status(args):
+    from jobqueue import queue_status
+    status = queue_status(args.db)
+    print(", ".join(f"{key} {status[key]}" for key in ["pending", "claimed", "done", "failed"]))
+    for worker, count in sorted(status["workers"].items()):
+        print(f"   {worker}: {count} files")
+
+
+def _cmd_queue_coordinate(args):
+    from jobqueue import coordinate
+    coordinate(args.db, args.dest, wait=not args.no_wait, build_index=not args.no_index)
+
+
+def _cmd_daemon(args):
+    from model_daemon import ModelDaemon, connect_daemon
+    if args.action == "start":
+        ModelDaemon(preload=not args.lazy).serve_forever()
+        return
+    client = connect_daemon()
+    if client is None:
+        print("No model daemon is running.")
+        return
+    if args.action == "stop":
+        client.shutdown()
+        print("Model daemon stopped.")
+    else:
+        info = client.ping()
+        print(f"Model daemon running (pid {info['pid']}), loaded: {', '.join(info['models']) or 'none'}")
+    client.close()
+
+
+def _cmd_quarantine(args):
+    from supervisor import quarantine
+    if args.action == "clear":
+        removed = quarantine.clear(args.paths or None)
+        print(f"Removed {removed} file(s) from the quarantine.")
+        return
+    entries = quarantine.entries()
+    if not entries:
+        print("No quarantined files.")
+        return
+    for path, entry in sorted(entries.items()):
+        print(f"{entry['time']}  [{entry['category']}]  {path}: {entry['reason']}")
+
+
+def _cmd_throttle(args):
+    from throttle import clear_control, read_control, write_control
+    if args.action == "set":
+        write_control(args.mb_per_sec, args.files_per_sec)
+    elif args.action == "clear":
+        clear_control()
+    control = read_control()
+    if control is None:
+        print("No host-wide limits set (runs use --max-mb-per-sec / --max-files-per-sec).")
+    else:
+        print(f"Limits for all runs on this host: {control['mb_per_sec'] or 'unlimited'} MB/s, "
+              f"{control['files_per_sec'] or 'unlimited'} files/s")
+
+
+def _cmd_ledger(args):
+    import time
+    from ledger import file_hash, ledger
+    if args.name:
+        entries = ledger.find_filename(args.query, limit=args.limit)
+    elif args.hash:
+        entries = ledger.find_hash(args.query, limit=args.limit)
+    elif args.same_content:
+        entries = ledger.find_hash(file_hash(args.query), limit=args.limit)
+    else:
+        entries = ledger.find_source(args.query, limit=args.limit)
+    if not entries:
+        print("No moves recorded for that file.")
+        return
+    for entry in entries:
+        moved = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry["moved_at"]))
+        state = "moved" if entry["original_removed"] else "copied (original kept)"
+        print(f"{moved}  {entry['source']} → {entry['destination']}  [{state}, {entry['size']} bytes]")
+
+
+def _cmd_rules(args):
+    from rules import rules
+    try:
+        compiled = rules.load()
+    except ValueError as e:
+        raise SystemExit(f"Invalid rule file: {e}")
+    if not compiled:
+        print(f"No rules in {rules.path}.")
+        return
+    if args.action == "check":
+        print(f"{len(compiled)} rule(s) in {rules.path}:")
+        for position, rule in enumerate(compiled, start=1):
+            print(f"{position:>3}. {rule.name} → {rule.category}")
+        return
+
+    import logic
+    file_paths = logic._list_files(args.folder, not args.top_level)
+    logic.stat_cache.prefetch(file_paths)
+    categories = rules.match(file_paths, logic.detect_extensions(file_paths), stat=logic.stat_cache.stat)
+    print(rules.report())
+    by_category = {}
+    for file_path, category in zip(file_paths, categories):
+        if category is not None:
+            by_category.setdefault(category, []).append(file_path)
+    for category, paths in by_category.items():
+        print(f"{category}:")
+        for file_path in paths[:args.limit]:
+            print(f"   {file_path}")
+        if len(paths) > args.limit:
+            print(f"   ... {len(paths) - args.limit} more")
+    print(f"{len(file_paths) - sum(map(len, by_category.values()))} of {len(file_paths)} files match no rule.")
+
+
+def _cmd_search(args):
+    from logic import search_index
+    results = search_index(args.query, k=args.k)
+    if not results:
+        print("No indexed files found. Organize a folder first to build the index.")
+        return
+    for result in results:
+        print(f"{result['score']:.3f}  [{result['category']}]  {result['path']}")
+        if args.verbose and result["snippet"]:
+            print(f"       {result['snippet']}")
+
+
+def _cmd_extractors(args):
+    import logic  # registers the built-in extractors
+    from extractor_registry import registry
+    for line in registry.describe():
+        print(line)
+
+
+def _cmd_loadtest(args):
+    from loadtest import DEFAULT_QUERY, run_load_test
+    if args.files < 1:
+        print("--files must be at least 1")
+        return
+    report = run_load_test(args.files, user_query=args.query or DEFAULT_QUERY)
+    total = sum(report["seconds"].values())
+    # Small runs can finish within the timer's resolution
+    print(f"{report['files']} files ({report['content_files']} content-analyzed) in {total:.1f}s "
+          f"= {report['files'] / max(total, 1e-9):.0f} files/s with fake backends")
+    for stage, seconds in report["seconds"].items():
+        print(f"   {stage:<14} {seconds:7.2f}s")
+    print(f"Real extractors would add about {report['estimated_model_seconds'] / 3600:.0f} core-hours "
+          f"(declared costs)")
+    for category, count in report["categories"].items():
+        print(f"   {category}: {count}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="smart-file-organizer", description="Smart File Organizer command line")
+    parser.add_argument("--embeddings", choices=["torch", "onnx"],
+                        help="Embedding backend (default: $SMART_ORGANIZER_EMBEDDINGS or torch)")
+    parser.add_argument("--matcher", choices=["embedding", "lexical"],
+                        help="Query matching engine (default: $SMART_ORGANIZER_MATCHER or embedding)")
+    parser.add_argument("--cores", type=int,
+                        help="Cores to use across all models (default: $SMART_ORGANIZER_CORES or all)")
+    parser.add_argument("--io-threads", type=int,
+                        help="Concurrent stat/listing requests, raise on high-latency network shares "
+                             "(default: $SMART_ORGANIZER_IO_THREADS or 4 per core, at most 32)")
+    parser.add_argument("--background", action="store_true",
+                        help="Run at the lowest CPU and I/O priority (default: $SMART_ORGANIZER_BACKGROUND=1)")
+    parser.add_argument("--max-mb-per-sec", type=float,
+                        help="Limit file reads and copies to this many MB/s (default: $SMART_ORGANIZER_MAX_MB_PER_SEC)")
+    parser.add_argument("--max-files-per-sec", type=float,
+                        help="Limit files read or copied per second (default: $SMART_ORGANIZER_MAX_FILES_PER_SEC)")
+    parser.add_argument("--fake-backends", action="store_true",
+                        help="Deterministic fake OCR/ASR/NLP/embedding models (for load tests; no real text)")
+    parser.add_argument("--fake-latency", type=float,
+                        help="With --fake-backends, sleep this fraction of each extractor's declared cost")
+    parser.add_argument("--media-min-seconds", type=float,
+                        help="Do not transcribe audio/video shorter than this (default 1)")
+    parser.add_argument("--media-max-seconds", type=float,
+                        help="Do not transcribe audio/video longer than this (default: no limit)")
+    parser.add_argument("--image-dedup", choices=["off", "reuse", "group"],
+                        help="Near-identical images: OCR each one, reuse one OCR result per cluster (default), "
+                             "or also group each cluster into a subfolder")
+    parser.add_argument("--rules", metavar="FILE",
+                        help="Rule file (default: $SMART_ORGANIZER_RULES or rules.json in the app data folder)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    organize = commands.add_parser("organize", help="Scan, categorize and organize a folder")
+    organize.add_argument("folder", help="Folder to organize")
+    organize.add_argument("--dest", help="Destination folder (default: Organized_Files next to the source)")
+    organize.add_argument("--query", help="Smart query, e.g. 'organize by Invoice, Legal, Medical'")
+    organize.add_argument("--top-level", action="store_true", help="Do not scan subfolders")
+    organize.add_argument("--streaming", action="store_true", help="Organize files while analysis continues")
+    organize.add_argument("--no-index", action="store_true", help="Do not add files to the search index")
+    organize.set_defaults(func=_cmd_organize)
+
+    search = commands.add_parser("search", help="Free-text search over indexed files")
+    search.add_argument("query", help="What to look for, e.g. 'dental bills'")
+    search.add_argument("-k", type=int, default=10, help="Number of results")
+    search.add_argument("-v", "--verbose", action="store_true", help="Show a text snippet per result")
+    search.set_defaults(func=_cmd_search)
+
+    job_queue = commands.add_parser("queue", help="Shared job queue: scan one folder with workers on several hosts")
+    queue_commands = job_queue.add_subparsers(dest="queue_command", required=True)
+
+    create = queue_commands.add_parser("create", help="List a folder into a job database")
+    create.add_argument("db", help="Job database file (on storage all workers can reach)")
+    create.add_argument("folder", help="Folder to organize (same path on every host)")
+    create.add_argument("--query", help="Smart query, e.g. 'organize by Invoice, Legal, Medical'")
+    create.add_argument("--top-level", action="store_true", help="Do not scan subfolders")
+    create.set_defaults(func=_cmd_queue_create)
+
+    work = queue_commands.add_parser("work", help="Claim batches and extract content until the job is empty")
+    work.add_argument("db", help="Job database file")
+    work.add_argument("-p", "--processes", type=int, default=1, help="Worker processes on this host")
+    work.add_argument("--batch-size", type=int, default=16, help="Files claimed at a time")
+    work.set_defaults(func=_cmd_queue_work)
+
+    status = queue_commands.add_parser("status", help="Show job progress")
+    status.add_argument("db", help="Job database file")
+    status.set_defaults(func=_cmd_queue_status)
+
+    coordinate = queue_commands.add_parser("coordinate", help="Wait for the workers, then categorize and organize")
+    coordinate.add_argument("db", help="Job database file")
+    coordinate.add_argument("dest", help="Destination folder")
+    coordinate.add_argument("--no-wait", action="store_true", help="Fail instead of waiting for unfinished files")
+    coordinate.add_argument("--no-index", action="store_true", help="Do not add files to the search index")
+    coordinate.set_defaults(func=_cmd_queue_coordinate)
+
+    daemon = commands.add_parser("daemon", help="Keep models loaded between runs (UI and CLI use it when running)")
+    daemon.add_argument("action", choices=["start", "stop", "status"])
+    daemon.add_argument("--lazy", action="store_true", help="Load each model on its first request instead of at start")
+    daemon.set_defaults(func=_cmd_daemon)
+
+    quarantine = commands.add_parser("quarantine", help="Files skipped after they hung or crashed extraction")
+    quarantine.add_argument("action", choices=["list", "clear"])
+    quarantine.add_argument("paths", nargs="*", help="Files to clear (default: all)")
+    quarantine.set_defaults(func=_cmd_quarantine)
+
+    throttle = commands.add_parser("throttle", help="Change the rate limits of running and later runs on this host")
+    throttle.add_argument("action", choices=["set", "clear", "status"])
+    throttle.add_argument("--mb-per-sec", type=float, help="MB read or copied per second (set)")
+    throttle.add_argument("--files-per-sec", type=float, help="Files read or copied per second (set)")
+    throttle.set_defaults(func=_cmd_throttle)
+
+    ledger = commands.add_parser("where", help="Look up where an organized file went")
+    ledger.add_argument("query", help="Original path (default), file name, hash, or a file with the same content")
+    lookup = ledger.add_mutually_exclusive_group()
+    lookup.add_argument("--name", action="store_true", help="Match the original file name in any folder")
+    lookup.add_argument("--hash", action="store_true", help="Match a content hash")
+    lookup.add_argument("--same-content", action="store_true",
+                        help="Hash the given file and find where files with the same content went")
+    ledger.add_argument("--limit", type=int, default=100, help="Entries shown at most")
+    ledger.set_defaults(func=_cmd_ledger)
+
+    rule_file = commands.add_parser("rules", help="Check the rule file, or show which files its rules would take")
+    rule_commands = rule_file.add_subparsers(dest="action", required=True)
+    rule_commands.add_parser("check", help="Compile the rules and list them in order")
+    rule_test = rule_commands.add_parser("test", help="Dry run: files each rule takes in a folder (nothing is moved)")
+    rule_test.add_argument("folder", help="Folder to test against")
+    rule_test.add_argument("--top-level", action="store_true", help="Do not scan subfolders")
+    rule_test.add_argument("--limit", type=int, default=5, help="Files listed per category")
+    rule_file.set_defaults(func=_cmd_rules)
+
+    parity = commands.add_parser("parity", help="Compare torch and ONNX embedding decisions and speed")
+    parity.add_argument("--keywords-file", help="File with one comma-separated keyword set per line")
+    parity.add_argument("--categories", help="Comma-separated query categories")
+    parity.add_argument("--threshold", type=float, default=0.45, help="Similarity threshold to compare at")
+    parity.add_argument("--fp32", action="store_true", help="Compare against the unquantized ONNX model")
+    parity.set_defaults(func=_cmd_parity)
+
+    matchers = commands.add_parser("compare-matchers",
+                                   help="Compare lexical and embedding matching: agreement, speed, memory")
+    matchers.add_argument("--keywords-file", help="File with one comma-separated keyword set per line")
+    matchers.add_argument("--categories", help="Comma-separated query categories")
+    matchers.add_argument("--threshold", type=float, default=0.45, help="Similarity threshold of the embedding engine")
+    matchers.set_defaults(func=_cmd_compare_matchers)
+
+    extractors = commands.add_parser("extractors", help="List the registered extractors with their models and cost")
+    extractors.set_defaults(func=_cmd_extractors)
+
+    loadtest = commands.add_parser("loadtest", help="Time the pipeline on synthetic files with fake backends")
+    loadtest.add_argument("--files", type=int, default=1_000_000, help="Number of synthetic files")
+    loadtest.add_argument("--query", help="Smart query (default: invoice, legal, medical, travel)")
+    loadtest.set_defaults(func=_cmd_loadtest)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.embeddings:
+        # Read by logic at import time
+        os.environ["SMART_ORGANIZER_EMBEDDINGS"] = args.embeddings
+    if args.matcher:
+        # Read by logic at import time
+        os.environ["SMART_ORGANIZER_MATCHER"] = args.matcher
+    if args.fake_backends:
+        # Read by the model manager and the extractor registry at import time
+        os.environ["SMART_ORGANIZER_FAKE_BACKENDS"] = "1"
+    if args.fake_latency is not None:
+        os.environ["SMART_ORGANIZER_FAKE_LATENCY"] = str(args.fake_latency)
+    if args.media_min_seconds is not None:
+        # Read when the media_probe module is imported
+        os.environ["SMART_ORGANIZER_MEDIA_MIN_SECONDS"] = str(args.media_min_seconds)
+    if args.media_max_seconds is not None:
+        os.environ["SMART_ORGANIZER_MEDIA_MAX_SECONDS"] = str(args.media_max_seconds)
+    if args.image_dedup:
+        # Read when the image_hashes module is imported
+        os.environ["SMART_ORGANIZER_IMAGE_DEDUP"] = args.image_dedup
+    if args.rules:
+        # Read when the rules module is imported
+        os.environ["SMART_ORGANIZER_RULES"] = os.path.abspath(args.rules)
+    if args.cores:
+        # Read by the thread budget before any model is loaded
+        os.environ["SMART_ORGANIZER_CORES"] = str(args.cores)
+    if args.io_threads:
+        # Read by the metadata cache on every prefetch
+        os.environ["SMART_ORGANIZER_IO_THREADS"] = str(args.io_threads)
+    if args.max_mb_per_sec:
+        # Read by the throttle when logic is imported
+        os.environ["SMART_ORGANIZER_MAX_MB_PER_SEC"] = str(args.max_mb_per_sec)
+    if args.max_files_per_sec:
+        os.environ["SMART_ORGANIZER_MAX_FILES_PER_SEC"] = str(args.max_files_per_sec)
+    if args.background:
+        # Inherited by extraction and job queue worker processes
+        os.environ["SMART_ORGANIZER_BACKGROUND"] = "1"
+    if os.environ.get("SMART_ORGANIZER_BACKGROUND") == "1":
+        from throttle import lower_priority
+        lower_priority()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+import os
+import time
+
+import numpy as np
+
+from storage import APP_DATA_DIR
+from thread_budget import get_thread_budget
+
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+HF_MODEL_ID = "sentence-transformers/all-MiniLM-L6-v2"
+MAX_SEQ_LENGTH = 256
+
+# Where exported ONNX models are cached
+ONNX_MODEL_DIR = os.path.join(APP_DATA_DIR, "onnx")
+
+
+class TorchEmbeddingBackend:
+    """SentenceTransformer in fp32 PyTorch (the original backend)."""
+    name = "torch"
+
+    def __init__(self, model_name=EMBEDDING_MODEL):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name, device="cpu")
+
+    def encode(self, texts, batch_size=64):
+        """L2-normalized float32 embeddings, one row per text."""
+        vectors = self.model.encode(list(texts), batch_size=batch_size, convert_to_numpy=True,
+                                    normalize_embeddings=True, show_progress_bar=False)
+        return vectors.astype(np.float32)
+
+
+def export_onnx_model(model_id=HF_MODEL_ID, output_dir=None, quantize=True):
+    """
+    Export the transformer to ONNX and (optionally) apply int8 dynamic quantization.
+
+    Needs torch + transformers once, at export time; the exported model then
+    runs on onnxruntime alone.
+
+    Returns:
+        Path of the .onnx file to load
+    """
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    output_dir = output_dir or os.path.join(ONNX_MODEL_DIR, model_id.split("/")[-1])
+    os.makedirs(output_dir, exist_ok=True)
+    fp32_path = os.path.join(output_dir, "model.onnx")
+    int8_path = os.path.join(output_dir, "model.int8.onnx")
+
+    tokenizer = AutoTokenizer.from_pretrained(model_id)
+    tokenizer.save_pretrained(output_dir)
+
+    if not os.path.exists(fp32_path):
+        model = AutoModel.from_pretrained(model_id).eval()
+        dummy = tokenizer(["export"], return_tensors="pt")
+        with torch.no_grad():
+            torch.onnx.export(
+                model,
+                (dummy["input_ids"], dummy["attention_mask"], dummy["token_type_ids"]),
+                fp32_path,
+                input_names=["input_ids", "attention_mask", "token_type_ids"],
+                output_names=["last_hidden_state"],
+                dynamic_axes={name: {0: "batch", 1: "sequence"} for name in
+                              ["input_ids", "attention_mask", "token_type_ids", "last_hidden_state"]},
+                opset_version=14,
+            )
+
+    if not quantize:
+        return fp32_path
+    if not os.path.exists(int8_path):
+        quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+    return int8_path
+
+
+class OnnxEmbeddingBackend:
+    """
+    Same model exported to ONNX Runtime, int8 dynamically quantized by default.
+
+    Mean pooling + L2 normalization reproduce what SentenceTransformer does
+    for all-MiniLM-L6-v2, so scores stay comparable with the torch backend.
+    """
+    name = "onnx"
+
+    def __init__(self, model_id=HF_MODEL_ID, model_dir=None, quantize=True, intra_op_threads=None):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        model_dir = model_dir or os.path.join(ONNX_MODEL_DIR, model_id.split("/")[-1])
+        model_path = os.path.join(model_dir, "model.int8.onnx" if quantize else "model.onnx")
+        if not os.path.exists(model_path):
+            model_path = export_onnx_model(model_id, model_dir, quantize)
+
+        options = ort.SessionOptions()
+        # Intra-op threads come from the global thread budget unless given
+        options.intra_op_num_threads = intra_op_threads or get_thread_budget().threads_per_worker
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.dim = self.session.get_outputs()[0].shape[-1]
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+
+    def encode(self, texts, batch_size=64):
+        """L2-normalized float32 embeddings, one row per text."""
+        texts = list(texts)
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        # Sorting by length keeps padding (wasted compute) low inside each batch
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        output = [None] * len(texts)
+        for start in range(0, len(texts), batch_size):
+            batch_ids = order[start:start + batch_size]
+            tokens = self.tokenizer([texts[i] for i in batch_ids], padding=True, truncation=True,
+                                    max_length=MAX_SEQ_LENGTH, return_tensors="np")
+            feeds = {name: tokens[name].astype(np.int64) for name in self.input_names if name in tokens}
+            hidden = self.session.run(None, feeds)[0]
+            mask = tokens["attention_mask"][..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            for row, i in enumerate(batch_ids):
+                output[i] = pooled[row]
+        return np.stack(output).astype(np.float32)
+
+
+EMBEDDING_BACKENDS = {
+    "torch": TorchEmbeddingBackend,
+    "onnx": OnnxEmbeddingBackend,
+}
+
+
+def load_embedding_backend(name="torch", **kwargs):
+    """Create an embedding backend by name ("torch" or "onnx")."""
+    if name not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embedding backend '{name}' (choose from {', '.join(EMBEDDING_BACKENDS)})")
+    return EMBEDDING_BACKENDS[name](**kwargs)
+
+
+class EmbeddingCache:
+    """
+    Embeddings of every text encoded so far, for re-querying one scan.
+
+    Has the backends' encode() interface; only texts not seen before are
+    passed on to the backend, so matching the same keywords against a new
+    query only encodes the new category words.
+
+    Args:
+        load_backend: Callable returning the backend for new texts
+            (called only when there are any)
+    """
+    def __init__(self, load_backend):
+        self.load_backend = load_backend
+        self._rows = {}         # text -> row of _vectors
+        self._vectors = None
+
+    def encode(self, texts, batch_size=64):
+        """L2-normalized float32 embeddings, one row per text."""
+        texts = list(texts)
+        missing = [t for t in dict.fromkeys(texts) if t not in self._rows]
+        if missing:
+            vectors = self.load_backend().encode(missing, batch_size=batch_size)
+            first_row = len(self._rows)
+            self._rows.update((t, first_row + i) for i, t in enumerate(missing))
+            self._vectors = vectors if self._vectors is None else np.concatenate([self._vectors, vectors])
+        if self._vectors is None:
+            return np.zeros((0, 0), dtype=np.float32)
+        return self._vectors[[self._rows[t] for t in texts]]
+
+
+# ===== PARITY CHECK =====
+
+# Query categories and file keyword sets used when no real data is given
+PARITY_CATEGORIES = ["invoice", "legal", "medical", "resume", "travel", "recipe"]
+PARITY_KEYWORDS = [
+    "payment, amount, due, tax, customer, bill",
+    "agreement, party, clause, court, contract, liability",
+    "patient, diagnosis, prescription, doctor, dosage, clinic",
+    "experience, skill, education, engineer, project, reference",
+    "flight, hotel, booking, passport, itinerary, airport",
+    "flour, sugar, oven, bake, minute, butter",
+    "meeting, agenda, team, quarter, review, goal",
+    "photo, beach, sunset, family, holiday, summer",
+    "dental, cleaning, appointment, insurance, claim, tooth",
+    "lease, tenant, rent, landlord, deposit, property",
+]
+
+
+def _decisions(backend, keyword_sets, categories, threshold):
+    """(matched category or None, best score) per keyword set, as match_query_category decides."""
+    targets = backend.encode(categories)
+    results = []
+    for keywords in keyword_sets:
+        words = [k.strip() for k in keywords.split(",") if k.strip()]
+        if not words:
+            results.append((None, 0.0))
+            continue
+        scores = backend.encode(words) @ targets.T
+        best = float(scores.max())
+        match = categories[int(scores.max(axis=0).argmax())] if best > threshold else None
+        results.append((match, best))
+    return results
+
+
+def check_parity(reference, candidate, keyword_sets=None, categories=None, threshold=0.45):
+    """
+    Compare threshold decisions of two backends on the same keyword sets.
+
+    Returns:
+        Dict with agreement (fraction of identical decisions), flipped
+        (list of (keywords, reference decision, candidate decision)) and
+        max_score_diff
+    """
+    keyword_sets = keyword_sets or PARITY_KEYWORDS
+    categories = categories or PARITY_CATEGORIES
+    ref = _decisions(reference, keyword_sets, categories, threshold)
+    cand = _decisions(candidate, keyword_sets, categories, threshold)
+
+    flipped = [(kw, r[0], c[0]) for kw, r, c in zip(keyword_sets, ref, cand) if r[0] != c[0]]
+    return {
+        "agreement": 1 - len(flipped) / len(keyword_sets),
+        "flipped": flipped,
+        "max_score_diff": max(abs(r[1] - c[1]) for r, c in zip(ref, cand)),
+    }
+
+
+def benchmark_backend(backend, texts=None, repeats=3):
+    """Embedding throughput of a backend in texts/sec (best of repeats)."""
+    texts = texts or [k.strip() for kw in PARITY_KEYWORDS for k in kw.split(",")] * 20
+    backend.encode(texts[:8])  # warm-up
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        backend.encode(texts)
+        best = min(best, time.perf_counter() - start)
+    return len(texts) / best
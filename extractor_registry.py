@@ -0,0 +1,130 @@
+import fnmatch
+import mimetypes
+import os
+import time
+
+from models import MODEL_MEMORY_MB
+
+
+class Extractor:
+    """
+    One way of turning a file into preview text, and what it costs.
+
+    Args:
+        name: Unique name (registering the same name again replaces it)
+        extract: Callable(file_path, ext, max_words) returning the text
+        modality: Cost class as used by the progress model and the
+            supervisor limits ("Documents", "Images", "Audio", "Video", "Archives")
+        extensions: Extensions handled, e.g. [".jpg", ".png"]
+        mime_types: MIME types handled; wildcards like "image/*" are allowed
+        models: Models it loads through models.get() - a file's last
+            extractor using a model is where the scan releases it
+        cost: Typical seconds per file on one core, for schedulers and
+            load-test reports
+        max_bytes: Most bytes it reads of one file, charged to the
+            background-mode rate limit (None = the whole file)
+        fake: Deterministic stand-in used when fake backends are enabled
+            (None = the extractor is cheap enough to run as it is)
+    """
+    def __init__(self, name, extract, modality, extensions=(), mime_types=(), models=(), cost=0.01, fake=None,
+                 max_bytes=None):
+        self.name = name
+        self.extract = extract
+        self.modality = modality
+        self.extensions = {e.lower() for e in extensions}
+        self.mime_types = list(mime_types)
+        self.models = tuple(models)
+        self.cost = cost
+        self.fake = fake
+        self.max_bytes = max_bytes
+
+    @property
+    def memory_mb(self):
+        """Resident memory of the models it loads (MB)."""
+        return sum(MODEL_MEMORY_MB.get(name, 100) for name in self.models)
+
+    def __repr__(self):
+        return f"Extractor({self.name!r}, {self.modality}, models={self.models}, cost={self.cost}s)"
+
+
+class ExtractorRegistry:
+    """
+    Extractors by extension and MIME type.
+
+    The extension decides first; an unregistered extension is mapped to
+    its MIME type and matched against the extractors' MIME patterns in
+    registration order. Registering an extractor for an extension that
+    is already taken moves the extension to the new one, so an engine is
+    swapped by registering its replacement.
+
+    With fake backends (SMART_ORGANIZER_FAKE_BACKENDS=1, see
+    fake_backends.py), extractors that declare a fake use it instead:
+    no model is loaded and the file is not read. The fake sleeps
+    fake_latency × the declared cost, to simulate slow engines.
+    """
+    def __init__(self):
+        self._by_name = {}
+        self._by_extension = {}
+        self.use_fakes = os.environ.get("SMART_ORGANIZER_FAKE_BACKENDS") == "1"
+        self.fake_latency = float(os.environ.get("SMART_ORGANIZER_FAKE_LATENCY") or 0.0)
+
+    def register(self, extractor):
+        """Add an extractor (or replace the one with the same name)."""
+        self.unregister(extractor.name)
+        self._by_name[extractor.name] = extractor
+        for ext in extractor.extensions:
+            self._by_extension[ext] = extractor
+        return extractor
+
+    def unregister(self, name):
+        extractor = self._by_name.pop(name, None)
+        if extractor is not None:
+            self._by_extension = {ext: e for ext, e in self._by_extension.items() if e is not extractor}
+
+    def get(self, name):
+        return self._by_name[name]
+
+    def __iter__(self):
+        return iter(self._by_name.values())
+
+    def find(self, ext=None, mime_type=None):
+        """Extractor for an extension or MIME type (None if there is none)."""
+        ext = (ext or "").lower()
+        if ext in self._by_extension:
+            return self._by_extension[ext]
+        mime_type = mime_type or (mimetypes.guess_type("file" + ext)[0] if ext else None)
+        if mime_type:
+            for extractor in self._by_name.values():
+                if any(fnmatch.fnmatchcase(mime_type, pattern) for pattern in extractor.mime_types):
+                    return extractor
+        return None
+
+    def extract(self, file_path, ext, max_words):
+        """
+        Preview text of a file from the extractor registered for ext.
+
+        Returns:
+            Text ("" if no extractor handles the file)
+        """
+        extractor = self.find(ext)
+        if extractor is None:
+            return ""
+        if self.use_fakes and extractor.fake is not None:
+            if self.fake_latency:
+                time.sleep(extractor.cost * self.fake_latency)
+            return extractor.fake(file_path, ext, max_words)
+        return extractor.extract(file_path, ext, max_words)
+
+    def describe(self):
+        """One line per extractor: extensions, modality, models, memory and cost."""
+        lines = []
+        for extractor in self._by_name.values():
+            models = ", ".join(extractor.models) or "-"
+            lines.append(f"{extractor.name:<14} {extractor.modality:<10} models: {models:<12} "
+                         f"{extractor.memory_mb:>4} MB  ~{extractor.cost:g}s/file  "
+                         f"{' '.join(sorted(extractor.extensions))}")
+        return lines
+
+
+# Filled in by logic.py; extract_text dispatches through it
+registry = ExtractorRegistry()
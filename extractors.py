@@ -0,0 +1,347 @@
+import codecs
+import mmap
+import os
+import re
+import zipfile
+import xml.etree.ElementTree as ET
+
+try:
+    from pdfminer.high_level import extract_pages
+    from pdfminer.layout import LTTextContainer
+except ImportError:  # pdfminer.six ships with markitdown's PDF support
+    extract_pages = None
+
+# Budgets per file - extraction stops at whichever is hit first
+MAX_WORDS = 500
+MAX_PAGES = 20              # PDF pages / PPTX slides
+MAX_SHEETS = 3
+MAX_ROWS = 500              # rows per sheet
+MAX_BYTES = 4_000_000       # uncompressed bytes read from a file
+TEXT_SAMPLE_BYTES = 48_000  # bytes read from a plain-text file, whatever its size
+ENCODING_PROBE_BYTES = 4096
+
+# Plain-text formats read by sampling (documents, code, logs, data)
+TEXT_EXTENSIONS = {".txt", ".md", ".rst", ".csv", ".tsv", ".log", ".json", ".xml", ".yaml", ".yml",
+                   ".py", ".js", ".html", ".css", ".java", ".cpp"}
+MARKUP_EXTENSIONS = {".html", ".xml"}
+_MARKUP_TAG = re.compile(r"<[^>]*>")
+
+# Byte order marks, longest first (UTF-32 LE starts with the UTF-16 LE mark)
+BOMS = [
+    (codecs.BOM_UTF32_LE, "utf-32-le"),
+    (codecs.BOM_UTF32_BE, "utf-32-be"),
+    (codecs.BOM_UTF8, "utf-8"),
+    (codecs.BOM_UTF16_LE, "utf-16-le"),
+    (codecs.BOM_UTF16_BE, "utf-16-be"),
+]
+
+# OOXML namespaces
+W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+A_NS = "{http://schemas.openxmlformats.org/drawingml/2006/main}"
+S_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+
+
+class _WordBudget:
+    """Collects words until the budget is full."""
+    def __init__(self, max_words):
+        self.max_words = max_words
+        self.words = []
+
+    @property
+    def full(self):
+        return len(self.words) >= self.max_words
+
+    def add(self, text):
+        """Add the words of text; returns True once the budget is full."""
+        if text and not self.full:
+            self.words.extend(text.split()[:self.max_words - len(self.words)])
+        return self.full
+
+    def text(self):
+        return " ".join(self.words)
+
+
+class _LimitedReader:
+    """File-like wrapper that reports EOF after max_bytes."""
+    def __init__(self, raw, max_bytes):
+        self.raw = raw
+        self.remaining = max_bytes
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b""
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.raw.read(size)
+        self.remaining -= len(data)
+        return data
+
+
+def _iter_xml_text(zf, member, text_tag, max_bytes, break_tags=()):
+    """
+    Stream text nodes of one XML part inside a ZIP without loading it.
+
+    Yields the text of every text_tag element and "\n" at the end of every
+    break_tags element. Elements are cleared as they are consumed so memory
+    stays flat; a part truncated by max_bytes just ends the stream.
+    """
+    with zf.open(member) as raw:
+        yield from _iter_reader_text(_LimitedReader(raw, max_bytes), text_tag, break_tags)
+
+
+def _iter_reader_text(reader, text_tag, break_tags=()):
+    """_iter_xml_text on an open reader (e.g. one whose byte budget spans several parts)."""
+    try:
+        for _, elem in ET.iterparse(reader, events=("end",)):
+            if elem.tag == text_tag:
+                if elem.text:
+                    yield elem.text
+            elif elem.tag in break_tags:
+                yield "\n"
+                elem.clear()
+    except ET.ParseError:
+        # Byte budget cut the XML short - keep what was read
+        return
+
+
+def _natural_key(name):
+    return [int(part) if part.isdigit() else part for part in re.split(r"(\d+)", name)]
+
+
+def extract_docx_text(file_path, max_words=MAX_WORDS, max_bytes=MAX_BYTES):
+    """Text of the first max_words words of a .docx, streamed from word/document.xml."""
+    budget = _WordBudget(max_words)
+    with zipfile.ZipFile(file_path) as zf:
+        pending = ""
+        for chunk in _iter_xml_text(zf, "word/document.xml", W_NS + "t", max_bytes, (W_NS + "p",)):
+            if chunk == "\n":
+                if budget.add(pending):
+                    break
+                pending = ""
+            else:
+                pending += chunk
+        else:
+            budget.add(pending)
+    return budget.text()
+
+
+def extract_pptx_text(file_path, max_words=MAX_WORDS, max_slides=MAX_PAGES, max_bytes=MAX_BYTES):
+    """Text of the first slides of a .pptx, stopping once max_words is reached."""
+    budget = _WordBudget(max_words)
+    with zipfile.ZipFile(file_path) as zf:
+        slides = sorted(
+            (n for n in zf.namelist() if re.fullmatch(r"ppt/slides/slide\d+\.xml", n)),
+            key=_natural_key
+        )
+        remaining = max_bytes
+        for member in slides[:max_slides]:
+            size = zf.getinfo(member).file_size
+            for chunk in _iter_xml_text(zf, member, A_NS + "t", remaining):
+                if budget.add(chunk):
+                    return budget.text()
+            remaining -= size
+            if remaining <= 0:
+                break
+    return budget.text()
+
+
+def extract_xlsx_text(file_path, max_words=MAX_WORDS, max_sheets=MAX_SHEETS, max_rows=MAX_ROWS,
+                      max_bytes=MAX_BYTES):
+    """
+    Cell text from the first rows of the first sheets of a .xlsx.
+
+    One byte budget covers the shared-strings table and the sheets. The
+    table is read only up to half of it; cells referring past that point
+    are skipped.
+    """
+    budget = _WordBudget(max_words)
+    with zipfile.ZipFile(file_path) as zf:
+        names = set(zf.namelist())
+        shared = []
+        reader = _LimitedReader(None, max_bytes)  # its raw stream is set per part
+        if "xl/sharedStrings.xml" in names:
+            current = []
+            with zf.open("xl/sharedStrings.xml") as raw:
+                reader.raw = _LimitedReader(raw, max_bytes // 2)
+                for chunk in _iter_reader_text(reader, S_NS + "t", (S_NS + "si",)):
+                    if chunk == "\n":
+                        shared.append("".join(current))
+                        current = []
+                    else:
+                        current.append(chunk)
+
+        sheets = sorted(
+            (n for n in names if re.fullmatch(r"xl/worksheets/sheet\d+\.xml", n)),
+            key=_natural_key
+        )
+        for member in sheets[:max_sheets]:
+            if reader.remaining <= 0:
+                break
+            with zf.open(member) as raw:
+                reader.raw = raw
+                rows = 0
+                cell_type = None
+                try:
+                    for event, elem in ET.iterparse(reader, events=("start", "end")):
+                        if event == "start":
+                            if elem.tag == S_NS + "c":
+                                cell_type = elem.get("t")
+                            continue
+                        if elem.tag == S_NS + "v" and elem.text:
+                            value = elem.text
+                            if cell_type == "s":
+                                index = int(value)
+                                value = shared[index] if index < len(shared) else ""
+                            if budget.add(value):
+                                return budget.text()
+                        elif elem.tag == S_NS + "t" and cell_type == "inlineStr" and elem.text:
+                            if budget.add(elem.text):
+                                return budget.text()
+                        elif elem.tag == S_NS + "row":
+                            elem.clear()
+                            rows += 1
+                            if rows >= max_rows:
+                                break
+                except ET.ParseError:
+                    pass
+    return budget.text()
+
+
+def extract_pdf_text(file_path, max_words=MAX_WORDS, max_pages=MAX_PAGES):
+    """Text of the first pages of a PDF, parsed one page at a time."""
+    if extract_pages is None:
+        raise ImportError("pdfminer.six is required for bounded PDF extraction")
+
+    budget = _WordBudget(max_words)
+    for page in extract_pages(file_path, maxpages=max_pages):
+        for element in page:
+            if isinstance(element, LTTextContainer):
+                if budget.add(element.get_text()):
+                    return budget.text()
+    return budget.text()
+
+
+def detect_encoding(prefix):
+    """
+    Encoding of a text file from its first bytes (None if it looks binary).
+
+    A byte order mark decides; otherwise UTF-16 without a mark is
+    recognized by its zero bytes, and anything that is not valid UTF-8
+    is read as cp1252.
+    """
+    for bom, encoding in BOMS:
+        if prefix.startswith(bom):
+            return encoding
+    if b"\x00" in prefix:
+        even_zeros = prefix[0::2].count(0)
+        odd_zeros = prefix[1::2].count(0)
+        # ASCII text in UTF-16 has a zero in every other byte
+        if odd_zeros > len(prefix) // 4 and even_zeros == 0:
+            return "utf-16-le"
+        if even_zeros > len(prefix) // 4 and odd_zeros == 0:
+            return "utf-16-be"
+        return None
+    try:
+        # Incremental: the prefix may end in the middle of a multi-byte character
+        codecs.getincrementaldecoder("utf-8")().decode(prefix, final=False)
+    except UnicodeDecodeError:
+        return "cp1252"
+    return "utf-8"
+
+
+def _sample_windows(data, size, window, alignment):
+    """Head, middle and tail byte windows, cut at line breaks where there are any."""
+    starts = [0, (size - window) // 2, size - window]
+    windows = []
+    for position, start in enumerate(starts):
+        start -= start % alignment
+        chunk = data[start:start + window]
+        if position > 0:
+            # Drop the partial first line
+            newline = chunk.find(b"\n")
+            if 0 <= newline < len(chunk) // 2:
+                chunk = chunk[newline + 1 + (-(newline + 1) % alignment):]
+        if position < 2:
+            # ...and the partial last one
+            newline = chunk.rfind(b"\n")
+            if newline >= len(chunk) // 2:
+                chunk = chunk[:newline + 1 + (-(newline + 1) % alignment)]
+        windows.append(chunk)
+    return windows
+
+
+def extract_plain_text(file_path, max_words=MAX_WORDS, max_bytes=TEXT_SAMPLE_BYTES, ext=None):
+    """
+    Text sampled from the head, middle and tail of a plain-text file.
+
+    The file is memory-mapped and at most max_bytes are read, in three
+    windows, so a 10 GB log costs as much as a 50 KB one. Smaller files are
+    read whole. The encoding is detected from the first few KB; HTML and XML
+    tags are dropped. Each window contributes an equal share of max_words
+    (the tail its last words).
+
+    Returns:
+        Extracted text ("" for empty or binary files)
+    """
+    ext = ext or os.path.splitext(file_path)[1].lower()
+    with open(file_path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return ""
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            encoding = detect_encoding(data[:ENCODING_PROBE_BYTES])
+            if encoding is None:
+                return ""
+            if size <= max_bytes:
+                windows = [data[:size]]
+            else:
+                alignment = 4 if encoding.startswith("utf-32") else 2 if encoding.startswith("utf-16") else 1
+                windows = _sample_windows(data, size, max_bytes // 3, alignment)
+
+    words_per_window = max_words // len(windows)
+    text_parts = []
+    for position, chunk in enumerate(windows):
+        text = chunk.decode(encoding, errors="ignore")
+        if position == 0:
+            text = text.lstrip("\ufeff")
+        if ext in MARKUP_EXTENSIONS:
+            text = _MARKUP_TAG.sub(" ", text)
+        if position == 2:
+            # The tail keeps its last words (log files end with the latest entries)
+            text_parts.append(" ".join(text.split()[-words_per_window:]))
+            continue
+        budget = _WordBudget(words_per_window + (max_words % len(windows) if position == 0 else 0))
+        budget.add(text)
+        text_parts.append(budget.text())
+    return "\n".join(part for part in text_parts if part)
+
+
+BOUNDED_EXTRACTORS = {
+    ".pdf": extract_pdf_text,
+    ".docx": extract_docx_text,
+    ".pptx": extract_pptx_text,
+    ".xlsx": extract_xlsx_text,
+}
+
+
+def extract_document_text(file_path, max_words=MAX_WORDS, ext=None):
+    """
+    Bounded text extraction for PDF, DOCX, XLSX and PPTX.
+
+    Reads only the first pages/sheets/rows (and at most MAX_BYTES of
+    uncompressed data), stopping as soon as max_words words are collected.
+
+    Returns:
+        Extracted text, or None if the format has no bounded extractor
+        (or its optional dependency is missing) so the caller can fall back
+        to a full conversion
+
+    ext overrides the file's extension (for files whose content was sniffed).
+    """
+    extractor = BOUNDED_EXTRACTORS.get(ext or os.path.splitext(file_path)[1].lower())
+    if extractor is None:
+        return None
+    try:
+        return extractor(file_path, max_words=max_words)
+    except ImportError:
+        return None
@@ -0,0 +1,148 @@
+import zlib
+
+import numpy as np
+
+# Words fake extractors draw from: the query categories used by the parity
+# checks and words that match them, so fake runs exercise the matching too
+FAKE_VOCABULARY = [
+    "invoice", "payment", "amount", "due", "tax", "customer", "bill",
+    "legal", "agreement", "party", "clause", "court", "contract", "liability",
+    "medical", "patient", "diagnosis", "prescription", "doctor", "dosage", "clinic",
+    "resume", "experience", "skill", "education", "engineer", "project", "reference",
+    "travel", "flight", "hotel", "booking", "passport", "itinerary", "airport",
+    "recipe", "flour", "sugar", "oven", "bake", "minute", "butter",
+    "meeting", "agenda", "team", "quarter", "review", "goal",
+    "photo", "beach", "sunset", "family", "holiday", "summer",
+]
+# Words per fake preview (real previews have up to 500; fewer keep load tests fast)
+FAKE_WORDS = 40
+# A fake text is two halves picked by the path's hash from this many each:
+# about a million distinct texts, without a random generator per file
+FAKE_HALVES = 1024
+# Dimension of fake embeddings (all-MiniLM-L6-v2 has 384)
+FAKE_DIMENSION = 384
+# Rows of the random table fake embeddings are built from
+FAKE_TABLE_ROWS = 4096
+
+FAKE_STOP_WORDS = {"a", "an", "and", "by", "for", "in", "into", "my", "of", "on", "or", "the", "to", "with"}
+FAKE_VERBS = {"organize", "sort", "group", "put", "move", "split", "file"}
+
+
+def _seed(text):
+    return zlib.crc32(text.encode("utf-8", "surrogatepass"))
+
+
+def _halves():
+    rng = np.random.default_rng(0)
+    words = np.array(FAKE_VOCABULARY, dtype=object)
+    return [[" ".join(words[rng.integers(0, len(words), FAKE_WORDS // 2)]) for _ in range(FAKE_HALVES)]
+            for _ in range(2)]
+
+
+_FIRST_HALVES, _SECOND_HALVES = _halves()
+
+
+def fake_text(file_path, max_words=FAKE_WORDS):
+    """Deterministic words for a file: the same path always gives the same text."""
+    seed = _seed(file_path)
+    text = _FIRST_HALVES[seed % FAKE_HALVES] + " " + _SECOND_HALVES[(seed >> 10) % FAKE_HALVES]
+    return text if max_words >= FAKE_WORDS else " ".join(text.split()[:max_words])
+
+
+def fake_extract(file_path, ext, max_words):
+    """Extractor stand-in (see extractor_registry.Extractor.fake)."""
+    return fake_text(file_path, max_words)
+
+
+class FakeOCR:
+    """easyocr.Reader stand-in: readtext returns fake lines without reading the image."""
+    def readtext(self, file_path, detail=0):
+        return fake_text(str(file_path)).split(" ", 5)
+
+
+class _Segment:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeWhisper:
+    """faster_whisper.WhisperModel stand-in: one segment of fake words."""
+    def transcribe(self, audio_path, **kwargs):
+        return iter([_Segment(fake_text(str(audio_path)))]), None
+
+
+class _ConversionResult:
+    def __init__(self, text_content):
+        self.text_content = text_content
+
+
+class FakeMarkItDown:
+    """MarkItDown stand-in."""
+    def convert(self, file_path, **kwargs):
+        return _ConversionResult(fake_text(str(file_path)))
+
+
+class _Token:
+    __slots__ = ("text", "lemma_", "pos_", "is_stop", "is_punct")
+
+    def __init__(self, text):
+        lower = text.lower()
+        self.text = text
+        self.lemma_ = lower
+        self.is_stop = lower in FAKE_STOP_WORDS
+        self.is_punct = not any(c.isalnum() for c in text)
+        self.pos_ = ("PUNCT" if self.is_punct else "NUM" if text.isdigit() else
+                     "VERB" if lower in FAKE_VERBS else "NOUN")
+
+
+class _TokenTable(dict):
+    def __missing__(self, word):
+        token = self[word] = _Token(word)
+        return token
+
+
+class FakeNLP:
+    """
+    spaCy stand-in: whitespace tokens, every word a noun except a few verbs.
+
+    Token objects are shared per distinct word, so a million previews cost
+    little more than splitting them.
+    """
+    def __init__(self):
+        self._tokens = _TokenTable()
+
+    def __call__(self, text):
+        return list(map(self._tokens.__getitem__, text.replace(",", " , ").split()))
+
+    def pipe(self, texts, batch_size=64, n_process=1):
+        return (self(text) for text in texts)
+
+
+class FakeEmbedder:
+    """
+    Embedding backend stand-in: a deterministic unit vector per text.
+
+    Equal texts get equal vectors (similarity 1) and different texts
+    nearly orthogonal ones, so keywords only match categories they spell.
+    """
+    name = "fake"
+
+    def __init__(self, dimension=FAKE_DIMENSION):
+        self.dim = dimension
+        self._table = np.random.default_rng(0).standard_normal((FAKE_TABLE_ROWS, dimension)).astype(np.float32)
+
+    def encode(self, texts, batch_size=64):
+        """L2-normalized float32 embeddings, one row per text."""
+        seeds = np.fromiter((_seed(t) for t in texts), dtype=np.uint64)
+        vectors = self._table[seeds % FAKE_TABLE_ROWS] + self._table[(seeds >> 12) % FAKE_TABLE_ROWS]
+        vectors /= np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+        return vectors
+
+
+FAKE_MODEL_LOADERS = {
+    "markitdown": lambda manager: FakeMarkItDown(),
+    "ocr": lambda manager: FakeOCR(),
+    "nlp": lambda manager: FakeNLP(),
+    "embedder": lambda manager: FakeEmbedder(),
+    "whisper": lambda manager: FakeWhisper(),
+}
@@ -0,0 +1,203 @@
+import codecs
+import os
+import sqlite3
+import zipfile
+
+from storage import app_data_path
+
+# Bytes read from the start of an unknown file (one read per file)
+HEADER_BYTES = 4096
+
+# (offset, signature, extension) - checked in order, first match wins
+MAGIC_SIGNATURES = [
+    (0, b"\xff\xd8\xff", ".jpg"),
+    (0, b"\x89PNG\r\n\x1a\n", ".png"),
+    (0, b"GIF87a", ".gif"),
+    (0, b"GIF89a", ".gif"),
+    (0, b"II*\x00", ".tiff"),
+    (0, b"MM\x00*", ".tiff"),
+    (0, b"%PDF-", ".pdf"),
+    (0, b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1", ".doc"),   # OLE2 (legacy Office)
+    (0, b"Rar!\x1a\x07", ".rar"),
+    (0, b"7z\xbc\xaf\x27\x1c", ".7z"),
+    (0, b"\x1f\x8b", ".gz"),
+    (257, b"ustar", ".tar"),
+    (0, b"fLaC", ".flac"),
+    (0, b"ID3", ".mp3"),
+    (0, b"MZ", ".exe"),
+]
+
+# RIFF containers: form type at offset 8
+RIFF_TYPES = {b"WEBP": ".webp", b"WAVE": ".wav", b"AVI ": ".avi"}
+
+# ISO base media (MP4/MOV/M4A): major brand after "ftyp" at offset 4
+FTYP_BRANDS = {b"M4A ": ".m4a", b"M4B ": ".m4a", b"qt  ": ".mov"}
+
+# Types reported by the plain-text fallback
+TEXT_TYPES = {".txt", ".sh", ".html"}
+
+# Top folder of the main part inside an Office Open XML zip
+OOXML_FOLDERS = {"word/": ".docx", "ppt/": ".pptx", "xl/": ".xlsx"}
+
+
+def _sniff_zip(file_path, header):
+    """.docx/.pptx/.xlsx for Office zips, .zip for any other zip."""
+    # Member names are in the local headers, usually within the first few KB
+    for folder, ext in OOXML_FOLDERS.items():
+        if folder.encode() in header:
+            return ext
+    try:
+        with zipfile.ZipFile(file_path) as zf:
+            for name in zf.namelist():
+                for folder, ext in OOXML_FOLDERS.items():
+                    if name.startswith(folder):
+                        return ext
+    except (zipfile.BadZipFile, OSError):
+        pass
+    return ".zip"
+
+
+def _sniff_text(header):
+    """.txt (or .sh / .html) if the header looks like UTF-8 text."""
+    if not header or b"\x00" in header:
+        return None
+    try:
+        # Incremental: the read may end in the middle of a multi-byte character
+        text = codecs.getincrementaldecoder("utf-8")().decode(header, final=False)
+    except UnicodeDecodeError:
+        return None
+    start = text.lstrip()[:15].lower()
+    if text.startswith("#!"):
+        return ".sh"
+    if start.startswith("<!doctype html") or start.startswith("<html"):
+        return ".html"
+    return ".txt"
+
+
+def sniff_type(file_path, text_fallback=False):
+    """
+    Detect a file's type from its content.
+
+    Reads the first HEADER_BYTES bytes once and matches magic numbers;
+    ZIP files are looked into to tell DOCX/PPTX/XLSX from plain archives.
+
+    Args:
+        file_path: File to inspect
+        text_fallback: If no signature matches, report UTF-8 text as .txt
+
+    Returns:
+        Canonical extension (e.g. ".jpg", ".docx") or None if unknown
+    """
+    try:
+        with open(file_path, "rb") as f:
+            header = f.read(HEADER_BYTES)
+    except OSError:
+        return None
+
+    if header.startswith(b"PK\x03\x04"):
+        return _sniff_zip(file_path, header)
+    if header.startswith(b"RIFF"):
+        return RIFF_TYPES.get(header[8:12])
+    if header[4:8] == b"ftyp":
+        return FTYP_BRANDS.get(header[8:12], ".mp4")
+    if header.startswith(b"\x1a\x45\xdf\xa3"):
+        # Matroska; WebM declares its DocType in the EBML header
+        return ".webm" if b"webm" in header[:64] else ".mkv"
+    for offset, signature, ext in MAGIC_SIGNATURES:
+        if header[offset:offset + len(signature)] == signature:
+            return ext
+    # MPEG audio frame sync (MP3 without ID3 tag, AAC ADTS)
+    if len(header) > 1 and header[0] == 0xFF:
+        if header[1] in (0xFB, 0xF3, 0xF2):
+            return ".mp3"
+        if header[1] in (0xF1, 0xF9):
+            return ".aac"
+    return _sniff_text(header) if text_fallback else None
+
+
+class TypeCache:
+    """
+    Detected types by (device, inode), valid while mtime and size are unchanged.
+
+    Rescanning a folder then only sniffs files that are new or were modified.
+
+    Args:
+        db_path: SQLite file (default: filetypes.sqlite in the app data folder)
+    """
+    def __init__(self, db_path=None):
+        self.db = sqlite3.connect(db_path or app_data_path("filetypes.sqlite"))
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS types ("
+            "dev INTEGER, inode INTEGER, mtime_ns INTEGER, size INTEGER, ext TEXT,"
+            "PRIMARY KEY (dev, inode))"
+        )
+
+    def lookup(self, stats):
+        """Cached extension ("" = known to be unknown) per os.stat result, None on a miss."""
+        results = []
+        for st in stats:
+            row = self.db.execute(
+                "SELECT ext FROM types WHERE dev = ? AND inode = ? AND mtime_ns = ? AND size = ?",
+                (st.st_dev, st.st_ino, st.st_mtime_ns, st.st_size)
+            ).fetchone()
+            results.append(row[0] if row else None)
+        return results
+
+    def store(self, entries):
+        """Save (os.stat result, extension or None) pairs."""
+        self.db.executemany(
+            "INSERT OR REPLACE INTO types (dev, inode, mtime_ns, size, ext) VALUES (?, ?, ?, ?, ?)",
+            [(st.st_dev, st.st_ino, st.st_mtime_ns, st.st_size, ext or "") for st, ext in entries]
+        )
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+
+def detect_types(file_paths, cache=None, stat=os.stat):
+    """
+    Content-based type of each file, using the cache where possible.
+
+    Only files without any extension fall back to plain-text detection, so
+    e.g. .json or .log files are not turned into documents.
+
+    Args:
+        file_paths: Files whose extension is missing or unknown
+        cache: Optional TypeCache (default: the app's cache)
+        stat: os.stat or a cached equivalent
+
+    Returns:
+        One canonical extension or None per file
+    """
+    if not file_paths:
+        return []
+    own_cache = cache is None
+    cache = cache or TypeCache()
+    try:
+        stats = []
+        for path in file_paths:
+            try:
+                stats.append(stat(path))
+            except OSError:
+                stats.append(None)
+        present = [i for i, st in enumerate(stats) if st is not None]
+        cached = dict(zip(present, cache.lookup([stats[i] for i in present])))
+
+        results = [None] * len(file_paths)
+        sniffed = []
+        for i in present:
+            ext = cached[i]
+            if ext is None:
+                # The cache keeps the raw result; the text policy below depends on the name
+                ext = sniff_type(file_paths[i], text_fallback=True)
+                sniffed.append((stats[i], ext))
+            if ext in TEXT_TYPES and os.path.splitext(file_paths[i])[1]:
+                ext = None
+            results[i] = ext or None
+        if sniffed:
+            cache.store(sniffed)
+        return results
+    finally:
+        if own_cache:
+            cache.close()
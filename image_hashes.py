@@ -0,0 +1,179 @@
+import os
+import threading
+
+from PIL import Image
+
+# dHash of a (HASH_SIZE + 1) × HASH_SIZE grayscale thumbnail: 256 bits. Large
+# enough that screenshots of different text in the same window layout differ;
+# 8×8 hashes collide on those.
+HASH_SIZE = 16
+HASH_BITS = HASH_SIZE * HASH_SIZE
+# Images whose hashes differ in at most this many bits share one OCR result
+MAX_DISTANCE = 10
+# Multi-index hashing: the hash is split into CHUNKS exact-match keys. Two
+# hashes within MAX_DISTANCE bits agree on at least one chunk as long as
+# CHUNKS > MAX_DISTANCE (pigeonhole), so only images sharing a chunk are compared.
+CHUNKS = 16
+CHUNK_BITS = HASH_BITS // CHUNKS
+# Clusters listed by name in the report
+REPORTED_CLUSTERS = 10
+
+# What to do with near-identical images: "off" (OCR every image), "reuse"
+# (OCR once per cluster and report) or "group" (reuse, and organize each
+# cluster into one subfolder of its category)
+DEDUP_MODES = ("off", "reuse", "group")
+
+
+def dhash(file_path):
+    """
+    Difference hash of an image as an int of HASH_BITS bits (None if unreadable).
+
+    Each bit says whether a pixel of the grayscale thumbnail is brighter
+    than its right neighbor. JPEGs are decoded at reduced size directly.
+    """
+    try:
+        with Image.open(file_path) as image:
+            image.draft("L", (HASH_SIZE * 8, HASH_SIZE * 8))
+            pixels = list(image.convert("L").resize((HASH_SIZE + 1, HASH_SIZE), Image.BILINEAR).getdata())
+    except Exception:
+        return None
+    value = 0
+    for row in range(HASH_SIZE):
+        offset = row * (HASH_SIZE + 1)
+        for column in range(HASH_SIZE):
+            value = (value << 1) | (pixels[offset + column] > pixels[offset + column + 1])
+    return value
+
+
+def hamming(a, b):
+    """Number of differing bits of two hashes."""
+    return bin(a ^ b).count("1")
+
+
+def _chunks(value):
+    mask = (1 << CHUNK_BITS) - 1
+    return [(i, (value >> (i * CHUNK_BITS)) & mask) for i in range(CHUNKS)]
+
+
+class ImageDeduplicator:
+    """
+    Shares OCR text between near-identical images (screenshots, photo bursts).
+
+    extract_text hashes every image before OCR. If an image within
+    MAX_DISTANCE bits was already read in this run, its text is reused;
+    otherwise the image is read and its hash indexed. Every image seen is
+    indexed (pointing at its cluster's first image), so a burst drifting
+    slowly away from its first frame still joins the cluster.
+
+    Set SMART_ORGANIZER_IMAGE_DEDUP to "off", "reuse" (default) or "group".
+    """
+    def __init__(self, mode=None):
+        self._lock = threading.Lock()
+        self.set_mode(mode or os.environ.get("SMART_ORGANIZER_IMAGE_DEDUP", "reuse"))
+        self.reset()
+
+    def set_mode(self, mode):
+        """Switch between "off", "reuse" and "group" (see DEDUP_MODES)."""
+        if mode not in DEDUP_MODES:
+            raise ValueError(f"Unknown image dedup mode '{mode}' (choose from {', '.join(DEDUP_MODES)})")
+        self.mode = mode
+
+    @property
+    def enabled(self):
+        return self.mode != "off"
+
+    def reset(self):
+        """Forget the images of the previous run."""
+        with self._lock:
+            self._hashes = []           # hash per indexed image
+            self._representative = []   # cluster representative (index) per indexed image
+            self._paths = []
+            self._buckets = {}          # (chunk position, chunk value) -> indexed images
+            self._texts = {}            # representative -> OCR text
+            self.cluster_of = {}        # abspath -> representative abspath, for duplicates only
+
+    def _nearest(self, value):
+        """Closest indexed image within MAX_DISTANCE (None if there is none)."""
+        best, best_distance = None, MAX_DISTANCE + 1
+        seen = set()
+        for key in _chunks(value):
+            for candidate in self._buckets.get(key, ()):
+                if candidate in seen:
+                    continue
+                seen.add(candidate)
+                distance = hamming(value, self._hashes[candidate])
+                if distance < best_distance:
+                    best, best_distance = candidate, distance
+        return best
+
+    def _index(self, path, value, representative):
+        position = len(self._hashes)
+        self._hashes.append(value)
+        self._representative.append(position if representative is None else representative)
+        self._paths.append(path)
+        for key in _chunks(value):
+            self._buckets.setdefault(key, []).append(position)
+        return position
+
+    def lookup(self, file_path):
+        """
+        OCR text of a near-identical image read earlier in this run.
+
+        Returns:
+            (text, token): text is None if the image has to be read; pass
+            token and the text to store() once it is
+        """
+        value = dhash(file_path)
+        if value is None:
+            return None, None
+        path = os.path.abspath(file_path)
+        with self._lock:
+            nearest = self._nearest(value)
+            if nearest is not None:
+                representative = self._representative[nearest]
+                if representative in self._texts:
+                    self._index(path, value, representative)
+                    self.cluster_of[path] = self._paths[representative]
+                    return self._texts[representative], None
+        return None, (path, value)
+
+    def store(self, token, text):
+        """Remember the text of an image that was read (token from lookup)."""
+        if token is None:
+            return
+        path, value = token
+        with self._lock:
+            position = self._index(path, value, None)
+            self._texts[position] = text
+
+    # ===== REPORTING =====
+
+    def cluster_for(self, file_path):
+        """First image of the cluster whose text this image reused ("" if it reused none)."""
+        with self._lock:
+            return self.cluster_of.get(os.path.abspath(file_path), "")
+
+    def clusters(self):
+        """{representative path: [near-duplicate paths]} of this run, largest first."""
+        with self._lock:
+            clusters = {}
+            for path, representative in self.cluster_of.items():
+                clusters.setdefault(representative, []).append(path)
+        return dict(sorted(clusters.items(), key=lambda item: -len(item[1])))
+
+    def report(self):
+        """Summary of the near-duplicate images of this run ("" if none)."""
+        clusters = self.clusters()
+        if not clusters:
+            return ""
+        reused = sum(len(members) for members in clusters.values())
+        lines = [f"🖼️ Near-duplicate images: {reused} reused the OCR text of {len(clusters)} others"]
+        for representative, members in list(clusters.items())[:REPORTED_CLUSTERS]:
+            names = ", ".join(os.path.basename(p) for p in members[:5])
+            more = f" (+{len(members) - 5} more)" if len(members) > 5 else ""
+            lines.append(f"   • {representative} ≈ {names}{more}")
+        return "\n".join(lines)
+
+
+# Shared by all stages of a run (reset by logic.reset_run_stats)
+image_dedup = ImageDeduplicator()
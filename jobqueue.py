@@ -0,0 +1,337 @@
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import time
+
+import logic
+from logic import _log
+from manifest import build_manifest
+from throttle import background_mode, lower_priority, throttle
+
+# Files claimed by a worker at a time
+DEFAULT_BATCH_SIZE = 16
+# A claimed batch not finished within this time is handed to another worker
+LEASE_SECONDS = 900
+# Claims per file before it is given up as failed (e.g. it crashes every worker)
+MAX_ATTEMPTS = 3
+# How long SQLite waits for another process's lock before raising
+BUSY_TIMEOUT_SECONDS = 60
+# Coordinator polling interval while workers are busy
+POLL_SECONDS = 5
+
+
+def _connect(db_path):
+    """
+    Open the job database.
+
+    The rollback journal (not WAL) is used on purpose: WAL needs shared
+    memory between processes and does not work across hosts on NFS/SMB.
+    """
+    db = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT_SECONDS, isolation_level=None)
+    db.execute("PRAGMA journal_mode=DELETE")
+    return db
+
+
+def _worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def create_job(db_path, folder_path, user_query=None, include_subfolders=True, progress_callback=None):
+    """
+    List a folder into a job database that workers on any host can process.
+
+    Categories come from user rules and file extensions, and with a query
+    the path tier of the cascade (classify_by_path) runs here once. Only
+    files that still need their content read are left "pending" for the
+    workers. Running it again on the same database adds files that
+    appeared since, drops those that were moved or deleted, and re-decides
+    every other file for the new query - content already extracted is
+    reused when a file stays in the content tier.
+
+    Args:
+        db_path: Job database, on storage every worker can reach
+        folder_path: Folder to organize (workers must see it under the same path)
+        user_query: Optional query like "organize by Invoice and Legal"
+        include_subfolders: If True, scan subdirectories; if False, scan only top level
+        progress_callback: Optional function(message) for progress updates
+
+    Returns:
+        Number of files queued for extraction
+    """
+    folder_path = os.path.abspath(folder_path)
+    file_paths = logic._list_files(folder_path, include_subfolders)
+    logic.stat_cache.prefetch(file_paths)
+    target_categories = logic.get_categories_from_query(user_query) if user_query else []
+
+    exts = logic.detect_extensions(file_paths)
+    categories = [logic._category_for_extension(ext) for ext in exts]
+    tiers = ["content" if logic._is_analyzed(c, e) else "extension" for c, e in zip(categories, exts)]
+    logic.apply_rules(file_paths, exts, categories, tiers, progress_callback)
+    if target_categories:
+        candidates = [i for i, tier in enumerate(tiers) if tier == "content" and categories[i] != "Others"]
+        decisions = logic.classify_by_path([file_paths[i] for i in candidates], target_categories, folder_path)
+        for i, (decided, matched) in zip(candidates, decisions):
+            if decided:
+                tiers[i] = "path"
+                categories[i] = matched or categories[i]
+
+    db = _connect(db_path)
+    db.execute(
+        "CREATE TABLE IF NOT EXISTS files ("
+        "id INTEGER PRIMARY KEY, path TEXT UNIQUE, filename TEXT, ext TEXT, category TEXT, tier TEXT,"
+        "status TEXT, worker TEXT, claimed_at REAL, attempts INTEGER DEFAULT 0,"
+        "preview TEXT DEFAULT '', keywords TEXT DEFAULT '', error TEXT, cluster TEXT DEFAULT '')"
+    )
+    if "cluster" not in {row[1] for row in db.execute("PRAGMA table_info(files)")}:
+        db.execute("ALTER TABLE files ADD COLUMN cluster TEXT DEFAULT ''")
+    db.execute("CREATE INDEX IF NOT EXISTS files_status ON files(status)")
+    db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+
+    db.execute("BEGIN IMMEDIATE")
+    db.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", [
+        ("folder", folder_path),
+        ("query", user_query or ""),
+        ("target_categories", json.dumps(target_categories)),
+    ])
+    # A file listed before takes this run's category and tier (the query may have changed):
+    # its extraction is kept only while it stays in the content tier
+    db.executemany(
+        "INSERT INTO files (path, filename, ext, category, tier, status) VALUES (?, ?, ?, ?, ?, ?) "
+        "ON CONFLICT(path) DO UPDATE SET category = excluded.category, tier = excluded.tier, "
+        "status = CASE WHEN files.tier = 'content' AND excluded.tier = 'content' THEN files.status ELSE excluded.status END, "
+        "preview = CASE WHEN excluded.tier = 'content' THEN files.preview ELSE '' END, "
+        "keywords = CASE WHEN excluded.tier = 'content' THEN files.keywords ELSE '' END",
+        [(p, os.path.basename(p), e, c, t, "pending" if t == "content" else "done")
+         for p, e, c, t in zip(file_paths, exts, categories, tiers)]
+    )
+    # Files gone since the last run would otherwise be organized by coordinate
+    db.execute("CREATE TEMP TABLE listed (path TEXT PRIMARY KEY)")
+    db.executemany("INSERT OR IGNORE INTO listed (path) VALUES (?)", [(p,) for p in file_paths])
+    removed = db.execute("DELETE FROM files WHERE path NOT IN (SELECT path FROM listed)").rowcount
+    db.execute("COMMIT")
+    pending = db.execute("SELECT COUNT(*) FROM files WHERE status = 'pending'").fetchone()[0]
+    db.close()
+
+    _log(f"🗃️ Job {db_path}: {len(file_paths)} files, {pending} queued for extraction", progress_callback)
+    if removed:
+        _log(f"   {removed} files of an earlier run are gone and were dropped from the job", progress_callback)
+    return pending
+
+
+def claim_batch(db, worker, batch_size=DEFAULT_BATCH_SIZE, lease_seconds=LEASE_SECONDS):
+    """
+    Atomically claim up to batch_size files for one worker.
+
+    Pending files come first, then files whose lease expired (their worker
+    died or hung). BEGIN IMMEDIATE takes the write lock before reading, so two
+    workers can never claim the same file.
+
+    Returns:
+        List of (id, path, ext, category) tuples, empty when nothing is left
+    """
+    now = time.time()
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        # Files that used up their attempts are not retried again
+        db.execute(
+            "UPDATE files SET status = 'failed', error = 'gave up after repeated lease expiry' "
+            "WHERE status = 'claimed' AND claimed_at < ? AND attempts >= ?",
+            (now - lease_seconds, MAX_ATTEMPTS)
+        )
+        rows = db.execute(
+            "SELECT id, path, ext, category FROM files "
+            "WHERE status = 'pending' OR (status = 'claimed' AND claimed_at < ?) "
+            "ORDER BY status = 'claimed', id LIMIT ?",
+            (now - lease_seconds, batch_size)
+        ).fetchall()
+        db.executemany(
+            "UPDATE files SET status = 'claimed', worker = ?, claimed_at = ?, attempts = attempts + 1 WHERE id = ?",
+            [(worker, now, row[0]) for row in rows]
+        )
+        db.execute("COMMIT")
+    except Exception:
+        db.execute("ROLLBACK")
+        raise
+    return rows
+
+
+def _complete_batch(db, worker, results):
+    """Store (id, preview, keywords, cluster, error) results - only for files this worker still holds."""
+    db.execute("BEGIN IMMEDIATE")
+    db.executemany(
+        "UPDATE files SET status = ?, preview = ?, keywords = ?, cluster = ?, error = ? "
+        "WHERE id = ? AND worker = ? AND status = 'claimed'",
+        [("failed" if error else "done", preview, keywords, cluster, error, file_id, worker)
+         for file_id, preview, keywords, cluster, error in results]
+    )
+    db.execute("COMMIT")
+
+
+def run_worker(db_path, worker=None, batch_size=DEFAULT_BATCH_SIZE, lease_seconds=LEASE_SECONDS,
+               progress_callback=None):
+    """
+    Claim batches and run extraction + keyword extraction until the job is empty.
+
+    Models stay loaded between batches. Start as many workers as the hosts
+    can hold - each one only needs the job database and the folder.
+
+    Returns:
+        Number of files this worker processed
+    """
+    worker = worker or _worker_name()
+    db = _connect(db_path)
+    processed = 0
+    try:
+        while True:
+            batch = claim_batch(db, worker, batch_size, lease_seconds)
+            if not batch:
+                break
+            results = []
+            for file_id, file_path, ext, category in batch:
+                try:
+                    preview = logic.extract_text(category, file_path, ext)
+                    # Near-identical images this worker saw (see image_hashes.py)
+                    cluster = logic.image_dedup.cluster_for(file_path) if category == "Images" else ""
+                    results.append((file_id, preview, logic.extract_keywords(preview), cluster, None))
+                except Exception as e:
+                    results.append((file_id, "", "", "", str(e)))
+            _complete_batch(db, worker, results)
+            processed += len(batch)
+            _log(f"⚙️ {worker}: {processed} files processed", progress_callback)
+    finally:
+        db.close()
+        logic.models.release_all()
+    return processed
+
+
+def _worker_process(db_path, cores, processes, batch_size, lease_seconds):
+    # Each process gets its share of the cores (workers × threads ≤ cores)
+    logic.apply_thread_budget(cores, workers=processes)
+    # ... and of the host's rate limits
+    throttle.share(processes)
+    if background_mode():
+        lower_priority()
+    run_worker(db_path, batch_size=batch_size, lease_seconds=lease_seconds)
+
+
+def run_workers(db_path, processes=2, cores=None, batch_size=DEFAULT_BATCH_SIZE, lease_seconds=LEASE_SECONDS,
+                progress_callback=None):
+    """
+    Run several worker processes on this host and wait for them.
+
+    Args:
+        db_path: Job database
+        processes: Worker processes to start
+        cores: Cores shared by all of them (default: $SMART_ORGANIZER_CORES or all)
+    """
+    # spawn: forked copies of torch/OpenMP thread pools can deadlock
+    context = multiprocessing.get_context("spawn")
+    workers = [
+        context.Process(target=_worker_process, args=(db_path, cores, processes, batch_size, lease_seconds))
+        for _ in range(processes)
+    ]
+    _log(f"🚀 Starting {processes} workers on {socket.gethostname()}", progress_callback)
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join()
+    failed = sum(1 for process in workers if process.exitcode != 0)
+    if failed:
+        _log(f"⚠️ {failed} worker(s) exited with an error - their files are retried after the lease expires",
+             progress_callback)
+    return queue_status(db_path)
+
+
+def queue_status(db_path):
+    """
+    Progress of a job.
+
+    Returns:
+        Dict with the number of files per status (pending, claimed, done,
+        failed) and "workers": files finished per worker
+    """
+    db = _connect(db_path)
+    try:
+        status = {"pending": 0, "claimed": 0, "done": 0, "failed": 0}
+        status.update(db.execute("SELECT status, COUNT(*) FROM files GROUP BY status").fetchall())
+        status["workers"] = dict(db.execute(
+            "SELECT worker, COUNT(*) FROM files WHERE worker IS NOT NULL AND status = 'done' GROUP BY worker"
+        ).fetchall())
+    finally:
+        db.close()
+    return status
+
+
+def load_job_results(db_path):
+    """
+    The job as a scan_folder-style manifest with Keywords, plus the query
+    it was created with.
+    """
+    db = _connect(db_path)
+    try:
+        meta = dict(db.execute("SELECT key, value FROM meta").fetchall())
+        rows = db.execute(
+            "SELECT path, category, tier, preview, keywords, cluster FROM files ORDER BY id"
+        ).fetchall()
+    finally:
+        db.close()
+    paths, categories, tiers, previews, keywords, clusters = zip(*rows) if rows else ((),) * 6
+    df = build_manifest(paths, categories, tiers, previews, [c or "" for c in clusters])
+    df['Keywords'] = [k or "" for k in keywords]
+    return df, meta.get("query") or None
+
+
+def coordinate(db_path, destination_folder, wait=True, build_index=True, progress_callback=None):
+    """
+    Finish a job: wait for the workers, then match categories, organize and index.
+
+    Runs the same steps as organize_files_smart after its scan, on the
+    previews and keywords the workers wrote. Files that failed on every
+    attempt keep their extension category.
+
+    Args:
+        db_path: Job database
+        destination_folder: Where to organize files
+        wait: Poll until no file is pending or claimed (False = fail if unfinished)
+        build_index: If True, add every file to the local search index afterwards
+    """
+    logic.reset_run_stats()
+    while True:
+        status = queue_status(db_path)
+        remaining = status["pending"] + status["claimed"]
+        if not remaining:
+            break
+        if not wait:
+            raise RuntimeError(f"Job is not finished: {remaining} files still pending or claimed")
+        _log(f"⏳ Waiting for workers: {status['done']} done, {remaining} remaining", progress_callback)
+        time.sleep(POLL_SECONDS)
+    if status["failed"]:
+        _log(f"⚠️ {status['failed']} files could not be analyzed - they keep their extension category",
+             progress_callback)
+
+    df, user_query = load_job_results(db_path)
+    _log(f"Found {len(df)} files", progress_callback)
+    if len(df) == 0:
+        _log("⚠️ No files found", progress_callback)
+        return df
+
+    if user_query:
+        _log(f"\n🎯 Matching files to query categories: '{user_query}'", progress_callback)
+        with logic.run_stage("Semantic matching", uses=["nlp", "embedder"], release=["nlp"]):
+            df = logic.refine_categories_with_semantic_search(df, user_query, progress_callback)
+        logic.log_cascade_report(df, progress_callback)
+
+    _log("\n📊 CATEGORY BREAKDOWN:", progress_callback)
+    for category, count in df['Category'].value_counts().items():
+        _log(f"   • {category}: {count} files", progress_callback)
+
+    with logic.run_stage("Organizing"):
+        logic.organize_files_into_folders(df, destination_folder, progress_callback)
+
+    if build_index:
+        with logic.run_stage("Indexing", uses=["embedder"], release=["embedder"]):
+            logic.index_files(df, progress_callback)
+    logic.log_run_report(progress_callback)
+    return df
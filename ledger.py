@@ -0,0 +1,177 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from storage import app_data_path
+
+LEDGER_PATH = app_data_path("ledger.sqlite")
+# Rows written per transaction
+WRITE_BATCH = 10_000
+# Read size when hashing a file for a lookup
+HASH_CHUNK_BYTES = 1 << 20
+
+
+def new_hasher():
+    """Hasher used for ledger entries (BLAKE2b, 128-bit digest)."""
+    return hashlib.blake2b(digest_size=16)
+
+
+def file_hash(path):
+    """Ledger hash of a file on disk, e.g. to find where another copy of it went."""
+    hasher = new_hasher()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def hashing_enabled():
+    """False if $SMART_ORGANIZER_LEDGER_HASH=0 (copies then keep the faster zero-copy path)."""
+    return os.environ.get("SMART_ORGANIZER_LEDGER_HASH", "1") != "0"
+
+
+class Ledger:
+    """
+    Indexed record of where every organized file went.
+
+    Copies are noted in memory and written in large transactions every
+    WRITE_BATCH copies, so a crash mid-run loses at most one batch. Before
+    any original is deleted the run flushes the rest (and deletes nothing
+    if that fails); the deleted originals are then marked with an UPDATE.
+    Lookups by original path, filename or content hash use indexes, so
+    they stay fast with millions of entries.
+
+    Args:
+        db_path: SQLite file (default: ledger.sqlite in the app data folder)
+    """
+    def __init__(self, db_path=LEDGER_PATH):
+        self.db_path = db_path
+        self._pending = {}      # source -> (dest, size, hash, copied at)
+        self._lock = threading.Lock()
+        self.run = time.strftime("%Y-%m-%d %H:%M:%S")
+
+    def _connect(self):
+        db = sqlite3.connect(self.db_path, timeout=60)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS moves ("
+            "id INTEGER PRIMARY KEY, source TEXT, filename TEXT, destination TEXT, size INTEGER,"
+            "hash TEXT, moved_at REAL, run TEXT, original_removed INTEGER)"
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS moves_source ON moves (source)")
+        db.execute("CREATE INDEX IF NOT EXISTS moves_filename ON moves (filename)")
+        db.execute("CREATE INDEX IF NOT EXISTS moves_hash ON moves (hash)")
+        return db
+
+    def reset(self):
+        """Start a new run (entries not written yet are dropped)."""
+        with self._lock:
+            self._pending = {}
+            self.run = time.strftime("%Y-%m-%d %H:%M:%S")
+
+    # ===== RECORDING =====
+
+    def note_copy(self, source_path, dest_path, size, digest=None):
+        """Remember one copy of this run (written with the next batch of WRITE_BATCH)."""
+        with self._lock:
+            self._pending[os.path.abspath(source_path)] = (os.path.abspath(dest_path), size, digest, time.time())
+            full = len(self._pending) >= WRITE_BATCH
+        if full:
+            try:
+                self.flush()
+            except Exception:
+                pass  # kept pending; the flush before any deletion retries and reports it
+
+    def flush(self):
+        """
+        Write the copies noted so far (their originals not removed yet).
+
+        Raises the sqlite3/OS error if the ledger cannot be written; the
+        entries are then kept for the next attempt.
+
+        Returns:
+            Number of entries written
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        rows = [
+            (source, os.path.basename(source), dest, size, digest, copied_at, self.run, 0)
+            for source, (dest, size, digest, copied_at) in pending.items()
+        ]
+        written = 0
+        try:
+            db = self._connect()
+            try:
+                for start in range(0, len(rows), WRITE_BATCH):
+                    with db:
+                        db.executemany(
+                            "INSERT INTO moves (source, filename, destination, size, hash, moved_at, run, "
+                            "original_removed) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                            rows[start:start + WRITE_BATCH]
+                        )
+                    written = min(start + WRITE_BATCH, len(rows))
+            finally:
+                db.close()
+        except Exception:
+            # Keep what was not committed (newer notes of the same source win)
+            with self._lock:
+                unwritten = {row[0]: pending[row[0]] for row in rows[written:]}
+                unwritten.update(self._pending)
+                self._pending = unwritten
+            raise
+        return len(rows)
+
+    def mark_removed(self, removed_sources):
+        """
+        Record that these originals were deleted (their entries must be flushed).
+
+        Returns:
+            Number of entries updated
+        """
+        rows = [(os.path.abspath(source), self.run) for source in removed_sources]
+        if not rows:
+            return 0
+        db = self._connect()
+        try:
+            for start in range(0, len(rows), WRITE_BATCH):
+                with db:
+                    db.executemany("UPDATE moves SET original_removed = 1 WHERE source = ? AND run = ?",
+                                   rows[start:start + WRITE_BATCH])
+        finally:
+            db.close()
+        return len(rows)
+
+    # ===== LOOKUPS =====
+
+    def _find(self, column, value, limit):
+        if not os.path.exists(self.db_path):
+            return []
+        db = self._connect()
+        db.row_factory = sqlite3.Row
+        try:
+            rows = db.execute(
+                f"SELECT * FROM moves WHERE {column} = ? ORDER BY moved_at DESC LIMIT ?", (value, limit)
+            ).fetchall()
+        finally:
+            db.close()
+        return [dict(row) for row in rows]
+
+    def find_source(self, source_path, limit=100):
+        """Entries for an original path (newest first)."""
+        return self._find("source", os.path.abspath(source_path), limit)
+
+    def find_filename(self, filename, limit=100):
+        """Entries for an original file name, in any folder."""
+        return self._find("filename", filename, limit)
+
+    def find_hash(self, digest, limit=100):
+        """Entries with this content hash (see file_hash)."""
+        return self._find("hash", digest.lower(), limit)
+
+
+# Shared by all stages of a run (reset by logic.reset_run_stats)
+ledger = Ledger()
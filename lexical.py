@@ -0,0 +1,210 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+# BM25 parameters (the usual defaults)
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Keyword list length BM25 normalizes against (a full list, see
+# logic.TOP_KEYWORDS). Fixed, like the IDF, so a file scores the same
+# whether it is matched alone (streaming) or in a batch.
+AVERAGE_LENGTH = 20
+# Floor of a term's IDF, so a word shared by every query category still counts
+MIN_IDF = 0.5
+# Score at or above which a file is moved to a query category. One exact
+# category word in a file's keywords reaches it; synonyms count half, so in
+# a full keyword list it takes one that points to a single category of
+# several, or two that several categories share (shorter lists weigh each
+# word more, as BM25 does).
+LEXICAL_THRESHOLD = 0.5
+# Query weight of a synonym relative to the category word itself
+SYNONYM_WEIGHT = 0.5
+
+# Files scored per block (scores do not depend on the block, so this only bounds memory)
+SCORE_BLOCK = 10_000
+
+# Query expansion: words that stand for a category in file keywords
+SYNONYMS = {
+    "invoice": ["bill", "billing", "receipt", "payment", "amount", "due", "tax", "vat", "total", "order",
+                "customer", "price", "balance", "charge"],
+    "receipt": ["invoice", "purchase", "payment", "paid", "store", "total", "cash", "card"],
+    "legal": ["contract", "agreement", "clause", "court", "law", "lawyer", "attorney", "party", "liability",
+              "terms", "license", "signature", "witness", "judgment"],
+    "contract": ["agreement", "party", "clause", "term", "signature", "obligation", "legal"],
+    "medical": ["health", "doctor", "patient", "hospital", "clinic", "diagnosis", "treatment", "prescription",
+                "medication", "insurance", "blood", "symptom", "dental", "therapy"],
+    "health": ["medical", "doctor", "patient", "fitness", "diet", "clinic"],
+    "finance": ["bank", "account", "statement", "transaction", "budget", "loan", "mortgage", "tax", "investment",
+                "credit", "debit", "interest", "salary", "payroll"],
+    "tax": ["return", "irs", "deduction", "income", "refund", "vat", "declaration"],
+    "travel": ["flight", "hotel", "booking", "ticket", "airport", "passport", "visa", "trip", "itinerary",
+               "reservation", "vacation", "train"],
+    "resume": ["experience", "education", "skill", "employment", "career", "university", "degree", "cv",
+               "reference", "position"],
+    "work": ["project", "meeting", "report", "client", "team", "deadline", "office", "manager", "presentation"],
+    "school": ["student", "teacher", "class", "homework", "exam", "grade", "course", "lecture", "university",
+               "assignment"],
+    "recipe": ["ingredient", "cook", "bake", "oven", "minute", "cup", "tablespoon", "teaspoon", "flour", "sugar",
+               "dish"],
+    "insurance": ["policy", "claim", "coverage", "premium", "insured", "deductible"],
+    "photo": ["picture", "camera", "image", "vacation", "family", "portrait"],
+    "music": ["song", "album", "artist", "lyrics", "band", "track"],
+    "personal": ["family", "letter", "birthday", "friend", "home", "diary"],
+}
+
+_TOKEN_SPLIT = re.compile(r"[^a-z0-9]+")
+
+
+def normalize(word):
+    """Lower-cased, crudely singularized word ("Invoices" → "invoice", "policies" → "policy")."""
+    word = word.lower()
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def _tokens(text):
+    return [normalize(t) for t in _TOKEN_SPLIT.split(text.lower()) if len(t) > 1]
+
+
+class LexicalMatcher:
+    """
+    Query categories matched by words instead of embeddings.
+
+    Each category becomes a weighted query - the category word plus its
+    synonyms from SYNONYMS - and files are scored with BM25 over their
+    keywords. A term's IDF comes from the expanded queries, not from the
+    files: the more categories a word stands for, the less it decides.
+    Scores therefore do not depend on which other files are matched in
+    the same call. Needs no model beyond the spaCy keywords it is given.
+
+    Args:
+        target_categories: Categories from get_categories_from_query
+        synonyms: Query expansion table (default: SYNONYMS)
+        threshold: Score at or above which a category is taken
+    """
+    def __init__(self, target_categories, synonyms=None, threshold=LEXICAL_THRESHOLD):
+        synonyms = SYNONYMS if synonyms is None else synonyms
+        self.target_categories = list(target_categories)
+        self.threshold = threshold
+        weights = {}  # term -> {category index: weight}
+        for index, category in enumerate(self.target_categories):
+            base = normalize(category)
+            for synonym in synonyms.get(base, []) + synonyms.get(category.lower(), []):
+                weights.setdefault(normalize(synonym), {})[index] = SYNONYM_WEIGHT
+            weights.setdefault(base, {})[index] = 1.0
+        self.terms = {term: i for i, term in enumerate(weights)}
+        # Query weight × IDF per (term, category); last row: no query term
+        self.query = np.zeros((len(self.terms) + 1, len(self.target_categories)))
+        n_categories = len(self.target_categories)
+        for term, by_category in weights.items():
+            idf = max(np.log((n_categories + 1) / len(by_category)), MIN_IDF)
+            for index, weight in by_category.items():
+                self.query[self.terms[term], index] = weight * idf
+
+    def scores(self, keyword_strings):
+        """
+        BM25 score of every file for every category.
+
+        Args:
+            keyword_strings: Comma-separated keywords per file
+
+        Returns:
+            Array (files × categories)
+        """
+        keyword_strings = list(keyword_strings)
+        if len(keyword_strings) > SCORE_BLOCK:
+            return np.concatenate([self.scores(keyword_strings[start:start + SCORE_BLOCK])
+                                   for start in range(0, len(keyword_strings), SCORE_BLOCK)])
+        token_lists = [_tokens(k) for k in keyword_strings]
+        lengths = np.array([len(tokens) for tokens in token_lists], dtype=np.float64)
+        owners = np.repeat(np.arange(len(token_lists)), lengths.astype(np.int64))
+        scores = np.zeros((len(token_lists), len(self.target_categories)))
+        if not len(owners):
+            return scores
+
+        # Term frequency per (file, term); terms outside the query only count toward the length
+        codes, vocabulary = pd.factorize(pd.Series([t for tokens in token_lists for t in tokens], dtype=object))
+        pairs, tf = np.unique(np.stack([owners, codes], axis=1), axis=0, return_counts=True)
+        files, terms = pairs[:, 0], pairs[:, 1]
+
+        saturation = tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * lengths[files] / AVERAGE_LENGTH))
+        query_rows = np.array([self.terms.get(term, len(self.terms)) for term in vocabulary])
+        contributions = saturation[:, None] * self.query[query_rows[terms]]
+
+        # Pairs are sorted by file, so each file's rows are one contiguous run
+        starts = np.flatnonzero(np.r_[True, files[1:] != files[:-1]])
+        scores[files[starts]] = np.add.reduceat(contributions, starts, axis=0)
+        return scores
+
+    def match(self, keyword_strings):
+        """Capitalized query category per file, or None where no category reaches the threshold."""
+        if not self.target_categories:
+            return [None] * len(keyword_strings)
+        scores = self.scores(keyword_strings)
+        best = scores.argmax(axis=1).tolist()
+        strong = (scores.max(axis=1) >= self.threshold).tolist()
+        return [self.target_categories[b].capitalize() if s else None for b, s in zip(best, strong)]
+
+    def match_tokens(self, token_lists):
+        """Like match, for path tokens (filename and folder words)."""
+        return self.match([", ".join(tokens) for tokens in token_lists])
+
+
+# ===== COMPARISON WITH THE EMBEDDING ENGINE =====
+
+def compare_engines(load_backend, keyword_sets=None, categories=None, threshold=0.45, repeats=3):
+    """
+    Measure the lexical engine against the embedding engine on the same keyword sets.
+
+    Args:
+        load_backend: Callable returning an embedding backend (loaded inside,
+            so its memory is measured)
+        keyword_sets: Comma-separated keywords per file (default: the parity set)
+        categories: Query categories (default: the parity categories)
+        threshold: Similarity threshold of the embedding engine
+
+    Returns:
+        Dict with agreement, flipped (keywords, embedding decision, lexical
+        decision), files_per_sec and memory_mb per engine
+    """
+    import time
+    import tracemalloc
+
+    from embeddings import PARITY_CATEGORIES, PARITY_KEYWORDS, _decisions
+    from models import current_rss_mb
+
+    keyword_sets = keyword_sets or PARITY_KEYWORDS
+    categories = categories or PARITY_CATEGORIES
+
+    def best_time(run):
+        best = float("inf")
+        for _ in range(repeats):
+            start = time.perf_counter()
+            run()
+            best = min(best, time.perf_counter() - start)
+        return best
+
+    tracemalloc.start()
+    lexical = [m.lower() if m else None for m in LexicalMatcher(categories).match(keyword_sets)]
+    lexical_memory = tracemalloc.get_traced_memory()[1] / 1_000_000
+    tracemalloc.stop()
+    lexical_time = best_time(lambda: LexicalMatcher(categories).match(keyword_sets))
+
+    rss_before = current_rss_mb() or 0.0
+    backend = load_backend()
+    embedding = [match for match, _ in _decisions(backend, keyword_sets, categories, threshold)]
+    embedding_memory = (current_rss_mb() or 0.0) - rss_before
+    embedding_time = best_time(lambda: _decisions(backend, keyword_sets, categories, threshold))
+
+    flipped = [(kw, e, l) for kw, e, l in zip(keyword_sets, embedding, lexical) if e != l]
+    return {
+        "agreement": 1 - len(flipped) / len(keyword_sets),
+        "flipped": flipped,
+        "files_per_sec": {"embedding": len(keyword_sets) / embedding_time,
+                          "lexical": len(keyword_sets) / lexical_time},
+        "memory_mb": {"embedding": embedding_memory, "lexical": lexical_memory},
+    }
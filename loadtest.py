@@ -0,0 +1,123 @@
+import os
+import time
+
+import numpy as np
+
+import logic
+from extractor_registry import registry
+from fake_backends import FAKE_VOCABULARY, fake_extract
+from manifest import build_manifest
+from models import models
+
+# Extensions of synthetic files and how often they occur (the rest fall in "Others")
+SYNTHETIC_EXTENSIONS = {
+    ".pdf": 12, ".docx": 8, ".xlsx": 3, ".pptx": 2, ".doc": 1, ".txt": 8, ".md": 2, ".csv": 3, ".log": 2,
+    ".jpg": 20, ".png": 10, ".mp3": 3, ".wav": 1, ".mp4": 3, ".mov": 1, ".zip": 2,
+    ".py": 4, ".js": 2, ".exe": 1, ".bin": 4, ".tmp": 8,
+}
+# Folder names of synthetic trees; about one in six is a query word, so the path tier has work
+SYNTHETIC_FOLDERS = ["Downloads", "Desktop", "Documents", "Archive", "Scans", "Work", "Personal",
+                     "Old", "Backup", "Shared", "Misc", "Projects"]
+DEFAULT_QUERY = "organize by invoice, legal, medical, travel"
+
+
+def synthetic_paths(count, seed=0):
+    """
+    Deterministic paths of a made-up tree (nothing is created on disk).
+
+    Returns:
+        List of count paths like "/synthetic/Work/invoice/payment_1234.pdf"
+    """
+    rng = np.random.default_rng(seed)
+    folders = np.array(SYNTHETIC_FOLDERS + [w.capitalize() for w in FAKE_VOCABULARY[::3]], dtype=object)
+    names = np.array(FAKE_VOCABULARY + ["img", "scan", "doc", "file", "untitled"], dtype=object)
+    exts = np.array(list(SYNTHETIC_EXTENSIONS), dtype=object)
+    weights = np.array(list(SYNTHETIC_EXTENSIONS.values()), dtype=float)
+
+    top = folders[rng.integers(0, len(SYNTHETIC_FOLDERS), count)]
+    sub = folders[rng.integers(0, len(folders), count)]
+    stems = names[rng.integers(0, len(names), count)]
+    numbers = rng.integers(0, 100_000, count).astype(str).astype(object)
+    suffixes = exts[rng.choice(len(exts), count, p=weights / weights.sum())]
+    return ("/synthetic/" + top + "/" + sub + "/" + stems + "_" + numbers + suffixes).tolist()
+
+
+def run_load_test(file_count=1_000_000, user_query=DEFAULT_QUERY, engine=None, progress_callback=None):
+    """
+    Time the pipeline's own overhead on synthetic files with fake backends.
+
+    Runs the classification cascade, extractor dispatch, keyword extraction
+    (with near-duplicate detection) and query matching on file_count
+    made-up paths. Every extractor is replaced by its deterministic fake and
+    the models by those of fake_backends.py, so what is measured is the
+    orchestration, and the declared extractor costs say how long the real
+    engines would have taken.
+
+    Returns:
+        Dict with seconds per stage, files, content_files, estimated_model_seconds
+        (sum of the declared costs) and categories (files per final category)
+    """
+    saved = models.fake_backends, models.use_daemon, registry.use_fakes
+    models.release_all()
+    models.fake_backends, models.use_daemon, registry.use_fakes = True, False, True
+    seconds = {}
+
+    def timed(stage, run):
+        logic._log(f"⏱️ {stage}...", progress_callback)
+        start = time.perf_counter()
+        result = run()
+        seconds[stage] = time.perf_counter() - start
+        return result
+
+    try:
+        file_paths = synthetic_paths(file_count)
+
+        def plan():
+            exts = [os.path.splitext(p)[1].lower() for p in file_paths]
+            categories = [logic._category_for_extension(ext) for ext in exts]
+            tiers = ["content" if logic._is_analyzed(c, e) else "extension" for c, e in zip(categories, exts)]
+            logic.apply_rules(file_paths, exts, categories, tiers)
+            return exts, categories, tiers
+        exts, categories, tiers = timed("Plan + rules", plan)
+
+        target_categories = logic.get_categories_from_query(user_query)
+
+        def path_tier():
+            candidates = [i for i, tier in enumerate(tiers) if tier == "content" and categories[i] != "Others"]
+            decisions = logic.classify_by_path([file_paths[i] for i in candidates], target_categories,
+                                               "/synthetic", engine=engine)
+            for i, (decided, matched) in zip(candidates, decisions):
+                if decided:
+                    tiers[i] = "path"
+                    categories[i] = matched or categories[i]
+        timed("Path tier", path_tier)
+
+        model_seconds = [0.0]
+
+        def extraction():
+            previews = [""] * len(file_paths)
+            for i, (file_path, ext, tier) in enumerate(zip(file_paths, exts, tiers)):
+                if tier != "content":
+                    continue
+                extractor = registry.find(ext)
+                if extractor is None:
+                    continue
+                # The files do not exist: even cheap extractors are faked
+                previews[i] = (extractor.fake or fake_extract)(file_path, ext, logic.PREVIEW_WORDS)
+                model_seconds[0] += extractor.cost
+            return build_manifest(file_paths, categories, tiers, previews)
+        df = timed("Extraction", extraction)
+
+        df = timed("Keywords", lambda: logic.extract_keywords_from_preview(df))
+        df = timed("Matching", lambda: logic.refine_categories_with_semantic_search(df, user_query, engine=engine))
+    finally:
+        models.release_all()
+        models.fake_backends, models.use_daemon, registry.use_fakes = saved
+
+    return {
+        "seconds": seconds,
+        "files": file_count,
+        "content_files": int((df["Tier"] == "content").sum()),
+        "estimated_model_seconds": model_seconds[0],
+        "categories": df["Category"].value_counts().to_dict(),
+    }
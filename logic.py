@@ -1,24 +1,41 @@
 import os
+import re
+import numpy as np
 import pandas as pd
-import easyocr
-import shutil
-import spacy
-import torch
+import queue
+import tempfile
+import threading
 from collections import Counter
-from sentence_transformers import SentenceTransformer, util
-from faster_whisper import WhisperModel
+from contextlib import contextmanager
+from functools import partial
 from moviepy.editor import VideoFileClip, AudioFileClip
-from markitdown import MarkItDown
 from pptx import Presentation
 from PIL import Image
 import io
+from progress import estimate_work_units
+from extractors import MAX_BYTES, TEXT_EXTENSIONS, TEXT_SAMPLE_BYTES, extract_document_text, extract_plain_text
+from archives import MAX_ARCHIVE_BYTES, extract_archive_text
+from vector_index import FileVectorIndex
+from filetypes import detect_types
+from manifest import TIERS, build_manifest, manifest_paths, set_categories
+from near_duplicates import find_near_duplicates
+from lexical import LexicalMatcher
+from embeddings import EmbeddingCache
+from thread_budget import configure_thread_budget, get_thread_budget
+from models import models
+from metadata import stat_cache
+from model_daemon import DaemonUnavailable
+from supervisor import quarantine, supervisor
+from throttle import throttle
+from ledger import hashing_enabled, ledger, new_hasher
+from rules import rules
+from image_hashes import image_dedup
+from media_probe import MEDIA_CUTOFF_SEC, media_probe
+from extractor_registry import Extractor, registry
+from fake_backends import fake_extract
 
-# Initialize tools
-md = MarkItDown()
-ocr = easyocr.Reader(['en'], gpu=False)
-nlp = spacy.load("en_core_web_sm", disable=["parser", "ner"])
-model = SentenceTransformer('all-MiniLM-L6-v2')
-whisper = WhisperModel("base", device="cpu", compute_type="int8")
+# Models (MarkItDown, EasyOCR, spaCy, embeddings, Whisper) are loaded on first
+# use by models.get() and released when the stages that need them are done
 
 EXTENSION_MAP = {
     "Images": [".jpg", ".jpeg", ".png", ".bmp", ".gif", ".tiff", ".webp"],
@@ -30,6 +47,26 @@ EXTENSION_MAP = {
     "Code": [".py", ".js", ".html", ".css", ".java", ".cpp"]
 }
 
+# Words kept per file preview
+PREVIEW_WORDS = 500
+
+# Categories whose content is extracted during the scan
+ANALYZED_CATEGORIES = ["Documents", "Images", "Audio", "Video", "Archives", "Code"]
+
+# Path cascade: a file whose path tokens score at least PATH_ACCEPT_THRESHOLD
+# against a query category is resolved without reading its content. With
+# PATH_REJECT_THRESHOLD set, files scoring below it keep their extension
+# category without extraction too (None = always extract inconclusive files).
+PATH_ACCEPT_THRESHOLD = 0.6
+PATH_REJECT_THRESHOLD = None
+
+# Path tokens that say nothing about content
+PATH_STOPWORDS = {"img", "image", "scan", "copy", "final", "new", "old", "file", "files",
+                  "document", "documents", "untitled", "version", "draft", "tmp", "temp"}
+
+# Inverted EXTENSION_MAP: extension → category
+EXTENSION_CATEGORY = {ext: category for category, extensions in EXTENSION_MAP.items() for ext in extensions}
+
 GENERIC_IGNORE = {"page", "date", "file", "total", "text", "format", "number", "datum", "sheet"}
 
 
@@ -41,12 +78,38 @@ def _log(message, callback=None):
         print(message)
 
 
-def extract_images_from_pptx(pptx_path):
+# Texts sent to the model daemon per keyword request
+DAEMON_CHUNK = 256
+
+
+def _daemon_call(method, *args):
+    """
+    Run a request on the model daemon (see model_daemon.py).
+    
+    Returns:
+        The result, or None when no daemon is running, it went away or the
+        request failed there - the caller then uses models loaded in this process
+    """
+    client = models.daemon
+    if client is None:
+        return None
+    try:
+        return getattr(client, method)(*args)
+    except DaemonUnavailable:
+        models.drop_daemon()
+        return None
+    except RuntimeError as e:
+        _log(f"⚠️ {e} - running {method} locally")
+        return None
+
+
+def extract_images_from_pptx(pptx_path, max_words=None):
     """
     Extract all images from a PowerPoint file and run OCR on them.
     
     Args:
         pptx_path: Path to .pptx file
+        max_words: Optional word budget - OCR stops once it is reached
         
     Returns:
         Combined text from all images in the presentation
@@ -72,13 +135,16 @@ def extract_images_from_pptx(pptx_path):
                         image.save(temp_image_path)
                         
                         # Run OCR
-                        text_list = ocr.readtext(temp_image_path, detail=0)
+                        text_list = models.get("ocr").readtext(temp_image_path, detail=0)
                         if text_list:
                             all_image_text.extend(text_list)
                         
                         # Clean up temp file
                         if os.path.exists(temp_image_path):
                             os.remove(temp_image_path)
+                        
+                        if max_words and len(" ".join(all_image_text).split()) >= max_words:
+                            return " ".join(all_image_text)
                             
                     except Exception as e:
                         # Skip problematic images
@@ -91,93 +157,417 @@ def extract_images_from_pptx(pptx_path):
     return " ".join(all_image_text)
 
 
-def extract_text(file_type, file_path):
-    """Extract text from various file types (Documents, Images, Audio, Video).
+def extract_text(file_type, file_path, ext=None):
+    """Extract text from various file types (Documents, Code, Images, Audio, Video, Archives).
     
     ENHANCED: Now extracts text from images inside PowerPoint files.
     INCREASED: Word limit raised to 500 words for better semantic matching.
+    
+    Plain-text files of any size are sampled within a fixed byte budget
+    (see extractors.extract_plain_text).
+    
+    ext is the file's real type (e.g. ".docx" sniffed from a mislabeled
+    ".dat"); it defaults to the extension of file_path.
+    
+    Images within a few bits of perceptual hash of an image already read
+    in this run reuse its text (see image_hashes.py).
+    
+    Quarantined files (see supervisor.py) are skipped. Extraction runs on
+    the model daemon if one is running, otherwise in the supervised worker
+    process, which enforces per-modality time and memory limits.
     """
-    text = ""
+    if quarantine.contains(file_path):
+        return ""
+    
+    # Background mode: reads count against the byte/file rate limits
     try:
-        # --- A. DOCUMENTS ---
-        if file_type == "Documents":
-            if file_path.endswith(".txt") or file_path.endswith(".csv"):
-                with open(file_path, 'r', encoding='utf-8', errors="ignore") as f:
-                    text = f.read(5000)  # Increased from 2000 to 5000 characters
-            elif file_path.endswith(".pptx"):
-                # Extract text from slides using MarkItDown
-                result = md.convert(file_path)
-                if result:
-                    text = result.text_content
-                
-                # ENHANCED: Also extract text from images inside the PPTX
-                image_text = extract_images_from_pptx(file_path)
-                if image_text:
-                    text += " " + image_text
-            else:
-                # Other document types (PDF, DOCX, etc.)
-                result = md.convert(file_path)
-                if result:
-                    text = result.text_content
-
-        # --- B. IMAGES ---
-        elif file_type == "Images":
-            text_list = ocr.readtext(file_path, detail=0)
-            text = " ".join(text_list)
-
-        # --- C. AUDIO & VIDEO ---
-        elif file_type == "Audio" or file_type == "Video":
-            audio_path = file_path
-            temp_audio = "temp_scan.wav"
-            CUTOFF_SEC = 150
-            created_temp = False
+        throttle.acquire(nbytes=_read_budget(file_type, file_path, ext), files=1)
+    except OSError:
+        return ""
+    
+    # Media without an audio track or outside the duration limits is never decoded
+    if file_type in ("Audio", "Video") and media_probe.check(file_path, stat=stat_cache.stat):
+        return ""
+    
+    # Near-identical images (bursts, screenshots) share one OCR result
+    token = None
+    if file_type == "Images" and image_dedup.enabled:
+        text, token = image_dedup.lookup(file_path)
+        if text is not None:
+            return text
+    
+    text = _extract_text_uncached(file_type, file_path, ext)
+    image_dedup.store(token, text)
+    return text
 
-            try:
-                clip = None
-                if file_type == "Video":
-                    clip = VideoFileClip(file_path)
-                else:
-                    clip = AudioFileClip(file_path)
-
-                if clip.duration:
-                    duration_to_read = min(clip.duration, CUTOFF_SEC)
-                    sub_clip = clip.subclip(0, duration_to_read)
-                    
-                    if file_type == "Video":
-                        sub_clip.audio.write_audiofile(temp_audio, verbose=False, logger=None)
-                    else:
-                        sub_clip.write_audiofile(temp_audio, verbose=False, logger=None)
-                    
-                    sub_clip.close()
-                    clip.close()
-                    
-                    audio_path = temp_audio
-                    created_temp = True
-                else:
-                    clip.close()
 
-            except Exception:
-                pass  # Silent fail for trimming
-            
-            segments, _ = whisper.transcribe(audio_path, beam_size=5)
-            text = " ".join([segment.text for segment in segments])
+def _read_budget(file_type, file_path, ext):
+    """Bytes extraction reads of a file: its extractor's byte budget, or the transcribed part of media."""
+    size = stat_cache.getsize(file_path)
+    extractor = registry.find(ext or os.path.splitext(file_path)[1].lower())
+    if extractor is not None and extractor.max_bytes is not None:
+        return min(size, extractor.max_bytes)
+    if file_type in ("Audio", "Video"):
+        info = media_probe.probe(file_path, stat=stat_cache.stat)
+        if info and info["duration"]:
+            return int(size * min(1.0, MEDIA_CUTOFF_SEC / info["duration"]))
+    return size
+
+
+def _extract_text_uncached(file_type, file_path, ext):
+    # A running model daemon already has OCR/Whisper/MarkItDown loaded
+    remote_text = _daemon_call("extract_text", file_type, file_path, ext)
+    if remote_text is not None:
+        return remote_text
+    
+    if supervisor.enabled:
+        text = supervisor.extract(file_type, file_path, ext)
+        if text is not None:
+            return text
+    return _extract_text_local(file_type, file_path, ext)
 
-            if created_temp and os.path.exists(temp_audio):
-                os.remove(temp_audio)
 
+def _extract_text_local(file_type, file_path, ext=None):
+    """
+    extract_text in this process, without limits (runs inside the supervised worker).
+    
+    The extractor registered for the file's real extension does the work
+    (see the EXTRACTORS section); file_type only decided that the file is
+    analyzed at all.
+    """
+    ext = ext or os.path.splitext(file_path)[1].lower()
+    try:
+        text = registry.extract(file_path, ext, PREVIEW_WORDS)
     except Exception:
         return ""
 
     # Truncate to 500 words (increased from 200 for better semantic matching)
     if text:
         words = text.split()
-        preview = " ".join(words[:500])  # Increased from 200 to 500
+        preview = " ".join(words[:PREVIEW_WORDS])  # Increased from 200 to 500
         return preview
     
     return ""
 
 
-def scan_folder(folder_path, progress_callback=None, include_subfolders=True):
+# ===== EXTRACTORS =====
+# One function per way of reading a file, registered by extension with its
+# modality, models and typical cost (see extractor_registry.py). Swap an
+# engine or add a format with registry.register(Extractor(...)).
+
+def _convert_with_markitdown(file_path, ext, max_words):
+    """Full conversion (formats without a bounded extractor, e.g. .doc)."""
+    # MarkItDown picks its converter by extension - tell it the sniffed one
+    convert_options = {"file_extension": ext} if ext != os.path.splitext(file_path)[1].lower() else {}
+    result = models.get("markitdown").convert(file_path, **convert_options)
+    return result.text_content if result else ""
+
+
+def _extract_bounded_document(file_path, ext, max_words):
+    """PDF, DOCX, XLSX: bounded by pages/rows/bytes (full conversion if the reader is missing)."""
+    text = extract_document_text(file_path, max_words, ext)
+    if text is None:
+        text = _convert_with_markitdown(file_path, ext, max_words)
+    return text
+
+
+def _extract_pptx(file_path, ext, max_words):
+    """Slide text, streamed slide by slide up to the word budget, then OCR of the slides' images."""
+    text = _extract_bounded_document(file_path, ext, max_words)
+    
+    # ENHANCED: Also extract text from images inside the PPTX
+    # (only while the word budget still has room)
+    missing_words = max_words - len(text.split())
+    if missing_words > 0:
+        image_text = extract_images_from_pptx(file_path, max_words=missing_words)
+        if image_text:
+            text += " " + image_text
+    return text
+
+
+def _extract_image(file_path, ext, max_words):
+    """OCR text of an image."""
+    text_list = models.get("ocr").readtext(file_path, detail=0)
+    return " ".join(text_list)
+
+
+def _transcribe_media(file_path, ext, max_words, video=False):
+    """Transcript of the first MEDIA_CUTOFF_SEC seconds of an audio file or a video's audio track."""
+    audio_path = file_path
+    # A file of its own: parallel workers on one host share the working directory
+    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as f:
+        temp_audio = f.name
+
+    # Short files are transcribed directly - Whisper reads the audio
+    # track itself, no ffmpeg reader has to be started to trim them
+    info = media_probe.probe(file_path)
+    needs_trim = not (info and info["has_audio"] and info["duration"] is not None
+                      and info["duration"] <= MEDIA_CUTOFF_SEC)
+
+    try:
+        clip = None
+        if needs_trim and video:
+            clip = VideoFileClip(file_path)
+        elif needs_trim:
+            clip = AudioFileClip(file_path)
+
+        if clip is not None and clip.duration:
+            duration_to_read = min(clip.duration, MEDIA_CUTOFF_SEC)
+            sub_clip = clip.subclip(0, duration_to_read)
+            
+            if video:
+                sub_clip.audio.write_audiofile(temp_audio, verbose=False, logger=None)
+            else:
+                sub_clip.write_audiofile(temp_audio, verbose=False, logger=None)
+            
+            sub_clip.close()
+            clip.close()
+            
+            audio_path = temp_audio
+        elif clip is not None:
+            clip.close()
+
+    except Exception:
+        pass  # Silent fail for trimming
+    
+    try:
+        segments, _ = models.get("whisper").transcribe(audio_path, beam_size=5)
+        text = " ".join([segment.text for segment in segments])
+    finally:
+        if os.path.exists(temp_audio):
+            os.remove(temp_audio)
+    return text
+
+
+registry.register(Extractor(
+    "plain_text", lambda file_path, ext, max_words: extract_plain_text(file_path, max_words, ext=ext),
+    "Documents", TEXT_EXTENSIONS, mime_types=["text/*"], cost=0.002, max_bytes=TEXT_SAMPLE_BYTES))
+registry.register(Extractor(
+    "document", _extract_bounded_document, "Documents", [".pdf", ".docx", ".xlsx"],
+    mime_types=["application/pdf", "application/vnd.openxmlformats-officedocument.*"],
+    cost=0.2, fake=fake_extract, max_bytes=MAX_BYTES))
+registry.register(Extractor(
+    "pptx", _extract_pptx, "Documents", [".pptx"], models=["ocr"], cost=1.0, fake=fake_extract,
+    max_bytes=MAX_BYTES))
+registry.register(Extractor(
+    "markitdown", _convert_with_markitdown, "Documents", [".doc"], mime_types=["application/msword"],
+    models=["markitdown"], cost=0.5, fake=fake_extract))
+registry.register(Extractor(
+    "ocr", _extract_image, "Images", EXTENSION_MAP["Images"], mime_types=["image/*"],
+    models=["ocr"], cost=2.0, fake=fake_extract))
+registry.register(Extractor(
+    "audio", _transcribe_media, "Audio", EXTENSION_MAP["Audio"], mime_types=["audio/*"],
+    models=["whisper"], cost=30.0, fake=fake_extract))
+registry.register(Extractor(
+    "video", partial(_transcribe_media, video=True), "Video", EXTENSION_MAP["Video"], mime_types=["video/*"],
+    models=["whisper"], cost=35.0, fake=fake_extract))
+registry.register(Extractor(
+    # Member names + bounded text of supported members, read in memory
+    "archive", lambda file_path, ext, max_words: extract_archive_text(file_path, ext, max_words),
+    "Archives", EXTENSION_MAP["Archives"], cost=0.3, max_bytes=MAX_ARCHIVE_BYTES))
+
+
+def _list_files(folder_path, include_subfolders=True):
+    """Return the paths of all files to scan (top level only if include_subfolders is False)."""
+    # Folders are listed concurrently - see metadata.MetadataCache
+    return stat_cache.list_files(folder_path, include_subfolders)
+
+
+def _category_for_extension(ext):
+    """Extension-based category, "Others" if the extension is unknown."""
+    return EXTENSION_CATEGORY.get(ext, "Others")
+
+
+def _is_analyzed(category, ext):
+    """
+    True if a file's content is read during the scan: its category is
+    analyzed, or an extractor is registered for its extension (e.g. .json
+    or .log files, which stay in "Others" but are sampled for keywords
+    and the search index).
+    """
+    if category in ANALYZED_CATEGORIES:
+        return True
+    extractor = registry.find(ext)
+    return extractor is not None and ext in extractor.extensions
+
+
+def detect_extensions(file_paths):
+    """
+    Real type of each file as an extension (e.g. ".jpg").
+    
+    Known extensions are taken as they are (a dictionary lookup). Files with
+    no or an unknown extension (camera dumps, ".dat", "scan_0001") are
+    identified from their header bytes instead - see filetypes.detect_types;
+    results are cached per inode and mtime.
+    """
+    exts = [os.path.splitext(p)[1].lower() for p in file_paths]
+    unknown = [i for i, ext in enumerate(exts) if ext not in EXTENSION_CATEGORY]
+    for i, sniffed in zip(unknown, detect_types([file_paths[i] for i in unknown], stat=stat_cache.stat)):
+        if sniffed:
+            exts[i] = sniffed
+    return exts
+
+
+_PATH_WORD_SPLIT = re.compile(r"[^A-Za-z]+|(?<=[a-z])(?=[A-Z])")
+
+
+def _path_words(text):
+    return [p.lower() for p in _PATH_WORD_SPLIT.split(text) if len(p) > 2 and p.lower() not in PATH_STOPWORDS]
+
+
+def _path_tokens(file_path, root=None):
+    """Lower-cased words of a file's name and folders (relative to root), e.g. "Legal/invoiceMarch.pdf" → legal, invoice, march."""
+    rel_path = os.path.relpath(file_path, root) if root else file_path
+    return _path_words(os.path.splitext(rel_path)[0])
+
+
+def _path_tokens_per_file(file_paths, root=None):
+    """_path_tokens of many files; each folder is split only once."""
+    folder_tokens = {}
+    tokens_per_file = []
+    for file_path in file_paths:
+        folder, filename = os.path.split(file_path)
+        tokens = folder_tokens.get(folder)
+        if tokens is None:
+            tokens = folder_tokens[folder] = _path_words(os.path.relpath(folder, root) if root else folder)
+        tokens_per_file.append(tokens + _path_words(os.path.splitext(filename)[0]))
+    return tokens_per_file
+
+
+def classify_by_path(file_paths, target_categories, root=None,
+                     accept_threshold=PATH_ACCEPT_THRESHOLD, reject_threshold=PATH_REJECT_THRESHOLD, engine=None,
+                     embedding_cache=None, path_tokens=None):
+    """
+    Cheap first tier of the classification cascade.
+    
+    Scores the filename and folder tokens of each file against the query
+    categories with the same embedding model used for content matching.
+    Every distinct token is encoded once, in one batch.
+    
+    Args:
+        file_paths: Paths to classify
+        target_categories: Categories from get_categories_from_query
+        root: Scanned folder; only folders below it count as tokens
+        accept_threshold: Score at or above which the query category is taken
+        reject_threshold: Score below which the file is decided as "no match"
+            (None to never reject on the path alone)
+        engine: "embedding" or "lexical" (default: matching_engine). The
+            lexical engine accepts a path whose words reach the BM25
+            threshold (a query word does, a synonym only if it points to
+            one query category or with another one - see lexical.py) and
+            never rejects
+        embedding_cache: Optional embeddings.EmbeddingCache used instead of
+            the embedder, so tokens encoded before are not encoded again
+        path_tokens: Tokens per file, if already split (file_paths is then unused)
+    
+    Returns:
+        List with one (decided, category) tuple per file. decided is False
+        when the path is inconclusive and the content has to be read;
+        category is the matched query category or None for "no match".
+    """
+    tokens_per_file = path_tokens if path_tokens is not None else _path_tokens_per_file(file_paths, root)
+    vocabulary = sorted({token for tokens in tokens_per_file for token in tokens})
+    if not vocabulary or not target_categories:
+        return [(False, None)] * len(tokens_per_file)
+    
+    if (engine or matching_engine) == "lexical":
+        matches = LexicalMatcher(target_categories).match_tokens(tokens_per_file)
+        return [(True, matched) if matched else (False, None) for matched in matches]
+    
+    # Embeddings are L2-normalized, so the dot product is the cosine similarity
+    embedder = embedding_cache or models.get("embedder")
+    cosine_scores = embedder.encode(vocabulary) @ embedder.encode(target_categories).T
+    best_scores = cosine_scores.max(axis=1).tolist()
+    best_targets = cosine_scores.argmax(axis=1).tolist()
+    token_index = {token: i for i, token in enumerate(vocabulary)}
+    
+    decisions = []
+    for tokens in tokens_per_file:
+        if not tokens:
+            decisions.append((False, None))
+            continue
+        best = max((token_index[t] for t in tokens), key=lambda i: best_scores[i])
+        score = best_scores[best]
+        if score >= accept_threshold:
+            decisions.append((True, target_categories[best_targets[best]].capitalize()))
+        elif reject_threshold is not None and score < reject_threshold:
+            decisions.append((True, None))
+        else:
+            decisions.append((False, None))
+    return decisions
+
+
+def apply_rules(file_paths, exts, categories, tiers, progress_callback=None):
+    """
+    Rule tier, ahead of every model: files matched by a user rule (see
+    rules.py) take the rule's category and tier "rule", so they are never
+    extracted or embedded. categories and tiers are updated in place.
+    
+    Returns:
+        Number of files decided by a rule
+    """
+    try:
+        matched = rules.match(file_paths, exts, stat=stat_cache.stat)
+    except ValueError as e:
+        _log(f"⚠️ Rules not applied: {e}", progress_callback)
+        return 0
+    decided = 0
+    for i, category in enumerate(matched):
+        if category is not None:
+            categories[i] = category
+            tiers[i] = "rule"
+            decided += 1
+    if decided:
+        _log(f"📏 {decided} files decided by rules", progress_callback)
+    return decided
+
+
+def log_cascade_report(df, progress_callback=None):
+    """
+    Log how many files each tier of the classification cascade resolved.
+
+    "Others" files read for keywords and the search index only (see
+    _is_analyzed) are counted under their deciding tier, "extension".
+    """
+    if 'Tier' not in df.columns:
+        return
+    tiers = df['Tier'].to_numpy(dtype=object, copy=True)
+    tiers[(tiers == "content") & (df['Category'] == "Others").to_numpy()] = "extension"
+    counts = pd.Series(tiers).value_counts()
+    _log("🪜 Cascade: " + ", ".join(
+        f"{tier} {counts.get(tier, 0)}" for tier in TIERS
+    ) + " files", progress_callback)
+
+
+def _heavy_models_for(category, ext):
+    """Models extract_text needs for a file of this type (as its extractor declares)."""
+    if not _is_analyzed(category, ext):
+        return ()
+    extractor = registry.find(ext)
+    return extractor.models if extractor is not None else ()
+
+
+def _last_model_uses(files):
+    """Position of the last file that needs each heavy model, for (category, ext) pairs in processing order."""
+    last_use = {}
+    for position, (category, ext) in enumerate(files):
+        for name in _heavy_models_for(category, ext):
+            last_use[name] = position
+    return last_use
+
+
+def _release_models_done_at(last_use, position):
+    """Unload Whisper/EasyOCR as soon as the last file that needs them is processed."""
+    if models.release_after_use:
+        finished = [name for name, last in last_use.items() if last == position]
+        if finished:
+            models.release(*finished)
+            supervisor.release(*finished)
+
+
+def scan_folder(folder_path, progress_callback=None, include_subfolders=True, tracker=None,
+                target_categories=None, path_accept=PATH_ACCEPT_THRESHOLD, path_reject=PATH_REJECT_THRESHOLD,
+                keep_previews=True, engine=None):
     """
     Scan folder and extract metadata + preview text for all files.
     
@@ -185,89 +575,155 @@ def scan_folder(folder_path, progress_callback=None, include_subfolders=True):
         folder_path: Path to folder to scan
         progress_callback: Optional function(message) for progress updates
         include_subfolders: If True, scan subdirectories; if False, scan only top level
+        tracker: Optional ProgressTracker, fed with a cost estimate for every
+            file before analysis starts and with each finished file
+        target_categories: Optional query categories. When given, files whose
+            path already decides the category (see classify_by_path) are not
+            extracted at all
+        path_accept: Accept threshold for the path tier
+        path_reject: Reject threshold for the path tier (None = never reject)
+        keep_previews: If False, keywords are extracted right after each file
+            and its preview text is dropped instead of kept in memory
+        engine: Matching engine of the path tier (default: matching_engine)
+    
+    Returns a manifest (see manifest.build_manifest): Filename, Directory,
+    Category, Tier (which cascade tier decides each file: "rule", "path",
+    "content" or "extension") and Preview - or Keywords when keep_previews is
+    False - plus Cluster unless image deduplication is off.
     """
-    data = []
+    previews = []
+    keywords = []
+    clusters = []
     file_count = 0
     
-    # Choose scanning method based on include_subfolders
-    if include_subfolders:
-        # First, count total files (including subfolders)
-        total_files = sum([len(files) for _, _, files in os.walk(folder_path)])
+    try:
+        file_paths = _list_files(folder_path, include_subfolders)
+    except Exception as e:
+        if progress_callback:
+            progress_callback(f"❌ Error scanning folder: {e}")
+        file_paths = []
+    total_files = len(file_paths)
+    
+    # One concurrent stat pass; later stages (type sniffing, cost plan, copy,
+    # verification) reuse the results instead of stat'ing one file at a time
+    stat_cache.prefetch(file_paths)
+    exts = detect_extensions(file_paths)
+    categories = [_category_for_extension(ext) for ext in exts]
+    tiers = ["content" if _is_analyzed(c, e) else "extension" for c, e in zip(categories, exts)]
+    
+    # TIER 0: user rules (path/filename patterns, size, dates) - no model at all
+    apply_rules(file_paths, exts, categories, tiers, progress_callback)
+    
+    # TIER 1: filename/folder tokens - skip OCR/ASR when the path already decides
+    # ("Others" files are read for the search index only and keep their category)
+    if target_categories:
+        candidates = [i for i, tier in enumerate(tiers) if tier == "content" and categories[i] != "Others"]
+        decisions = classify_by_path([file_paths[i] for i in candidates], target_categories,
+                                     folder_path, path_accept, path_reject, engine)
+        for i, (decided, matched) in zip(candidates, decisions):
+            if decided:
+                tiers[i] = "path"
+                categories[i] = matched or categories[i]
+    
+    # Plan the whole run up front so progress is weighted by cost, not file count
+    if tracker is not None:
+        tracker.set_stage("Scanning")
+        for file_path, ext, category, tier in zip(file_paths, exts, categories, tiers):
+            try:
+                size = stat_cache.getsize(file_path)
+            except OSError:
+                size = 0
+            if tier == "content":
+                modality, units = estimate_work_units(file_path, category, size, ext, stat=stat_cache.stat)
+            else:
+                modality, units = "Others", 1.0
+            tracker.plan(("scan", file_path), modality, units)
+            if tracker.include_copy:
+                tracker.plan(("copy", file_path), "Copy", max(size / 1_000_000, 0.01))
+    
+    # Whisper/EasyOCR are released right after the last file that needs them
+    last_use = _last_model_uses([
+        (c, e) if t == "content" else ("Others", e) for e, c, t in zip(exts, categories, tiers)
+    ])
+    
+    for position, (file_path, ext, category, tier) in enumerate(zip(file_paths, exts, categories, tiers)):
+        file_count += 1
         
-        # Scan all folders and subfolders
-        for root, _, files in os.walk(folder_path):
-            for file in files:
-                file_count += 1
-                file_path = os.path.join(root, file)
-                ext = os.path.splitext(file)[1].lower()
-                
-                # Determine Category
-                category = "Others"
-                for cat, extensions in EXTENSION_MAP.items():
-                    if ext in extensions:
-                        category = cat
-                        break
-                
-                # Progress update
-                if progress_callback and file_count % 10 == 0:  # Update every 10 files
-                    progress_callback(f"⏳ Processing: {file_count}/{total_files} files...")
-                
-                # Extract Preview Text
-                preview_text = ""
-                if category in ["Documents", "Images", "Audio", "Video"]:
-                    if progress_callback:
-                        progress_callback(f"📄 Analyzing: {file}")
-                    preview_text = extract_text(category, file_path)
-                
-                data.append({
-                    "Filename": file,
-                    "Category": category,
-                    "Path": file_path,
-                    "Preview": preview_text
-                })
-    else:
-        # Scan only the top-level folder (no subdirectories)
-        try:
-            files = [f for f in os.listdir(folder_path) if os.path.isfile(os.path.join(folder_path, f))]
-            total_files = len(files)
-            
-            for file in files:
-                file_count += 1
-                file_path = os.path.join(folder_path, file)
-                ext = os.path.splitext(file)[1].lower()
-                
-                # Determine Category
-                category = "Others"
-                for cat, extensions in EXTENSION_MAP.items():
-                    if ext in extensions:
-                        category = cat
-                        break
-                
-                # Progress update
-                if progress_callback and file_count % 10 == 0:
-                    progress_callback(f"⏳ Processing: {file_count}/{total_files} files...")
-                
-                # Extract Preview Text
-                preview_text = ""
-                if category in ["Documents", "Images", "Audio", "Video"]:
-                    if progress_callback:
-                        progress_callback(f"📄 Analyzing: {file}")
-                    preview_text = extract_text(category, file_path)
-                
-                data.append({
-                    "Filename": file,
-                    "Category": category,
-                    "Path": file_path,
-                    "Preview": preview_text
-                })
-        except Exception as e:
+        # Progress update
+        if progress_callback and file_count % 10 == 0:  # Update every 10 files
+            progress_callback(f"⏳ Processing: {file_count}/{total_files} files...")
+        
+        if tracker is not None:
+            tracker.start(("scan", file_path))
+        
+        # Extract Preview Text
+        preview_text = ""
+        if tier == "content":
             if progress_callback:
-                progress_callback(f"❌ Error scanning folder: {e}")
+                progress_callback(f"📄 Analyzing: {os.path.basename(file_path)}")
+            preview_text = extract_text(category, file_path, ext)
+            _release_models_done_at(last_use, position)
+        # Kept with the file: later stages may run after a reset or in another process
+        clusters.append(image_dedup.cluster_for(file_path) if preview_text and category == "Images" else "")
+        
+        if tracker is not None:
+            tracker.finish(("scan", file_path))
+        
+        if keep_previews:
+            previews.append(preview_text)
+        else:
+            keywords.append(extract_keywords(preview_text) if preview_text else "")
     
     if progress_callback:
         progress_callback(f"✅ Scanned {file_count} files")
     
-    return pd.DataFrame(data)
+    df = build_manifest(file_paths, categories, tiers, previews if keep_previews else None,
+                        clusters if image_dedup.enabled else None)
+    if not keep_previews:
+        df['Keywords'] = keywords
+    return df
+
+
+# INCREASED: Top 20 keywords for better matching (was 10)
+TOP_KEYWORDS = 20
+
+# Cosine similarity above which a file is moved to a query category
+SIMILARITY_THRESHOLD = 0.45
+
+# How query categories are matched: "embedding" (MiniLM) or "lexical" (BM25 + synonyms, no neural model)
+MATCHING_ENGINES = ("embedding", "lexical")
+matching_engine = os.environ.get("SMART_ORGANIZER_MATCHER", "embedding")
+
+
+def extract_keywords(preview_text):
+    """Top keywords of one preview text as a comma-separated string ("" if none)."""
+    if not preview_text:
+        return ""
+    
+    remote = _daemon_call("keywords", [preview_text])
+    if remote is not None:
+        return remote[0]
+    
+    # Process with spaCy
+    return _keywords_from_doc(models.get("nlp")(preview_text))
+
+
+def _keywords_from_doc(doc):
+    """Top keywords of a spaCy doc as a comma-separated string."""
+    # Extract meaningful words
+    words = [
+        token.lemma_ for token in doc 
+        if token.pos_ in ["NOUN", "PROPN", "VERB", "ADJ"]
+        and not token.is_stop 
+        and not token.is_punct 
+        and len(token.text) > 2
+        and token.lemma_ not in GENERIC_IGNORE
+    ]
+    
+    # Get top 20 most common keywords (increased from 10)
+    if not words:
+        return ""
+    return ", ".join(word for word, count in Counter(words).most_common(TOP_KEYWORDS))
 
 
 def extract_keywords_from_preview(df, progress_callback=None):
@@ -277,52 +733,114 @@ def extract_keywords_from_preview(df, progress_callback=None):
     
     INCREASED: From 10 to 20 keywords for better semantic accuracy.
     
+    Every file with a preview is parsed - "Others" files read for the
+    search index included (see _is_analyzed) - streamed through spaCy's
+    nlp.pipe in batches. Near-duplicates (versions and
+    copies of one document, see near_duplicates.py) are parsed once: they
+    reuse the keywords - and so the category decision - of the first file
+    of their cluster. The cluster is stored in a 'DuplicateOf' column.
+    
     Args:
         df: DataFrame with file data
         progress_callback: Optional function(message) for progress updates
     """
     _log("📝 Extracting keywords from preview text...", progress_callback)
-    keywords_list = []
+    keywords = np.full(len(df), "", dtype=object)
     
-    # INCREASED: Top 20 keywords for better matching (was 10)
-    TOP_KEYWORDS = 20
+    previews = df['Preview'].fillna("").to_numpy(dtype=object)
+    todo = np.flatnonzero(previews != "")
     
-    for idx, row in df.iterrows():
-        if progress_callback and idx % 50 == 0:
-            progress_callback(f"🔍 Extracting keywords: {idx}/{len(df)} files...")
-            
-        preview_text = row['Preview']
-        
-        if not preview_text or row['Category'] == "Others":
-            keywords_list.append("")
-            continue
-            
-        # Process with spaCy
-        doc = nlp(preview_text)
-        
-        # Extract meaningful words
-        words = [
-            token.lemma_ for token in doc 
-            if token.pos_ in ["NOUN", "PROPN", "VERB", "ADJ"]
-            and not token.is_stop 
-            and not token.is_punct 
-            and len(token.text) > 2
-            and token.lemma_ not in GENERIC_IGNORE
-        ]
-        
-        # Get top 20 most common keywords (increased from 10)
-        if words:
-            top_words = [word for word, count in Counter(words).most_common(TOP_KEYWORDS)]
-            keywords_list.append(", ".join(top_words))
-        else:
-            keywords_list.append("")
+    representatives = np.arange(len(df))
+    representatives[todo] = todo[find_near_duplicates(previews[todo].tolist())]
+    duplicates = todo[representatives[todo] != todo]
+    todo = todo[representatives[todo] == todo]
     
-    df['Keywords'] = keywords_list
+    # Model daemon first (chunked); whatever it did not do is parsed here
+    done = 0
+    while done < len(todo) and models.daemon is not None:
+        chunk = todo[done:done + DAEMON_CHUNK]
+        remote = _daemon_call("keywords", previews[chunk].tolist())
+        if remote is None:
+            break
+        keywords[chunk] = np.array(remote, dtype=object)
+        done += len(chunk)
+        if progress_callback:
+            progress_callback(f"🔍 Extracting keywords: {done}/{len(todo)} files...")
+    todo = todo[done:]
+    
+    if len(todo):
+        docs = models.get("nlp").pipe(previews[todo], batch_size=64,
+                                      n_process=get_thread_budget().spacy_processes(len(todo)))
+        for count, (position, doc) in enumerate(zip(todo, docs), start=1):
+            keywords[position] = _keywords_from_doc(doc)
+            if progress_callback and count % 50 == 0:
+                progress_callback(f"🔍 Extracting keywords: {done + count}/{done + len(todo)} files...")
+    
+    keywords[duplicates] = keywords[representatives[duplicates]]
+    df['Keywords'] = keywords
+    # Row position of the cluster's representative, -1 for files without near-duplicates
+    duplicate_of = np.full(len(df), -1, dtype=np.int32)
+    duplicate_of[duplicates] = representatives[duplicates]
+    df['DuplicateOf'] = duplicate_of
     _log("✅ Keywords extracted!", progress_callback)
+    log_duplicate_report(df, progress_callback)
     return df
 
 
-def refine_categories_with_semantic_search(df, user_query, progress_callback=None):
+# Clusters listed by name in the near-duplicate report
+REPORTED_CLUSTERS = 10
+
+
+def log_duplicate_report(df, progress_callback=None):
+    """Log the near-duplicate clusters (largest first) so they can be cleaned up."""
+    if 'DuplicateOf' not in df.columns:
+        return
+    duplicate_of = df['DuplicateOf'].to_numpy()
+    members = np.flatnonzero(duplicate_of >= 0)
+    if not len(members):
+        return
+    clusters = pd.Series(members).groupby(duplicate_of[members]).agg(list)
+    clusters = clusters[clusters.map(len).sort_values(ascending=False, kind="stable").index]
+    _log(f"♊ Near-duplicates: {len(members)} files in {len(clusters)} clusters reused their "
+         f"representative's keywords", progress_callback)
+    paths = manifest_paths(df).to_numpy(dtype=object)
+    for representative, cluster in list(clusters.items())[:REPORTED_CLUSTERS]:
+        names = ", ".join(os.path.basename(paths[i]) for i in cluster[:5])
+        more = f" (+{len(cluster) - 5} more)" if len(cluster) > 5 else ""
+        _log(f"   • {paths[representative]} ≈ {names}{more}", progress_callback)
+
+
+def match_query_category(file_keywords, target_categories, target_embeddings):
+    """
+    Best query category for one file's keywords.
+    
+    Returns:
+        Capitalized query category if the best cosine similarity is above
+        SIMILARITY_THRESHOLD, otherwise None
+    """
+    # Split keywords (top 20 comma-separated words, increased from 10)
+    keyword_list = [k.strip() for k in file_keywords.split(",") if k.strip()]
+    if not keyword_list:
+        return None
+    
+    # Encode file keywords into AI embeddings
+    keyword_embeddings = models.get("embedder").encode(keyword_list)
+    
+    # Calculate cosine similarity between file keywords and query categories
+    # (embeddings are L2-normalized, so this is a plain dot product)
+    cosine_scores = keyword_embeddings @ target_embeddings.T
+    max_score = float(cosine_scores.max())
+
+    # DECISION: If strong match (> 0.45) → Use query category
+    #           Otherwise → Keep original extension-based category
+    if max_score > SIMILARITY_THRESHOLD:
+        best_match_idx = int(cosine_scores.max(axis=0).argmax())
+        return target_categories[best_match_idx].capitalize()
+    return None
+
+
+def refine_categories_with_semantic_search(df, user_query, progress_callback=None, engine=None,
+                                           embedding_cache=None):
     """
     Match files to user-specified categories using semantic similarity.
     
@@ -333,10 +851,17 @@ def refine_categories_with_semantic_search(df, user_query, progress_callback=Non
     4. If similarity > 0.45 → Update category to matched query category
     5. If similarity < 0.45 → Keep original extension-based category
     
+    With the lexical engine, step 3-5 score the keywords with BM25 against
+    each category and its synonyms instead (see lexical.py) - no
+    embedding model is loaded.
+    
     Args:
         df: DataFrame with file data
         user_query: User's categorization query
         progress_callback: Optional function(message) for progress updates
+        engine: "embedding" or "lexical" (default: matching_engine)
+        embedding_cache: Optional embeddings.EmbeddingCache used instead of
+            the embedder (see QueryPreview)
     """
     # Extract target categories from user query
     target_categories = get_categories_from_query(user_query)
@@ -351,51 +876,240 @@ def refine_categories_with_semantic_search(df, user_query, progress_callback=Non
         _log("📝 Extracting keywords first...", progress_callback)
         df = extract_keywords_from_preview(df, progress_callback)
 
-    # Encode query categories into AI embeddings
-    target_embeddings = model.encode(target_categories, convert_to_tensor=True)
-    refined_categories = []
+    # Skip files without keywords or already marked as Others
+    keywords = df['Keywords'].fillna("").to_numpy(dtype=object)
+    candidates = np.flatnonzero((df['Category'] != "Others").to_numpy() & (keywords != ""))
+    refined_categories = df['Category'].to_numpy(dtype=object)
 
-    for idx, row in df.iterrows():
-        if progress_callback and idx % 25 == 0:
-            progress_callback(f"🔍 Semantic matching: {idx}/{len(df)} files...")
-            
-        file_keywords = row['Keywords']
-        original_category = row['Category']
-        
-        # Skip if no keywords or already marked as Others
-        if not file_keywords or original_category == "Others":
-            refined_categories.append(original_category)
-            continue
+    if (engine or matching_engine) == "lexical":
+        _log(f"🔤 Lexical matching: {len(candidates)}/{len(df)} files have keywords...", progress_callback)
+        matches = LexicalMatcher(target_categories).match(keywords[candidates])
+        for i, matched in zip(candidates, matches):
+            if matched:
+                refined_categories[i] = matched
+        set_categories(df, refined_categories)
+        _log("✅ Lexical refinement complete!", progress_callback)
+        return df
 
-        # Split keywords (top 20 comma-separated words, increased from 10)
-        keyword_list = [k.strip() for k in file_keywords.split(",") if k.strip()]
+    # One row per (file, keyword); every distinct keyword is encoded once.
+    # All keyword strings are split in one go, and only distinct words are stripped.
+    candidate_keywords = keywords[candidates]
+    raw_words = ",".join(candidate_keywords).split(",") if len(candidates) else []
+    owners = np.repeat(np.arange(len(candidates)), [k.count(",") + 1 for k in candidate_keywords])
+    raw_codes, raw_vocabulary = pd.factorize(pd.Series(raw_words, dtype=object))
+    stripped_codes, vocabulary = pd.factorize(pd.Series([w.strip() for w in raw_vocabulary], dtype=object))
+    codes = stripped_codes[raw_codes]
+    nonempty = vocabulary != ""
+    if not nonempty.all():
+        keep = nonempty[codes]
+        codes, owners = codes[keep], owners[keep]
+        codes, vocabulary = pd.factorize(pd.Series(vocabulary[codes], dtype=object))
+    if len(owners):
+        _log(f"🔍 Semantic matching: {len(candidates)}/{len(df)} files have keywords...", progress_callback)
         
-        if not keyword_list:
-            refined_categories.append(original_category)
-            continue
+        # Encode query categories and keywords into AI embeddings
+        # (L2-normalized, so the dot product is the cosine similarity)
+        embedder = embedding_cache or models.get("embedder")
+        target_embeddings = embedder.encode(target_categories)
+        vocabulary_scores = embedder.encode(list(vocabulary)) @ target_embeddings.T
         
-        # Encode file keywords into AI embeddings
-        keyword_embeddings = model.encode(keyword_list, convert_to_tensor=True)
+        # Best score per file and query category, over all of the file's keywords
+        starts = np.flatnonzero(np.r_[True, owners[1:] != owners[:-1]])
+        file_scores = np.maximum.reduceat(vocabulary_scores[codes], starts, axis=0)
+        matched_files = candidates[owners[starts]]
         
-        # Calculate cosine similarity between file keywords and query categories
-        cosine_scores = util.cos_sim(keyword_embeddings, target_embeddings)
-        max_score = torch.max(cosine_scores).item()
-
-        # DECISION: If strong match (> 0.45) → Use query category
-        #           Otherwise → Keep original extension-based category
-        if max_score > 0.45:
-            best_match_idx = torch.argmax(torch.max(cosine_scores, dim=0).values).item()
-            refined_categories.append(target_categories[best_match_idx].capitalize())
-        else:
-            refined_categories.append(original_category)
+        # DECISION: same rule as match_query_category
+        strong = file_scores.max(axis=1) > SIMILARITY_THRESHOLD
+        best_targets = file_scores.argmax(axis=1)
+        targets = np.array([t.capitalize() for t in target_categories], dtype=object)
+        refined_categories[matched_files[strong]] = targets[best_targets[strong]]
 
     # Update DataFrame with new categories
-    df['Category'] = refined_categories
+    set_categories(df, refined_categories)
     _log("✅ Semantic refinement complete!", progress_callback)
     return df
 
 
-def organize_files_into_folders(df, destination_folder, progress_callback=None):
+# ===== PREVIEW: SCAN ONCE, QUERY MANY TIMES =====
+
+class QueryPreview:
+    """
+    A scanned, keyword-extracted folder kept in memory, so a new query only
+    re-runs the matching - no extraction, no keyword parsing.
+
+    Everything that does not depend on the query is done once per scan:
+    path tokens are split on first use and every keyword and path token is
+    encoded once (see embeddings.EmbeddingCache). A new query then costs
+    encoding its category words and one matrix product.
+
+    Args:
+        df: Manifest from scan_folder + extract_keywords_from_preview (see preview_scan)
+        root: Scanned folder; only folders below it count as path tokens
+    """
+    def __init__(self, df, root):
+        self.df = df
+        self.root = root
+        self.embedding_cache = EmbeddingCache(lambda: models.get("embedder"))
+        self.query = None       # query and engine of the last match
+        self.engine = None
+        self.result = None      # manifest matched to them
+        # "Others" files keep their category (they are read for the search index only)
+        self._content = np.flatnonzero(((df['Tier'] == "content") & (df['Category'] != "Others")).to_numpy())
+        self._path_tokens = None
+
+    def match(self, user_query, progress_callback=None, engine=None):
+        """
+        Categories for a query: keyword matching for every file with
+        keywords, then the path tier (classify_by_path) on top, as a run
+        with this query would decide.
+
+        Args:
+            user_query: Query to match against ("" keeps the extension categories)
+            progress_callback: Optional function(message) for progress updates
+            engine: "embedding" or "lexical" (default: matching_engine)
+
+        Returns:
+            New manifest with this query's Category and Tier, ready for
+            organize_files_into_folders (self.df is left unchanged)
+        """
+        df = self.df.copy()
+        target_categories = get_categories_from_query(user_query) if user_query else None
+        if target_categories:
+            df = refine_categories_with_semantic_search(df, user_query, progress_callback, engine,
+                                                        self.embedding_cache)
+        if target_categories and len(self._content):
+            if self._path_tokens is None:
+                paths = manifest_paths(self.df).to_numpy(dtype=object)[self._content]
+                self._path_tokens = _path_tokens_per_file(paths, self.root)
+            decisions = classify_by_path(None, target_categories, self.root, engine=engine,
+                                         embedding_cache=self.embedding_cache, path_tokens=self._path_tokens)
+            base_categories = self.df['Category'].to_numpy(dtype=object)
+            categories = df['Category'].to_numpy(dtype=object)
+            tiers = df['Tier'].to_numpy(dtype=object)
+            for i, (decided, matched) in zip(self._content, decisions):
+                if decided:
+                    tiers[i] = "path"
+                    categories[i] = matched or base_categories[i]
+            set_categories(df, categories)
+            df['Tier'] = pd.Categorical(tiers, categories=TIERS)
+        self.query, self.engine, self.result = user_query, engine or matching_engine, df
+        return df
+
+
+def preview_scan(folder_path, progress_callback=None, include_subfolders=True, tracker=None):
+    """
+    Scan a folder and extract keywords once, for any number of queries.
+
+    Unlike a scan for one query, the path tier skips nothing (its decision
+    depends on the query), so every analyzed file is extracted. spaCy stays
+    loaded for the query parsing that follows.
+
+    Args:
+        folder_path: Path to folder to scan
+        progress_callback: Optional function(message) for progress updates
+        include_subfolders: If True, scan subdirectories; if False, scan only top level
+        tracker: Optional ProgressTracker
+
+    Returns:
+        QueryPreview of the folder
+    """
+    with run_stage("Scan + extraction", release=["markitdown", "ocr", "whisper"]):
+        df = scan_folder(folder_path, progress_callback, include_subfolders, tracker=tracker)
+    if len(df):
+        if tracker is not None:
+            tracker.set_stage("Keywords")
+        with run_stage("Keywords", uses=["nlp"]):
+            df = extract_keywords_from_preview(df, progress_callback)
+    return QueryPreview(df, folder_path)
+
+
+def _copy_to_category(source_path, filename, category, destination_folder, progress_callback=None, tracker=None):
+    """
+    Copy one file (with metadata) into its category folder, renaming duplicates.
+    
+    Returns:
+        Destination path, or None if the source is missing or the copy failed
+    """
+    if not stat_cache.exists(source_path):
+        _log(f"⚠️ Source file not found: {filename}", progress_callback)
+        if tracker is not None:
+            tracker.finish(("copy", source_path))
+        return None
+
+    try:
+        category_folder = os.path.join(destination_folder, category)
+        
+        if category not in stat_cache.dir_names(destination_folder):
+            os.makedirs(category_folder, exist_ok=True)
+            stat_cache.add_name(category_folder)
+        
+        # Handle duplicates (the folder is listed once per run, not stat'ed per name)
+        existing = stat_cache.dir_names(category_folder)
+        counter = 1
+        name, ext = os.path.splitext(filename)
+        dest_name = filename
+        while dest_name in existing:
+            dest_name = f"{name}_{counter}{ext}"
+            counter += 1
+        dest_path = os.path.join(category_folder, dest_name)
+        stat_cache.add_name(dest_path)
+
+        if tracker is not None:
+            tracker.plan(("copy", source_path), "Copy", max(stat_cache.getsize(source_path) / 1_000_000, 0.01))
+            tracker.start(("copy", source_path))
+
+        # Copy file with metadata (paced by the rate limits in background mode),
+        # hashing it on the way for the relocation ledger
+        size = stat_cache.getsize(source_path)
+        hasher = new_hasher() if hashing_enabled() else None
+        throttle.copy_file(source_path, dest_path, size, hasher)
+        ledger.note_copy(source_path, dest_path, size, hasher.hexdigest() if hasher else None)
+    except Exception as e:
+        # Also a category folder that cannot be created (permissions, a file of that name)
+        _log(f"❌ Error copying {filename}: {e}", progress_callback)
+        dest_path = None
+
+    if tracker is not None:
+        tracker.finish(("copy", source_path))
+    return dest_path
+
+
+def _group_similar_images(source_paths, folders, cluster_column, progress_callback=None):
+    """
+    Folder per file with each near-duplicate image cluster moved into a
+    "Similar to <first image>" subfolder of its category.
+    
+    Clusters come from the manifest's Cluster column (set while extracting),
+    and only members in the same category as the cluster's first image are grouped.
+    """
+    clusters = {}
+    for row, representative in enumerate(cluster_column):
+        if representative:
+            clusters.setdefault(representative, []).append(row)
+    if not clusters:
+        return folders
+    row_of = {os.path.abspath(p): i for i, p in enumerate(source_paths)}
+    folders = folders.copy()
+    grouped = 0
+    for representative, members in clusters.items():
+        first = row_of.get(representative)
+        if first is None:
+            continue
+        category = folders[first]
+        rows = [row for row in members if folders[row] == category]
+        if not rows:
+            continue
+        stem = os.path.splitext(os.path.basename(representative))[0]
+        subfolder = os.path.join(category, f"Similar to {stem}")
+        for row in [first] + rows:
+            folders[row] = subfolder
+        grouped += 1
+    if grouped:
+        _log(f"🖼️ Grouping {grouped} clusters of near-identical images into subfolders", progress_callback)
+    return folders
+
+
+def organize_files_into_folders(df, destination_folder, progress_callback=None, tracker=None):
     """
     AUTOMATIC WORKFLOW: Copy files → Verify → Delete originals
     No user choice - this is the only mode of operation.
@@ -407,6 +1121,7 @@ def organize_files_into_folders(df, destination_folder, progress_callback=None):
         df: DataFrame with file data
         destination_folder: Where to organize files
         progress_callback: Optional function(message) for progress updates
+        tracker: Optional ProgressTracker, advanced by copied megabytes
     """
     
     if not os.path.exists(destination_folder):
@@ -420,67 +1135,73 @@ def organize_files_into_folders(df, destination_folder, progress_callback=None):
     # Track which files were successfully copied
     copied_files = []  # List of (source_path, dest_path) tuples
     failed_files = []  # List of failed source paths
+    destinations = []  # Destination per row (None if not copied)
 
     # ===== PHASE 1: COPY ALL FILES =====
     _log("=" * 50, progress_callback)
     _log(f"📋 PHASE 1: Copying {total_files} files to destination...", progress_callback)
     _log("=" * 50, progress_callback)
 
-    for index, row in df.iterrows():
+    if tracker is not None:
+        tracker.set_stage("Copying")
+
+    source_paths = manifest_paths(df).to_numpy(dtype=object)
+    stat_cache.prefetch(source_paths)
+    folders = df['Category'].to_numpy(dtype=object)
+    if image_dedup.mode == "group" and 'Cluster' in df.columns:
+        folders = _group_similar_images(source_paths, folders, df['Cluster'].to_numpy(dtype=object),
+                                        progress_callback)
+    rows = zip(source_paths, df['Filename'].to_numpy(dtype=object), folders)
+    for index, (source_path, filename, category) in enumerate(rows):
         if progress_callback and (index + 1) % 10 == 0:
             progress_callback(f"📦 Copying: {index + 1}/{total_files} files...")
             
-        source_path = row['Path']
-        category = row['Category']
-        filename = row['Filename']
-
-        if not os.path.exists(source_path):
-            _log(f"⚠️ Source file not found: {filename}", progress_callback)
-            error_count += 1
-            failed_files.append(source_path)
-            continue
-
-        category_folder = os.path.join(destination_folder, category)
-        
-        if not os.path.exists(category_folder):
-            os.makedirs(category_folder)
-        
-        dest_path = os.path.join(category_folder, filename)
-
-        # Handle duplicates
-        counter = 1
-        name, ext = os.path.splitext(filename)
-        while os.path.exists(dest_path):
-            dest_path = os.path.join(category_folder, f"{name}_{counter}{ext}")
-            counter += 1
-
-        try:
-            # Copy file with metadata
-            shutil.copy2(source_path, dest_path)
+        dest_path = _copy_to_category(source_path, filename, category,
+                                      destination_folder, progress_callback, tracker)
+        if dest_path:
             success_count += 1
             copied_files.append((source_path, dest_path))
-            
-        except Exception as e:
-            _log(f"❌ Error copying {filename}: {e}", progress_callback)
+        else:
             error_count += 1
             failed_files.append(source_path)
+        destinations.append(dest_path)
+
+    # Where each file went (used by the search index)
+    df['Destination'] = destinations
 
     _log(f"✅ Copy complete: {success_count} files copied, {error_count} errors", progress_callback)
 
+    _verify_and_delete_originals(copied_files, success_count, error_count, total_files,
+                                 destination_folder, progress_callback, tracker)
+
+
+def _verify_and_delete_originals(copied_files, success_count, error_count, total_files,
+                                 destination_folder, progress_callback=None, tracker=None):
+    """
+    PHASES 2-3 of organizing: verify every copy, then delete the originals
+    only if all copies verified and there were no copy errors.
+    """
     # ===== PHASE 2: VERIFY COPIED FILES =====
     _log("=" * 50, progress_callback)
     _log(f"🔍 PHASE 2: Verifying {len(copied_files)} copied files...", progress_callback)
     _log("=" * 50, progress_callback)
+
+    if tracker is not None:
+        tracker.set_stage("Verifying")
     
     verification_passed = True
     verified_count = 0
     verification_failed_count = 0
     failed_verifications = []  # Track which files failed verification
     
+    # Stat every source and copy concurrently, fresh from disk: a source that
+    # changed since the scan must not match its (older) copy by a cached size
+    stat_cache.prefetch([path for pair in copied_files for path in pair], refresh=True)
+    
     for source_path, dest_path in copied_files:
         try:
             # Check if destination file exists
-            if not os.path.exists(dest_path):
+            if not stat_cache.exists(dest_path):
                 _log(f"❌ Verification failed: {os.path.basename(dest_path)} not found", progress_callback)
                 verification_failed_count += 1
                 verification_passed = False
@@ -488,8 +1209,8 @@ def organize_files_into_folders(df, destination_folder, progress_callback=None):
                 continue
             
             # Check if file sizes match
-            source_size = os.path.getsize(source_path)
-            dest_size = os.path.getsize(dest_path)
+            source_size = stat_cache.getsize(source_path)
+            dest_size = stat_cache.getsize(dest_path)
             
             if source_size != dest_size:
                 _log(f"❌ Size mismatch: {os.path.basename(source_path)} (source: {source_size}, dest: {dest_size})", progress_callback)
@@ -514,8 +1235,18 @@ def organize_files_into_folders(df, destination_folder, progress_callback=None):
     if verification_failed_count > 0:
         _log(f"⚠️ {verification_failed_count} files failed verification", progress_callback)
 
+    # Where every file went must be on disk before any original is deleted (see ledger.py)
+    ledger_written = True
+    try:
+        recorded = ledger.flush()
+        _log(f"📒 Recorded {recorded} moves in the relocation ledger", progress_callback)
+    except Exception as e:
+        ledger_written = False
+        _log(f"❌ Could not write the relocation ledger: {e}", progress_callback)
+
     # ===== PHASE 3: DELETE ORIGINAL FILES (only if verification passed) =====
-    if verification_passed and error_count == 0:
+    removed_sources = []
+    if verification_passed and error_count == 0 and ledger_written:
         _log("=" * 50, progress_callback)
         _log(f"🗑️  PHASE 3: Deleting {len(copied_files)} original files (all verified)...", progress_callback)
         _log("=" * 50, progress_callback)
@@ -525,13 +1256,16 @@ def organize_files_into_folders(df, destination_folder, progress_callback=None):
         
         for source_path, dest_path in copied_files:
             try:
-                if os.path.exists(source_path):
-                    os.remove(source_path)
-                    deleted_count += 1
+                os.remove(source_path)
+                stat_cache.forget(source_path)
+                removed_sources.append(source_path)
+                deleted_count += 1
+                
+                if progress_callback and deleted_count % 50 == 0:
+                    progress_callback(f"🗑️  Deleted: {deleted_count}/{len(copied_files)} original files...")
                     
-                    if progress_callback and deleted_count % 50 == 0:
-                        progress_callback(f"🗑️  Deleted: {deleted_count}/{len(copied_files)} original files...")
-                        
+            except FileNotFoundError:
+                pass  # Already gone
             except Exception as e:
                 _log(f"❌ Failed to delete {os.path.basename(source_path)}: {e}", progress_callback)
                 delete_failed_count += 1
@@ -558,6 +1292,19 @@ def organize_files_into_folders(df, destination_folder, progress_callback=None):
             _log(f"   Successfully copied: {success_count} files", progress_callback)
             _log(f"   Failed: {error_count} files", progress_callback)
 
+        if not ledger_written:
+            _log(f"❌ Reason: the relocation ledger could not be written", progress_callback)
+            _log(f"   Action: Your original files are safe!", progress_callback)
+            _log(f"   Copied files are in: {destination_folder}", progress_callback)
+
+    # Which of the recorded originals are gone
+    if removed_sources:
+        try:
+            ledger.mark_removed(removed_sources)
+        except Exception as e:
+            _log(f"⚠️ Could not mark {len(removed_sources)} deleted originals in the relocation ledger: {e}",
+                 progress_callback)
+
     # ===== FINAL SUMMARY =====
     _log("=" * 50, progress_callback)
     _log(f"✅ ORGANIZATION COMPLETE!", progress_callback)
@@ -566,8 +1313,12 @@ def organize_files_into_folders(df, destination_folder, progress_callback=None):
     _log(f"   Copy errors: {error_count}", progress_callback)
     _log(f"   Files verified: {verified_count}", progress_callback)
     
-    if verification_passed and error_count == 0:
+    # From what Phase 3 actually removed, so the summary cannot disagree with it
+    if removed_sources and len(removed_sources) == len(copied_files):
         _log(f"   Original files deleted: Yes ✓", progress_callback)
+    elif removed_sources:
+        _log(f"   Original files deleted: {len(removed_sources)}/{len(copied_files)} (the rest are kept)",
+             progress_callback)
     else:
         _log(f"   Original files deleted: No (kept for safety)", progress_callback)
     
@@ -575,14 +1326,176 @@ def organize_files_into_folders(df, destination_folder, progress_callback=None):
     _log("=" * 50, progress_callback)
 
 
+def set_embedding_backend(name):
+    """
+    Switch the embedding backend used for semantic matching and search.
+    
+    Args:
+        name: "torch" or "onnx" (see embeddings.load_embedding_backend)
+    """
+    models.embedding_backend = name
+    models.release("embedder")
+
+
+def set_matching_engine(name):
+    """
+    Switch the default engine for matching files to query categories.
+    
+    Args:
+        name: "embedding" (MiniLM similarity) or "lexical" (BM25 over keywords with
+            synonym expansion - no embedding model, for small machines)
+    """
+    global matching_engine
+    if name not in MATCHING_ENGINES:
+        raise ValueError(f"Unknown matching engine '{name}' (choose from {', '.join(MATCHING_ENGINES)})")
+    matching_engine = name
+
+
+def apply_thread_budget(cores=None, workers=1):
+    """
+    Use N cores for the whole pipeline.
+    
+    Splits them between worker processes and intra-op threads, applies the
+    split to torch (EasyOCR, embeddings) and releases the models that size
+    their thread pool at load time (Whisper, ONNX embeddings) so they are
+    reloaded with the new split.
+    
+    Args:
+        cores: Cores to use (default: $SMART_ORGANIZER_CORES or all)
+        workers: Parallel extraction workers sharing the cores
+    """
+    budget = configure_thread_budget(cores, workers)
+    models.release("whisper")
+    if models.embedding_backend == "onnx":
+        models.release("embedder")
+    return budget
+
+
+@contextmanager
+def run_stage(name, uses=(), release=()):
+    """
+    Run one pipeline stage with CPU (thread budget) and memory (RSS) accounting.
+    
+    Args:
+        name: Stage label used in the reports
+        uses: Models the stage needs (kept loaded while it runs)
+        release: Models to unload when it ends
+    """
+    with get_thread_budget().measure(name), models.stage(name, uses, release):
+        yield
+    if models.release_after_use:
+        # Extraction models live in the supervised worker
+        supervisor.release(*release)
+
+
+def log_run_report(progress_callback=None):
+    """Log the CPU and memory reports of the stages run so far."""
+    _log(get_thread_budget().report(), progress_callback)
+    _log(models.report(), progress_callback)
+    throttle_report = throttle.report()
+    if throttle_report:
+        _log(throttle_report, progress_callback)
+    quarantine_report = supervisor.report()
+    if quarantine_report:
+        _log(quarantine_report, progress_callback)
+    rules_report = rules.report()
+    if rules_report:
+        _log(rules_report, progress_callback)
+    image_report = image_dedup.report()
+    if image_report:
+        _log(image_report, progress_callback)
+    media_report = media_probe.report()
+    if media_report:
+        _log(media_report, progress_callback)
+
+
+def reset_run_stats():
+    """Start CPU and memory accounting (and a fresh metadata cache) for a new run."""
+    get_thread_budget().reset_stats()
+    models.reset_stats()
+    stat_cache.reset()
+    supervisor.reset_stats()
+    throttle.reset_stats()
+    ledger.reset()
+    rules.reset_stats()
+    image_dedup.reset()
+    media_probe.reset_stats()
+
+
+def log_model_source(progress_callback=None):
+    """Log whether this run uses the warm model daemon (no model loading)."""
+    if models.daemon is not None:
+        _log("🔥 Using warm models from the model daemon", progress_callback)
+
+
 def get_categories_from_query(user_query):
     """Extract target nouns from user query."""
-    doc = nlp(user_query)
+    remote = _daemon_call("query_categories", user_query)
+    if remote is not None:
+        return remote
+    doc = models.get("nlp")(user_query)
     targets = [token.text for token in doc if token.pos_ in ["NOUN", "PROPN"] and not token.is_stop]
     return targets
 
 
-def organize_files_smart(folder_path, destination_folder, user_query=None, include_subfolders=True, progress_callback=None):
+def _index_text(filename, keywords, preview):
+    """Text embedded for the search index: name, keywords and the start of the preview."""
+    name = " ".join(_path_tokens(filename))
+    return " ".join(part for part in [name, keywords or "", (preview or "")[:1000]] if part)
+
+
+def index_files(df, progress_callback=None, index=None, batch_size=1024):
+    """
+    Store a content embedding for every file in the local vector index so it
+    can be found later with search_index, without rescanning.
+    
+    Files are indexed under their Destination (where organizing put them) if
+    that column exists, otherwise under their original Path.
+    
+    Args:
+        df: DataFrame from scan_folder / organize_files_*
+        progress_callback: Optional function(message) for progress updates
+        index: Optional FileVectorIndex (default: the app's index)
+        batch_size: Files embedded per batch
+    """
+    if len(df) == 0:
+        return
+    index = index or FileVectorIndex()
+    
+    paths = manifest_paths(df)
+    if 'Destination' in df.columns:
+        paths = df['Destination'].fillna(paths)
+    empty = pd.Series([""] * len(df), index=df.index)
+    keywords = df['Keywords'] if 'Keywords' in df.columns else empty
+    previews = df['Preview'] if 'Preview' in df.columns else empty
+    
+    rows = list(zip(paths, df['Filename'], df['Category'].astype(object), keywords.fillna(""), previews.fillna("")))
+    _log(f"🗂️ Indexing {len(rows)} files for search...", progress_callback)
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        texts = [_index_text(filename, kw, preview) for _, filename, _, kw, preview in batch]
+        vectors = models.get("embedder").encode(texts)
+        index.add(
+            [r[0] for r in batch], [r[1] for r in batch], [r[2] for r in batch],
+            [r[3] for r in batch], [r[4][:200] for r in batch], vectors
+        )
+    _log(f"✅ Search index updated ({len(index)} entries)", progress_callback)
+
+
+def search_index(query, k=10, index=None):
+    """
+    Free-text search over every file indexed so far (e.g. "find my dental bills").
+    
+    Returns:
+        List of result dicts (path, filename, category, keywords, snippet, score)
+    """
+    index = index or FileVectorIndex()
+    query_vector = models.get("embedder").encode([query])[0]
+    return index.search(query_vector, k)
+
+
+def organize_files_smart(folder_path, destination_folder, user_query=None, include_subfolders=True, progress_callback=None, tracker=None,
+                         streaming=False, build_index=True, engine=None):
     """
     Main orchestration function with progress callbacks.
     
@@ -598,7 +1511,25 @@ def organize_files_smart(folder_path, destination_folder, user_query=None, inclu
         user_query: Optional query like "organize by Invoice and Legal"
         include_subfolders: If True, scan subdirectories; if False, scan only top level
         progress_callback: Optional function(message) for progress updates
+        tracker: Optional ProgressTracker for determinate progress and ETA
+        streaming: If True, overlap analysis and organizing (see organize_files_streaming)
+        build_index: If True, add every file to the local search index afterwards
+        engine: Query matching engine for this run, "embedding" or "lexical"
+            (default: matching_engine)
     """
+    reset_run_stats()
+    log_model_source(progress_callback)
+    
+    if streaming:
+        with run_stage("Streaming pipeline", release=["markitdown", "ocr", "whisper", "nlp"]):
+            df = organize_files_streaming(folder_path, destination_folder, user_query,
+                                          include_subfolders, progress_callback, tracker, engine)
+        if build_index:
+            with run_stage("Indexing", uses=["embedder"], release=["embedder"]):
+                index_files(df, progress_callback)
+        log_run_report(progress_callback)
+        return df
+    
     _log("=" * 50, progress_callback)
     _log("🚀 SMART FILE ORGANIZER", progress_callback)
     _log("=" * 50, progress_callback)
@@ -606,7 +1537,10 @@ def organize_files_smart(folder_path, destination_folder, user_query=None, inclu
     # STEP 1: Scan folder
     subfolder_msg = "including subfolders" if include_subfolders else "top-level only"
     _log(f"\n📂 Step 1: Scanning folder ({subfolder_msg})...", progress_callback)
-    df = scan_folder(folder_path, progress_callback, include_subfolders)
+    target_categories = get_categories_from_query(user_query) if user_query else None
+    with run_stage("Scan + extraction", release=["markitdown", "ocr", "whisper"]):
+        df = scan_folder(folder_path, progress_callback, include_subfolders, tracker=tracker,
+                         target_categories=target_categories, engine=engine)
     _log(f"Found {len(df)} files", progress_callback)
     
     if len(df) == 0:
@@ -617,7 +1551,9 @@ def organize_files_smart(folder_path, destination_folder, user_query=None, inclu
     if user_query:
         _log("\n🎯 Step 2: Matching files to query categories...", progress_callback)
         _log(f"   Query: '{user_query}'", progress_callback)
-        df = refine_categories_with_semantic_search(df, user_query, progress_callback)
+        with run_stage("Keywords + semantic matching", uses=["nlp", "embedder"], release=["nlp"]):
+            df = refine_categories_with_semantic_search(df, user_query, progress_callback, engine)
+        log_cascade_report(df, progress_callback)
     else:
         _log("\n📋 Step 2: Using extension-based categories", progress_callback)
         _log("   (No query provided - files will be organized by type)", progress_callback)
@@ -630,12 +1566,215 @@ def organize_files_smart(folder_path, destination_folder, user_query=None, inclu
     
     # STEP 3: Organize files (automatic copy-verify-delete)
     _log(f"\n📦 Step 3: Organizing files (Copy → Verify → Delete)...", progress_callback)
-    organize_files_into_folders(df, destination_folder, progress_callback)
+    with run_stage("Organizing"):
+        organize_files_into_folders(df, destination_folder, progress_callback, tracker=tracker)
+    
+    if build_index:
+        with run_stage("Indexing", uses=["embedder"], release=["embedder"]):
+            index_files(df, progress_callback)
     
     _log("\n" + "=" * 50, progress_callback)
     _log("✅ ALL DONE!", progress_callback)
+    log_run_report(progress_callback)
+    _log("=" * 50, progress_callback)
+    
+    return df
+
+
+def organize_files_streaming(folder_path, destination_folder, user_query=None, include_subfolders=True,
+                             progress_callback=None, tracker=None, engine=None):
+    """
+    Streaming variant of organize_files_smart: files are copied as soon as
+    their category is final while slow extraction continues for the rest.
+    
+    A file's category is final when:
+    - No query was given (extension-based categories, nothing to extract)
+    - It is not read during the scan (see _is_analyzed)
+    - Its path alone decides the query category (see classify_by_path)
+    - Extraction + keyword matching for it has finished
+    
+    A single organizer thread copies files from a queue, so wall-clock
+    time is close to the slowest stage instead of the sum of all stages.
+    Verification and deletion of originals still run after every copy is done,
+    with the same safety rules as organize_files_into_folders.
+    
+    Args:
+        folder_path: Source folder to scan
+        destination_folder: Where to organize files
+        user_query: Optional query like "organize by Invoice and Legal"
+        include_subfolders: If True, scan subdirectories; if False, scan only top level
+        progress_callback: Optional function(message) for progress updates
+        tracker: Optional ProgressTracker for determinate progress and ETA
+        engine: Query matching engine, "embedding" or "lexical" (default: matching_engine)
+    """
     _log("=" * 50, progress_callback)
+    _log("🚀 SMART FILE ORGANIZER (streaming)", progress_callback)
+    _log("=" * 50, progress_callback)
+    
+    engine = engine or matching_engine
+    target_categories = get_categories_from_query(user_query) if user_query else []
+    target_embeddings = None
+    lexical_matcher = None
+    if target_categories:
+        _log(f"🎯 Matching files against: {target_categories}", progress_callback)
+        if engine == "lexical":
+            lexical_matcher = LexicalMatcher(target_categories)
+        else:
+            target_embeddings = models.get("embedder").encode(target_categories)
+    elif user_query:
+        _log("⚠️ No target categories found in query.", progress_callback)
+    
+    try:
+        file_paths = _list_files(folder_path, include_subfolders)
+    except Exception as e:
+        _log(f"❌ Error scanning folder: {e}", progress_callback)
+        file_paths = []
+    total_files = len(file_paths)
+    _log(f"Found {total_files} files", progress_callback)
+    
+    if total_files == 0:
+        _log("⚠️ No files found", progress_callback)
+        df = build_manifest([], [], [], previews=[])
+        df['Keywords'] = []
+        return df
+    
+    if not os.path.exists(destination_folder):
+        os.makedirs(destination_folder)
+        _log(f"📁 Created main folder: {destination_folder}", progress_callback)
+    
+    # Unbounded on purpose: final files are queued up front and must not
+    # hold back analysis while the organizer works through them
+    ready = queue.Queue()
+    copied_files = []
+    failed_files = []
+    
+    stat_cache.prefetch(file_paths)
+    exts = detect_extensions(file_paths)
+    categories = [_category_for_extension(ext) for ext in exts]
+    tiers = ["content" if target_categories and _is_analyzed(c, e) else "extension"
+             for c, e in zip(categories, exts)]
+    
+    # TIER 0: files decided by a user rule stream out right away, without any model
+    apply_rules(file_paths, exts, categories, tiers, progress_callback)
+    
+    # TIER 1: files decided by their path skip extraction and stream out right away
+    if target_categories:
+        candidates = [i for i, tier in enumerate(tiers) if tier == "content" and categories[i] != "Others"]
+        decisions = classify_by_path([file_paths[i] for i in candidates], target_categories, folder_path,
+                                     engine=engine)
+        for i, (decided, matched) in zip(candidates, decisions):
+            if decided:
+                tiers[i] = "path"
+                categories[i] = matched or categories[i]
+    
+    records = []
+    analyze = []
+    for file_path, ext, category, tier in zip(file_paths, exts, categories, tiers):
+        record = {
+            "Filename": os.path.basename(file_path),
+            "Ext": ext,
+            "Category": category,
+            "Path": file_path,
+            "Preview": "",
+            "Keywords": "",
+            "Tier": tier
+        }
+        records.append(record)
+        if tier == "content":
+            analyze.append(record)
+        else:
+            # Category is already final - goes straight to the organizer
+            ready.put(record)
+        if tracker is not None:
+            try:
+                size = stat_cache.getsize(file_path)
+            except OSError:
+                size = 0
+            if tier == "content":
+                modality, units = estimate_work_units(file_path, category, size, ext, stat=stat_cache.stat)
+                tracker.plan(("scan", file_path), modality, units)
+            if tracker.include_copy:
+                tracker.plan(("copy", file_path), "Copy", max(size / 1_000_000, 0.01))
+    
+    _log(f"⚡ {total_files - len(analyze)} files ready now, {len(analyze)} need content analysis", progress_callback)
+    
+    # ===== ORGANIZER STAGE (runs concurrently with analysis) =====
+    def organizer():
+        while True:
+            record = ready.get()
+            if record is None:
+                break
+            try:
+                dest_path = _copy_to_category(record["Path"], record["Filename"], record["Category"],
+                                              destination_folder, progress_callback, tracker)
+            except Exception as e:
+                # An error must not end the thread: the remaining files would go uncounted
+                _log(f"❌ Error copying {record['Filename']}: {e}", progress_callback)
+                dest_path = None
+            record["Destination"] = dest_path
+            if dest_path:
+                copied_files.append((record["Path"], dest_path))
+            else:
+                failed_files.append(record["Path"])
+            done = len(copied_files) + len(failed_files)
+            if progress_callback and done % 10 == 0:
+                progress_callback(f"📦 Copying: {done}/{total_files} files...")
+    
+    organizer_thread = threading.Thread(target=organizer, daemon=True)
+    organizer_thread.start()
+    
+    if tracker is not None:
+        tracker.set_stage("Analyzing + copying")
+    
+    # ===== ANALYSIS STAGE =====
+    last_use = _last_model_uses([(r["Category"], r["Ext"]) for r in analyze])
+    for count, record in enumerate(analyze, start=1):
+        file_path = record["Path"]
+        if progress_callback:
+            progress_callback(f"📄 Analyzing ({count}/{len(analyze)}): {record['Filename']}")
+        if tracker is not None:
+            tracker.start(("scan", file_path))
+        
+        record["Preview"] = extract_text(record["Category"], file_path, record["Ext"])
+        _release_models_done_at(last_use, count - 1)
+        record["Keywords"] = extract_keywords(record["Preview"])
+        # "Others" files are read for the search index only and keep their category
+        if record["Category"] == "Others":
+            pass
+        elif record["Keywords"] and lexical_matcher is not None:
+            matched = lexical_matcher.match([record["Keywords"]])[0]
+            if matched:
+                record["Category"] = matched
+        elif record["Keywords"]:
+            matched = match_query_category(record["Keywords"], target_categories, target_embeddings)
+            if matched:
+                record["Category"] = matched
+        
+        if tracker is not None:
+            tracker.finish(("scan", file_path))
+        ready.put(record)
+    
+    ready.put(None)
+    organizer_thread.join()
+    
+    success_count = len(copied_files)
+    error_count = len(failed_files)
+    _log(f"✅ Copy complete: {success_count} files copied, {error_count} errors", progress_callback)
+    
+    df = build_manifest([r["Path"] for r in records], [r["Category"] for r in records],
+                        [r["Tier"] for r in records], [r["Preview"] for r in records])
+    df['Keywords'] = [r["Keywords"] for r in records]
+    df['Destination'] = [r.get("Destination") for r in records]
+    if target_categories:
+        log_cascade_report(df, progress_callback)
+    
+    # Show category breakdown
+    _log("\n📊 CATEGORY BREAKDOWN:", progress_callback)
+    for category, count in df['Category'].value_counts().items():
+        _log(f"   • {category}: {count} files", progress_callback)
     
+    _verify_and_delete_originals(copied_files, success_count, error_count, total_files,
+                                 destination_folder, progress_callback, tracker)
     return df
 
 
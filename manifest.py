@@ -0,0 +1,62 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# Cascade tiers (see rules.RuleSet and logic.classify_by_path)
+TIERS = ["rule", "path", "content", "extension"]
+
+
+def build_manifest(file_paths, categories, tiers, previews=None, clusters=None):
+    """
+    Compact file manifest, one row per file.
+
+    Columns:
+        Filename  - file name
+        Directory - parent folder, categorical: every folder string is
+                    stored once and rows only hold an integer code
+        Category  - categorical
+        Tier      - categorical ("rule", "path", "content", "extension")
+        Preview   - extracted text, only if previews are given
+        Cluster   - first image of the near-identical image cluster a
+                    file belongs to ("" if none), only if clusters are given
+
+    The full path of a row is Directory + Filename (see manifest_paths).
+
+    Args:
+        file_paths: Paths of the files
+        categories: Category per file
+        tiers: Cascade tier per file
+        previews: Optional preview text per file (None = no Preview column)
+        clusters: Optional cluster per file (None = no Cluster column, see
+            image_hashes.ImageDeduplicator.cluster_for)
+    """
+    directories, filenames = zip(*(os.path.split(p) for p in file_paths)) if len(file_paths) else ((), ())
+    df = pd.DataFrame({
+        "Filename": pd.Series(filenames, dtype=object),
+        "Directory": pd.Categorical(directories),
+        "Category": pd.Categorical(categories),
+        "Tier": pd.Categorical(tiers, categories=TIERS),
+    })
+    if previews is not None:
+        df["Preview"] = pd.Series(previews, dtype=object).fillna("")
+    if clusters is not None:
+        df["Cluster"] = pd.Series(clusters, dtype=object).fillna("")
+    return df
+
+
+def manifest_paths(df):
+    """Full path of every row, built from Directory + Filename (or the Path column of older frames)."""
+    if "Path" in df.columns:
+        return df["Path"]
+    directories = df["Directory"].cat.categories.to_numpy(dtype=object)
+    codes = df["Directory"].cat.codes.to_numpy()
+    # Joined per folder, not per row: one separator-terminated string per directory
+    prefixes = np.array([os.path.join(d, "") for d in directories], dtype=object)
+    return pd.Series(prefixes[codes] + df["Filename"].to_numpy(dtype=object), index=df.index, name="Path")
+
+
+def set_categories(df, categories):
+    """Replace the Category column, keeping it categorical without unused categories."""
+    df["Category"] = pd.Categorical(np.asarray(categories, dtype=object))
+    return df
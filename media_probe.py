@@ -0,0 +1,312 @@
+import json
+import os
+import shutil
+import sqlite3
+import struct
+import subprocess
+import threading
+
+from storage import app_data_path
+
+# Seconds of audio/video transcribed per file (only the start of longer media)
+MEDIA_CUTOFF_SEC = 150
+# Media shorter than this is not transcribed (nothing Whisper could use)
+MIN_SECONDS = float(os.environ.get("SMART_ORGANIZER_MEDIA_MIN_SECONDS") or 1.0)
+# Media longer than this is not transcribed at all (default: no limit; only
+# the first minutes of long files are transcribed anyway)
+MAX_SECONDS = float(os.environ["SMART_ORGANIZER_MEDIA_MAX_SECONDS"]) if os.environ.get(
+    "SMART_ORGANIZER_MEDIA_MAX_SECONDS") else None
+
+# Largest MP4 'moov' box read (it holds the index of every sample; a few MB even for long videos)
+MAX_MOOV_BYTES = 64 << 20
+# Containers with boxes nested inside the ones named here
+MP4_CONTAINER_BOXES = {b"moov", b"trak", b"mdia", b"minf", b"stbl"}
+# ffprobe is only a fallback for containers without a native parser (MP3, MKV, AVI, ...)
+FFPROBE_TIMEOUT = 10
+
+# WAVE format tags
+WAV_CODECS = {1: "pcm", 3: "pcm_float", 6: "alaw", 7: "mulaw", 0x55: "mp3", 0xFFFE: "pcm"}
+
+
+def _mp4_boxes(data):
+    """(type, payload) of the boxes in an MP4 byte string."""
+    offset = 0
+    while offset + 8 <= len(data):
+        size, box_type = struct.unpack_from(">I4s", data, offset)
+        header = 8
+        if size == 1:
+            if offset + 16 > len(data):
+                return
+            size = struct.unpack_from(">Q", data, offset + 8)[0]
+            header = 16
+        elif size == 0:
+            size = len(data) - offset
+        if size < header:
+            return
+        yield box_type, data[offset + header:offset + size]
+        offset += size
+
+
+def _parse_mp4_moov(moov, info):
+    for box_type, payload in _mp4_boxes(moov):
+        if box_type == b"mvhd" and len(payload) >= 32:
+            if payload[0] == 1:
+                timescale, duration = struct.unpack_from(">IQ", payload, 20)
+            else:
+                timescale, duration = struct.unpack_from(">II", payload, 12)
+            if timescale and duration:
+                info["duration"] = duration / timescale
+        elif box_type == b"trak":
+            _parse_mp4_track(payload, info)
+
+
+def _parse_mp4_track(trak, info):
+    handler = codec = None
+    stack = [trak]
+    while stack:
+        for box_type, payload in _mp4_boxes(stack.pop()):
+            if box_type in MP4_CONTAINER_BOXES:
+                stack.append(payload)
+            elif box_type == b"hdlr" and len(payload) >= 12 and handler is None:
+                # The media handler (QuickTime files also have a data handler in 'minf')
+                handler = payload[8:12]
+            elif box_type == b"stsd" and len(payload) >= 16:
+                # First sample entry: size, then its format (e.g. mp4a, avc1, hvc1)
+                codec = payload[12:16].decode("latin-1").strip()
+    if handler == b"soun":
+        info["has_audio"] = True
+        info["audio_codec"] = info["audio_codec"] or codec
+    elif handler == b"vide":
+        info["has_video"] = True
+        info["video_codec"] = info["video_codec"] or codec
+
+
+def _probe_mp4(f, file_size):
+    """Duration and tracks from the 'moov' box, wherever it is in the file."""
+    info = _empty_info("mp4")
+    offset = 0
+    while offset + 8 <= file_size:
+        f.seek(offset)
+        header = f.read(16)
+        if len(header) < 8:
+            break
+        size, box_type = struct.unpack_from(">I4s", header)
+        header_size = 8
+        if size == 1 and len(header) == 16:
+            size = struct.unpack_from(">Q", header, 8)[0]
+            header_size = 16
+        elif size == 0:
+            size = file_size - offset
+        if size < header_size:
+            break
+        if box_type == b"moov":
+            if size > MAX_MOOV_BYTES:
+                return None
+            f.seek(offset + header_size)
+            _parse_mp4_moov(f.read(size - header_size), info)
+            return info
+        offset += size  # skip 'mdat' and the rest without reading them
+    return None
+
+
+def _probe_wav(f, file_size):
+    """Codec and duration from the 'fmt ' and 'data' chunks."""
+    info = _empty_info("wav")
+    info["has_audio"] = True
+    byte_rate = None
+    offset = 12
+    while offset + 8 <= file_size:
+        f.seek(offset)
+        chunk_id, size = struct.unpack("<4sI", f.read(8))
+        if chunk_id == b"fmt " and size >= 16:
+            format_tag, _channels, _sample_rate, byte_rate = struct.unpack("<HHII", f.read(12))
+            info["audio_codec"] = WAV_CODECS.get(format_tag, f"0x{format_tag:04x}")
+        elif chunk_id == b"data":
+            # Streamed WAVs leave the size unset: the data then runs to the end
+            data_size = min(size, file_size - offset - 8)
+            if byte_rate:
+                info["duration"] = data_size / byte_rate
+            break
+        offset += 8 + size + (size & 1)
+    return info
+
+
+def _probe_flac(f):
+    """Duration from the STREAMINFO block (sample rate and total samples)."""
+    info = _empty_info("flac")
+    info["has_audio"] = True
+    info["audio_codec"] = "flac"
+    f.seek(4)
+    header = f.read(4)
+    if len(header) == 4 and header[0] & 0x7F == 0:
+        streaminfo = f.read(34)
+        if len(streaminfo) == 34:
+            packed = int.from_bytes(streaminfo[10:18], "big")
+            sample_rate = packed >> 44
+            total_samples = packed & ((1 << 36) - 1)
+            if sample_rate and total_samples:
+                info["duration"] = total_samples / sample_rate
+    return info
+
+
+def _probe_ffprobe(file_path):
+    """Container info from ffprobe (None if it is not installed or fails)."""
+    ffprobe = shutil.which("ffprobe")
+    if ffprobe is None:
+        return None
+    try:
+        result = subprocess.run(
+            [ffprobe, "-v", "error", "-of", "json",
+             "-show_entries", "format=format_name,duration:stream=codec_type,codec_name", file_path],
+            capture_output=True, timeout=FFPROBE_TIMEOUT, check=True)
+        data = json.loads(result.stdout)
+    except (OSError, subprocess.SubprocessError, ValueError):
+        return None
+    fmt = data.get("format", {})
+    info = _empty_info(fmt.get("format_name", "").split(",")[0] or None)
+    if fmt.get("duration") not in (None, "N/A"):
+        info["duration"] = float(fmt["duration"])
+    for stream in data.get("streams", []):
+        kind = stream.get("codec_type")
+        if kind in ("audio", "video"):
+            info[f"has_{kind}"] = True
+            info[f"{kind}_codec"] = info[f"{kind}_codec"] or stream.get("codec_name")
+    return info
+
+
+def _empty_info(container):
+    return {"container": container, "duration": None, "has_audio": False, "has_video": False,
+            "audio_codec": None, "video_codec": None}
+
+
+def probe_media(file_path):
+    """
+    Duration and stream layout of an audio or video file, from its headers.
+
+    MP4/MOV/M4A, WAV and FLAC headers are parsed directly (a few small
+    reads, no decoder); other containers are asked to ffprobe if it is
+    installed.
+
+    Returns:
+        Dict with container, duration (seconds or None), has_audio,
+        has_video, audio_codec and video_codec; None if the file could
+        not be probed
+    """
+    try:
+        file_size = os.path.getsize(file_path)
+        with open(file_path, "rb") as f:
+            head = f.read(12)
+            if head[4:8] == b"ftyp":
+                info = _probe_mp4(f, file_size)
+            elif head.startswith(b"RIFF") and head[8:12] == b"WAVE":
+                info = _probe_wav(f, file_size)
+            elif head.startswith(b"fLaC"):
+                info = _probe_flac(f)
+            else:
+                info = None
+    except (OSError, struct.error):
+        return None
+    return info if info is not None else _probe_ffprobe(file_path)
+
+
+class MediaProber:
+    """
+    Probes audio and video files before any decoder starts, with results
+    cached by (device, inode) while mtime and size are unchanged.
+
+    check() tells extract_text which files not to decode at all: videos
+    without an audio track (Whisper would fail on them) and media outside
+    [MIN_SECONDS, MAX_SECONDS]. Files that cannot be probed are decoded
+    as before.
+
+    Args:
+        db_path: SQLite file (default: media_probe.sqlite in the app data folder)
+    """
+    def __init__(self, db_path=None, min_seconds=MIN_SECONDS, max_seconds=MAX_SECONDS):
+        self.db_path = db_path
+        self.min_seconds = min_seconds
+        self.max_seconds = max_seconds
+        self._db = None
+        self._db_pid = None
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def _connection(self):
+        # One connection per process (extraction workers are separate processes)
+        if self._db is None or self._db_pid != os.getpid():
+            self._db = sqlite3.connect(self.db_path or app_data_path("media_probe.sqlite"),
+                                       check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS probes ("
+                "dev INTEGER, inode INTEGER, mtime_ns INTEGER, size INTEGER, info TEXT,"
+                "PRIMARY KEY (dev, inode))"
+            )
+            self._db_pid = os.getpid()
+        return self._db
+
+    def probe(self, file_path, stat=os.stat):
+        """probe_media, from the cache where possible."""
+        try:
+            st = stat(file_path)
+        except OSError:
+            return None
+        key = (st.st_dev, st.st_ino, st.st_mtime_ns, st.st_size)
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT info FROM probes WHERE dev = ? AND inode = ? AND mtime_ns = ? AND size = ?", key
+            ).fetchone()
+        if row is not None:
+            return json.loads(row[0]) if row[0] else None
+
+        info = probe_media(file_path)
+        with self._lock:
+            db = self._connection()
+            db.execute("INSERT OR REPLACE INTO probes (dev, inode, mtime_ns, size, info) VALUES (?, ?, ?, ?, ?)",
+                       key + (json.dumps(info) if info else "",))
+            db.commit()
+            self._probed += 1
+        return info
+
+    def check(self, file_path, stat=os.stat):
+        """
+        Why a media file should not be decoded, or None to go ahead.
+
+        Returns:
+            "no audio", "too short", "too long" or None
+        """
+        info = self.probe(file_path, stat)
+        with self._lock:
+            self._checked += 1
+        reason = None
+        if info is not None:
+            duration = info["duration"]
+            if info["has_video"] and not info["has_audio"]:
+                reason = "no audio"
+            elif duration is not None and duration < self.min_seconds:
+                reason = "too short"
+            elif duration is not None and self.max_seconds is not None and duration > self.max_seconds:
+                reason = "too long"
+        if reason:
+            with self._lock:
+                self._skipped[reason] = self._skipped.get(reason, 0) + 1
+        return reason
+
+    # ===== REPORTING =====
+
+    def reset_stats(self):
+        self._checked = 0
+        self._probed = 0
+        self._skipped = {}
+
+    def report(self):
+        """Files probed and skipped in this run ("" if no media was probed)."""
+        if not self._checked:
+            return ""
+        line = f"🎞️ Media probe: {self._checked} files checked ({self._probed} read, the rest cached)"
+        if self._skipped:
+            line += ", not decoded: " + ", ".join(f"{count} {reason}" for reason, count in self._skipped.items())
+        return line
+
+
+# Shared by all stages of a run (reset by logic.reset_run_stats)
+media_probe = MediaProber()
@@ -0,0 +1,190 @@
+import errno
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from thread_budget import get_thread_budget
+
+# Stats per prefetch chunk (bounds the futures held at once)
+PREFETCH_CHUNK = 4096
+
+
+class MetadataCache:
+    """
+    Run-scoped cache of directory listings and file stats.
+
+    On network mounts (SMB/NFS) every stat or listing is a round-trip, so
+    they are issued concurrently - at most max_in_flight at a time - and
+    remembered for the rest of the run: scanning, copying, verifying and
+    deleting never stat the same source path twice.
+
+    Call reset() at the start of every run. Paths the run itself changes
+    (new copies, deleted originals) are updated through add_name/forget.
+
+    Args:
+        max_in_flight: Concurrent metadata requests (default:
+            $SMART_ORGANIZER_IO_THREADS, then the thread budget's io_threads)
+    """
+    def __init__(self, max_in_flight=None):
+        self._max_in_flight = max_in_flight
+        self._stats = {}        # path -> os.stat_result, or None if missing
+        self._names = {}        # folder -> set of entry names
+        self._lock = threading.Lock()
+
+    @property
+    def max_in_flight(self):
+        if self._max_in_flight:
+            return self._max_in_flight
+        if os.environ.get("SMART_ORGANIZER_IO_THREADS"):
+            return max(1, int(os.environ["SMART_ORGANIZER_IO_THREADS"]))
+        return get_thread_budget().io_threads
+
+    @max_in_flight.setter
+    def max_in_flight(self, value):
+        self._max_in_flight = value
+
+    def reset(self):
+        """Forget everything (the file system may have changed since the last run)."""
+        with self._lock:
+            self._stats = {}
+            self._names = {}
+
+    # ===== LISTING =====
+
+    @staticmethod
+    def _scan_dir(folder):
+        """(files, subfolders to descend into) of one folder, in listing order."""
+        files, subfolders = [], []
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                if not is_dir:
+                    files.append(entry.path)
+                elif not entry.is_symlink():
+                    # Like os.walk: symlinked folders are not followed
+                    subfolders.append(entry.path)
+        return files, subfolders
+
+    def list_files(self, folder_path, include_subfolders=True):
+        """
+        Paths of all files below folder_path (top level only if include_subfolders is False).
+
+        Subfolders are listed concurrently; the result has the same order as
+        os.walk. Unreadable subfolders are skipped, an unreadable folder_path raises.
+        """
+        if not include_subfolders:
+            # DirEntry.is_file uses the listing's file type - no stat per entry
+            with os.scandir(folder_path) as entries:
+                return [entry.path for entry in entries if entry.is_file()]
+
+        listings = {folder_path: self._scan_dir(folder_path)}
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as pool:
+            pending = {pool.submit(self._scan_dir, sub): sub for sub in listings[folder_path][1]}
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    folder = pending.pop(future)
+                    try:
+                        listings[folder] = future.result()
+                    except OSError:
+                        listings[folder] = ([], [])
+                        continue
+                    for sub in listings[folder][1]:
+                        pending[pool.submit(self._scan_dir, sub)] = sub
+
+        # Top-down, depth-first: a folder's files, then each subfolder in turn
+        paths = []
+        stack = [folder_path]
+        while stack:
+            files, subfolders = listings[stack.pop()]
+            paths.extend(files)
+            stack.extend(reversed(subfolders))
+        return paths
+
+    def dir_names(self, folder):
+        """Names in a folder, listed once per run (empty if it does not exist)."""
+        with self._lock:
+            names = self._names.get(folder)
+        if names is None:
+            try:
+                names = set(os.listdir(folder))
+            except OSError:
+                names = set()
+            with self._lock:
+                names = self._names.setdefault(folder, names)
+        return names
+
+    def add_name(self, path):
+        """Record a file this run created."""
+        folder, name = os.path.split(path)
+        with self._lock:
+            if folder in self._names:
+                self._names[folder].add(name)
+            self._stats.pop(path, None)
+
+    def forget(self, path):
+        """Record a file this run removed."""
+        folder, name = os.path.split(path)
+        with self._lock:
+            if folder in self._names:
+                self._names[folder].discard(name)
+            self._stats[path] = None
+
+    # ===== STATS =====
+
+    @staticmethod
+    def _stat_quiet(path):
+        try:
+            return os.stat(path)
+        except OSError:
+            return None
+
+    def prefetch(self, paths, refresh=False):
+        """
+        Stat many paths concurrently and cache the results.
+
+        Args:
+            paths: Paths to stat
+            refresh: Stat again even if cached (e.g. copies just written)
+        """
+        with self._lock:
+            todo = list(paths) if refresh else [p for p in paths if p not in self._stats]
+        if not todo:
+            return
+        workers = min(self.max_in_flight, len(todo))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for start in range(0, len(todo), PREFETCH_CHUNK):
+                chunk = todo[start:start + PREFETCH_CHUNK]
+                results = list(pool.map(self._stat_quiet, chunk))
+                with self._lock:
+                    self._stats.update(zip(chunk, results))
+
+    def stat(self, path):
+        """Cached os.stat; raises FileNotFoundError for missing files like os.stat."""
+        with self._lock:
+            cached = path in self._stats
+            st = self._stats.get(path)
+        if not cached:
+            st = self._stat_quiet(path)
+            with self._lock:
+                self._stats[path] = st
+        if st is None:
+            raise FileNotFoundError(errno.ENOENT, "No such file or directory", path)
+        return st
+
+    def exists(self, path):
+        try:
+            self.stat(path)
+            return True
+        except OSError:
+            return False
+
+    def getsize(self, path):
+        return self.stat(path).st_size
+
+
+# Shared by all stages of a run (reset by logic.reset_run_stats)
+stat_cache = MetadataCache()
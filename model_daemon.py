@@ -0,0 +1,309 @@
+import json
+import os
+import queue
+import signal
+import socket
+import socketserver
+import struct
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+from storage import app_data_path
+
+SOCKET_PATH = os.environ.get("SMART_ORGANIZER_DAEMON_SOCKET") or app_data_path("model_daemon.sock")
+PROTOCOL_VERSION = 1
+
+# How long a client waits for the daemon to accept (a missing daemon must not slow a run down)
+CONNECT_TIMEOUT = 0.5
+# Requests arriving within this window are merged into one model call
+BATCH_WINDOW = 0.01
+BATCH_MAX_ITEMS = 512
+
+# Models loaded when the daemon starts (unless started lazily)
+PRELOAD_MODELS = ["nlp", "embedder", "markitdown", "ocr", "whisper"]
+# Of these, the ones extraction uses - loaded in the supervised worker when isolation is on
+EXTRACTION_MODELS = ["markitdown", "ocr", "whisper"]
+
+
+class DaemonUnavailable(ConnectionError):
+    """The model daemon is not running or went away."""
+
+
+# ===== WIRE FORMAT =====
+# Each message: 8-byte header (JSON length, payload length), JSON, raw array bytes.
+# No pickle - the socket only ever carries JSON and plain numeric arrays.
+
+def _recv_exact(sock, size):
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(min(size - len(data), 1 << 20))
+        if not chunk:
+            raise DaemonUnavailable("Connection closed")
+        data.extend(chunk)
+    return bytes(data)
+
+
+def _send(sock, message, array=None):
+    payload = b""
+    if array is not None:
+        array = np.ascontiguousarray(array)
+        message = dict(message, array={"dtype": str(array.dtype), "shape": list(array.shape)})
+        payload = array.tobytes()
+    data = json.dumps(message).encode("utf-8")
+    sock.sendall(struct.pack("!II", len(data), len(payload)) + data + payload)
+
+
+def _recv(sock):
+    json_size, payload_size = struct.unpack("!II", _recv_exact(sock, 8))
+    message = json.loads(_recv_exact(sock, json_size).decode("utf-8"))
+    array = None
+    if "array" in message:
+        spec = message.pop("array")
+        array = np.frombuffer(_recv_exact(sock, payload_size), dtype=spec["dtype"]).reshape(spec["shape"])
+    return message, array
+
+
+# ===== SERVER =====
+
+class _Batcher:
+    """
+    Merges concurrent requests into one model call.
+
+    The first request waits at most BATCH_WINDOW for others to arrive; the
+    combined items are processed together and each request gets its slice.
+    """
+    def __init__(self, process, max_items=BATCH_MAX_ITEMS, window=BATCH_WINDOW):
+        self.process = process
+        self.max_items = max_items
+        self.window = window
+        self.requests = queue.Queue()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def submit(self, items):
+        future = Future()
+        self.requests.put((list(items), future))
+        return future.result()
+
+    def _run(self):
+        while True:
+            batch = [self.requests.get()]
+            count = len(batch[0][0])
+            deadline = time.monotonic() + self.window
+            while count < self.max_items:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self.requests.get(timeout=timeout))
+                except queue.Empty:
+                    break
+                count += len(batch[-1][0])
+
+            items = [item for request_items, _ in batch for item in request_items]
+            try:
+                results = self.process(items) if items else []
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            start = 0
+            for request_items, future in batch:
+                future.set_result(results[start:start + len(request_items)])
+                start += len(request_items)
+
+
+class ModelDaemon:
+    """
+    Keeps the models of one process warm and serves them to every client.
+
+    Requests (one JSON message each, over a Unix domain socket):
+        ping                               → pid, loaded models
+        extract_text(file_type, path, ext) → preview text (same host, supervised worker)
+        keywords(texts)                    → keyword string per text (nlp.pipe, batched)
+        encode(texts)                      → float32 embeddings (batched)
+        query_categories(query)            → target categories of a query
+        shutdown
+
+    keywords and encode requests from all clients are merged into shared
+    batches. Extraction runs one file at a time, since EasyOCR and Whisper
+    are not safe to call concurrently.
+    """
+    def __init__(self, socket_path=SOCKET_PATH, preload=True):
+        import logic
+        from models import models
+
+        self.logic = logic
+        self.models = models
+        self.socket_path = socket_path
+        # This process is the daemon: load models locally and keep them loaded
+        models.use_daemon = False
+        # Clients hash their images before asking; a daemon-wide cache would only grow
+        logic.image_dedup.set_mode("off")
+        models.release_after_use = False
+        if preload:
+            from supervisor import supervisor
+            local_models = PRELOAD_MODELS
+            if supervisor.enabled:
+                # Extraction runs in the supervised worker (see supervisor.py)
+                supervisor.load(*EXTRACTION_MODELS)
+                local_models = [n for n in PRELOAD_MODELS if n not in EXTRACTION_MODELS]
+            for name in local_models:
+                try:
+                    models.get(name)
+                except Exception as e:
+                    print(f"⚠️ Could not preload {name}: {e}")
+
+        self._extract_lock = threading.Lock()
+        self._keywords = _Batcher(self._keywords_for)
+        self._encode = _Batcher(lambda texts: self.models.get("embedder").encode(texts))
+
+    def _keywords_for(self, texts):
+        docs = self.models.get("nlp").pipe(texts, batch_size=64)
+        return [self.logic._keywords_from_doc(doc) if text else "" for text, doc in zip(texts, docs)]
+
+    def handle(self, message):
+        """(reply, array) for one request."""
+        op = message.get("op")
+        args = message.get("args", [])
+        if op == "ping":
+            return {"pid": os.getpid(), "version": PROTOCOL_VERSION,
+                    "models": [n for n in self.models._models]}, None
+        if op == "extract_text":
+            with self._extract_lock:
+                return {"result": self.logic.extract_text(*args)}, None
+        if op == "keywords":
+            return {"result": self._keywords.submit(args[0])}, None
+        if op == "encode":
+            vectors = self._encode.submit(args[0])
+            return {}, np.asarray(vectors, dtype=np.float32)
+        if op == "query_categories":
+            return {"result": self.logic.get_categories_from_query(args[0])}, None
+        raise ValueError(f"Unknown request '{op}'")
+
+    def serve_forever(self):
+        daemon = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                while True:
+                    try:
+                        message, _ = _recv(self.request)
+                    except (DaemonUnavailable, OSError):
+                        return
+                    if message.get("op") == "shutdown":
+                        _send(self.request, {"ok": True})
+                        threading.Thread(target=server.shutdown, daemon=True).start()
+                        return
+                    try:
+                        reply, array = daemon.handle(message)
+                        _send(self.request, dict(reply, ok=True), array)
+                    except Exception as e:
+                        _send(self.request, {"ok": False, "error": f"{type(e).__name__}: {e}"})
+
+        if os.path.exists(self.socket_path):
+            if connect_daemon(self.socket_path) is not None:
+                raise RuntimeError(f"A model daemon is already running on {self.socket_path}")
+            os.remove(self.socket_path)  # left over from a daemon that crashed
+
+        server = socketserver.ThreadingUnixStreamServer(self.socket_path, Handler)
+        server.daemon_threads = True
+        # Only this user may connect
+        os.chmod(self.socket_path, 0o600)
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown, daemon=True).start())
+        print(f"🔥 Model daemon ready on {self.socket_path} (pid {os.getpid()})")
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+
+
+# ===== CLIENT =====
+
+class DaemonClient:
+    """Connection to a running model daemon (thread-safe, one request at a time)."""
+    def __init__(self, sock):
+        self.sock = sock
+        self._lock = threading.Lock()
+
+    def call(self, op, *args):
+        """Send one request; returns (reply, array). Raises DaemonUnavailable if the daemon is gone."""
+        with self._lock:
+            try:
+                _send(self.sock, {"op": op, "args": list(args)})
+                reply, array = _recv(self.sock)
+            except OSError as e:
+                raise DaemonUnavailable(str(e)) from e
+        if not reply.get("ok"):
+            raise RuntimeError(f"Model daemon: {reply.get('error')}")
+        return reply, array
+
+    def extract_text(self, file_type, file_path, ext=None):
+        return self.call("extract_text", file_type, os.path.abspath(file_path), ext)[0]["result"]
+
+    def keywords(self, texts):
+        return self.call("keywords", list(texts))[0]["result"]
+
+    def encode(self, texts):
+        return self.call("encode", list(texts))[1]
+
+    def query_categories(self, user_query):
+        return self.call("query_categories", user_query)[0]["result"]
+
+    def ping(self):
+        return self.call("ping")[0]
+
+    def shutdown(self):
+        self.call("shutdown")
+
+    def close(self):
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+
+def connect_daemon(socket_path=None):
+    """A DaemonClient if a compatible daemon is running, otherwise None."""
+    socket_path = socket_path or SOCKET_PATH
+    if not hasattr(socket, "AF_UNIX") or not os.path.exists(socket_path):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(CONNECT_TIMEOUT)
+    try:
+        sock.connect(socket_path)
+        client = DaemonClient(sock)
+        if client.ping().get("version") != PROTOCOL_VERSION:
+            client.close()
+            return None
+    except (OSError, DaemonUnavailable):
+        sock.close()
+        return None
+    # Requests (OCR, transcription) may take long once connected
+    sock.settimeout(None)
+    return client
+
+
+class RemoteEmbedder:
+    """Embedding backend served by the daemon; falls back to a local model if it goes away."""
+    name = "daemon"
+
+    def __init__(self, manager):
+        self.manager = manager
+
+    def encode(self, texts, batch_size=64):
+        client = self.manager.daemon
+        if client is not None:
+            try:
+                return client.encode(texts)
+            except DaemonUnavailable:
+                self.manager.drop_daemon()
+            except RuntimeError as e:
+                # The request failed inside the daemon: encode it here instead
+                print(f"⚠️ {e} - running encode locally")
+        return self.manager.get("embedder").encode(texts, batch_size=batch_size)
@@ -0,0 +1,235 @@
+import ctypes
+import gc
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from thread_budget import get_thread_budget
+
+# Rough resident size of each model once loaded (MB) - used to decide what to evict first
+MODEL_MEMORY_MB = {
+    "markitdown": 60,
+    "ocr": 450,
+    "nlp": 60,
+    "embedder": 250,
+    "whisper": 300,
+}
+
+# RSS sampling interval while a stage runs (seconds)
+RSS_SAMPLE_INTERVAL = 0.1
+
+
+def current_rss_mb(pid=None):
+    """Resident memory of this process (or of process pid) in MB (None if it cannot be read)."""
+    try:
+        import psutil
+        return psutil.Process(pid).memory_info().rss / 1_000_000
+    except ImportError:
+        pass
+    except psutil.Error:
+        return None
+    try:
+        with open(f"/proc/{pid or 'self'}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1_000_000
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _trim_heap():
+    """Hand freed memory back to the OS (glibc keeps it cached otherwise)."""
+    try:
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+
+# ===== LOADERS =====
+
+def _load_markitdown(manager):
+    from markitdown import MarkItDown
+    return MarkItDown()
+
+
+def _load_ocr(manager):
+    import easyocr
+    return easyocr.Reader(['en'], gpu=False)
+
+
+def _load_nlp(manager):
+    import spacy
+    return spacy.load("en_core_web_sm", disable=["parser", "ner"])
+
+
+def _load_embedder(manager):
+    from embeddings import load_embedding_backend
+    return load_embedding_backend(manager.embedding_backend)
+
+
+def _load_whisper(manager):
+    from faster_whisper import WhisperModel
+    budget = get_thread_budget()
+    return WhisperModel("base", device="cpu", compute_type="int8",
+                        cpu_threads=budget.whisper_cpu_threads,
+                        num_workers=budget.whisper_num_workers)
+
+
+MODEL_LOADERS = {
+    "markitdown": _load_markitdown,
+    "ocr": _load_ocr,
+    "nlp": _load_nlp,
+    "embedder": _load_embedder,
+    "whisper": _load_whisper,
+}
+
+
+class ModelManager:
+    """
+    Loads each model just before it is needed and releases it afterwards.
+
+    With a memory budget, loading a model first evicts the least recently
+    used models that the running stage does not need, so RSS stays under
+    the cap where possible. Each stage records its start, peak and end RSS.
+
+    Args:
+        memory_budget_mb: Cap for resident memory in MB (None = no cap);
+            default $SMART_ORGANIZER_MEMORY_MB
+        release_after_use: Release models when the stages that use them end
+    """
+    def __init__(self, memory_budget_mb=None, release_after_use=True):
+        if memory_budget_mb is None and os.environ.get("SMART_ORGANIZER_MEMORY_MB"):
+            memory_budget_mb = float(os.environ["SMART_ORGANIZER_MEMORY_MB"])
+        self.memory_budget_mb = memory_budget_mb
+        self.release_after_use = release_after_use
+        # Embedding backend: "torch" (SentenceTransformer fp32) or "onnx" (ONNX Runtime int8)
+        self.embedding_backend = os.environ.get("SMART_ORGANIZER_EMBEDDINGS", "torch")
+        # Deterministic stand-ins instead of the real models (fake_backends.py), for load tests
+        self.fake_backends = os.environ.get("SMART_ORGANIZER_FAKE_BACKENDS") == "1"
+        # Use a running model daemon (model_daemon.py) instead of loading models here
+        self.use_daemon = os.environ.get("SMART_ORGANIZER_DAEMON", "1") != "0" and not self.fake_backends
+        self._daemon = None     # None = not checked yet, False = not running
+        self.stages = []        # (stage, start MB, peak MB, end MB, seconds)
+        self._models = {}
+        self._last_used = {}
+        self._pinned = {}       # model -> number of running stages using it
+        self._lock = threading.RLock()
+
+    @property
+    def daemon(self):
+        """Client of the running model daemon, or None if models run in this process."""
+        if not self.use_daemon:
+            return None
+        if self._daemon is None:
+            from model_daemon import connect_daemon
+            self._daemon = connect_daemon() or False
+        return self._daemon or None
+
+    def drop_daemon(self):
+        """Stop using the daemon (it went away) - models load in this process from now on."""
+        if self._daemon:
+            self._daemon.close()
+        self._daemon = False
+
+    def get(self, name):
+        """The model called name, loaded on first use."""
+        if name == "embedder" and name not in self._models and self.daemon is not None:
+            # Embeddings have the same encode() interface remotely
+            from model_daemon import RemoteEmbedder
+            return RemoteEmbedder(self)
+        with self._lock:
+            model = self._models.get(name)
+            if model is None:
+                self._make_room(name)
+                if self.fake_backends:
+                    from fake_backends import FAKE_MODEL_LOADERS
+                    model = FAKE_MODEL_LOADERS[name](self)
+                else:
+                    model = MODEL_LOADERS[name](self)
+                self._models[name] = model
+            self._last_used[name] = time.monotonic()
+            return model
+
+    def is_loaded(self, name):
+        return name in self._models
+
+    def release(self, *names):
+        """Unload models (they are reloaded on next use)."""
+        with self._lock:
+            released = [n for n in names if self._models.pop(n, None) is not None]
+        if released:
+            gc.collect()
+            _trim_heap()
+        return released
+
+    def release_all(self):
+        return self.release(*list(self._models))
+
+    def _make_room(self, name):
+        """Evict unpinned models (least recently used first) until name fits the budget."""
+        if self.memory_budget_mb is None:
+            return
+        needed = MODEL_MEMORY_MB.get(name, 100)
+        for victim in sorted(self._models, key=lambda n: self._last_used.get(n, 0)):
+            rss = current_rss_mb()
+            if rss is None or rss + needed <= self.memory_budget_mb:
+                return
+            if not self._pinned.get(victim):
+                self.release(victim)
+
+    @contextmanager
+    def stage(self, name, uses=(), release=()):
+        """
+        Run a pipeline stage under memory tracking.
+
+        Args:
+            name: Stage label for the report
+            uses: Models the stage needs - never evicted while it runs
+            release: Models to unload when the stage ends (if release_after_use)
+        """
+        with self._lock:
+            for model in uses:
+                self._pinned[model] = self._pinned.get(model, 0) + 1
+
+        start_rss = current_rss_mb() or 0.0
+        peak = [start_rss]
+        done = threading.Event()
+
+        def sample():
+            while not done.wait(RSS_SAMPLE_INTERVAL):
+                peak[0] = max(peak[0], current_rss_mb() or 0.0)
+
+        sampler = threading.Thread(target=sample, daemon=True)
+        sampler.start()
+        started = time.perf_counter()
+        try:
+            yield self
+        finally:
+            done.set()
+            sampler.join()
+            with self._lock:
+                for model in uses:
+                    self._pinned[model] -= 1
+            if self.release_after_use and release:
+                self.release(*release)
+            end_rss = current_rss_mb() or 0.0
+            self.stages.append((name, start_rss, max(peak[0], end_rss), end_rss, time.perf_counter() - started))
+
+    def reset_stats(self):
+        self.stages = []
+        if self._daemon is False:
+            # Look for a daemon started since the last run
+            self._daemon = None
+
+    def report(self):
+        """Start/peak/end RSS per stage and the overall peak."""
+        cap = f" (budget {self.memory_budget_mb:.0f} MB)" if self.memory_budget_mb else ""
+        lines = [f"🧠 Memory per stage{cap}:"]
+        for name, start, peak, end, seconds in self.stages:
+            lines.append(f"   • {name}: {start:.0f} → peak {peak:.0f} → {end:.0f} MB ({seconds:.1f}s)")
+        if self.stages:
+            lines.append(f"   Peak RSS: {max(s[2] for s in self.stages):.0f} MB, "
+                         f"loaded now: {', '.join(self._models) or 'none'}")
+        return "\n".join(lines)
+
+
+models = ModelManager()
@@ -0,0 +1,171 @@
+import numpy as np
+import pandas as pd
+
+# Words per shingle
+SHINGLE_WORDS = 5
+# MinHash signature length = BANDS × ROWS_PER_BAND
+BANDS = 16
+ROWS_PER_BAND = 8
+# Estimated Jaccard similarity at which two previews count as near-duplicates.
+# LSH with 16 bands × 8 rows makes pairs above ~0.7 candidates, so 0.8 is
+# found with high probability.
+JACCARD_THRESHOLD = 0.8
+# Previews with fewer shingles carry too little text to compare by MinHash;
+# they are only grouped with identical previews
+MIN_SHINGLES = 10
+# Shingle rows hashed per block (bounds the block × permutations matrix)
+BLOCK_SHINGLES = 16384
+SEED = 20240521
+
+_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+
+
+def _permutations(count):
+    """Odd multipliers and offsets of count multiply-shift hash functions (fixed seed)."""
+    rng = np.random.default_rng(SEED)
+    a = rng.integers(1, 2 ** 63, size=count, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+    b = rng.integers(0, 2 ** 63, size=count, dtype=np.uint64)
+    return a, b
+
+
+def _shingles(texts):
+    """
+    Word-shingle hashes of all texts, concatenated.
+
+    Returns:
+        (hashes, counts): uint64 shingle hashes in text order and the
+        number of shingles per text
+    """
+    word_lists = [text.lower().split() for text in texts]
+    word_counts = np.array([len(words) for words in word_lists], dtype=np.int64)
+    words = np.array([w for words in word_lists for w in words], dtype=object)
+    if not len(words):
+        return np.zeros(0, dtype=np.uint64), np.zeros(len(texts), dtype=np.int64)
+
+    # Stable 64-bit hash per word, then a rolling combination over each window
+    word_hashes = pd.util.hash_array(words)
+    windows = len(words) - SHINGLE_WORDS + 1
+    if windows <= 0:
+        return np.zeros(0, dtype=np.uint64), np.zeros(len(texts), dtype=np.int64)
+    hashes = np.zeros(windows, dtype=np.uint64)
+    for offset in range(SHINGLE_WORDS):
+        hashes = hashes * _MULTIPLIER + word_hashes[offset:offset + windows]
+
+    # Keep windows that lie inside one text
+    text_of_word = np.repeat(np.arange(len(texts)), word_counts)[:windows]
+    starts = np.cumsum(word_counts) - word_counts
+    position = np.arange(windows) - starts[text_of_word]
+    keep = position + SHINGLE_WORDS <= word_counts[text_of_word]
+    return hashes[keep], np.maximum(word_counts - SHINGLE_WORDS + 1, 0)
+
+
+def minhash_signatures(texts):
+    """
+    MinHash signature of each text (BANDS × ROWS_PER_BAND uint64 values).
+
+    Texts with fewer than MIN_SHINGLES shingles get an all-max row, which
+    never collides with a real signature.
+    """
+    a, b = _permutations(BANDS * ROWS_PER_BAND)
+    hashes, counts = _shingles(texts)
+    signatures = np.full((len(texts), len(a)), np.iinfo(np.uint64).max, dtype=np.uint64)
+    usable = np.flatnonzero(counts >= MIN_SHINGLES)
+    if not len(usable):
+        return signatures
+
+    # Shingles of the usable texts only, still grouped by text
+    hashes = hashes[np.repeat(counts >= MIN_SHINGLES, counts)]
+    counts = counts[usable]
+    offsets = np.concatenate(([0], np.cumsum(counts)))
+
+    # Blocks of whole texts, so each block is reduced with one reduceat
+    block_start = 0
+    while block_start < len(usable):
+        block_end = int(np.searchsorted(offsets, offsets[block_start] + BLOCK_SHINGLES, side="right")) - 1
+        block_end = min(max(block_end, block_start + 1), len(usable))
+        rows = hashes[offsets[block_start]:offsets[block_end]]
+        # Multiply-shift hashing: the high bits of a*x + b are a good permutation
+        hashed = (rows[:, None] * a + b) >> np.uint64(32)
+        signatures[usable[block_start:block_end]] = np.minimum.reduceat(
+            hashed, offsets[block_start:block_end] - offsets[block_start], axis=0)
+        block_start = block_end
+    return signatures
+
+
+def find_near_duplicates(texts, threshold=JACCARD_THRESHOLD):
+    """
+    Group texts that are near-duplicates of each other (MinHash + LSH).
+
+    Candidate pairs are texts whose signatures agree on all rows of at
+    least one band; a pair is accepted if its estimated Jaccard
+    similarity (share of equal signature values) reaches threshold.
+    Texts too short for a signature (fewer than MIN_SHINGLES shingles)
+    are grouped only with texts that have the same words.
+
+    Args:
+        texts: Preview texts
+        threshold: Minimum estimated Jaccard similarity of word shingles
+
+    Returns:
+        Array with the index of each text's representative - the first
+        text of its cluster, or the text itself if it has no near-duplicate
+    """
+    count = len(texts)
+    representatives = np.arange(count)
+    if count < 2:
+        return representatives
+    signatures = minhash_signatures(texts)
+    short = np.flatnonzero(signatures[:, 0] == np.iinfo(np.uint64).max)
+    if len(short) > 1:
+        # Exact pass: same words (case and spacing aside) → first such text
+        normalized = pd.Series([" ".join(texts[i].lower().split()) for i in short], dtype=object)
+        codes, _ = pd.factorize(normalized)
+        first = np.full(codes.max() + 1, -1, dtype=np.int64)
+        first[codes[::-1]] = short[::-1]
+        nonempty = (normalized != "").to_numpy()
+        representatives[short[nonempty]] = first[codes[nonempty]]
+
+    usable = np.flatnonzero(signatures[:, 0] != np.iinfo(np.uint64).max)
+    if len(usable) < 2:
+        return representatives
+
+    # One key per (text, band): the band's rows combined into one hash
+    bands = signatures[usable].reshape(len(usable), BANDS, ROWS_PER_BAND)
+    keys = np.zeros((len(usable), BANDS), dtype=np.uint64)
+    for row in range(ROWS_PER_BAND):
+        keys = keys * _MULTIPLIER + bands[:, :, row]
+
+    # Within each band, pair every text with the first text that has the same key
+    band_ids = np.tile(np.arange(BANDS), len(usable))
+    text_ids = np.repeat(usable, BANDS)
+    flat_keys = keys.ravel()
+    order = np.lexsort((text_ids, flat_keys, band_ids))
+    sorted_keys, sorted_bands, sorted_texts = flat_keys[order], band_ids[order], text_ids[order]
+    new_group = np.ones(len(order), dtype=bool)
+    new_group[1:] = (sorted_keys[1:] != sorted_keys[:-1]) | (sorted_bands[1:] != sorted_bands[:-1])
+    group_first = sorted_texts[np.maximum.accumulate(np.where(new_group, np.arange(len(order)), 0))]
+    pairs = np.unique(np.stack([group_first, sorted_texts], axis=1)[~new_group], axis=0)
+    if not len(pairs):
+        return representatives
+
+    similarity = (signatures[pairs[:, 0]] == signatures[pairs[:, 1]]).mean(axis=1)
+    accepted = pairs[similarity >= threshold]
+
+    # Union-find over the accepted pairs; the smallest index represents its cluster
+    parent = {}
+
+    def find(i):
+        root = i
+        while parent.get(root, root) != root:
+            root = parent[root]
+        while parent.get(i, i) != root:
+            parent[i], i = root, parent[i]
+        return root
+
+    for first, second in accepted.tolist():
+        root_a, root_b = find(first), find(second)
+        if root_a != root_b:
+            parent[max(root_a, root_b)] = min(root_a, root_b)
+    for i in parent:
+        representatives[i] = find(i)
+    return representatives
@@ -0,0 +1,199 @@
+import os
+import threading
+import time
+
+from PIL import Image
+
+from archives import MAX_ARCHIVE_BYTES
+from extractors import TEXT_EXTENSIONS, TEXT_SAMPLE_BYTES
+from media_probe import MEDIA_CUTOFF_SEC, media_probe
+
+# Rough bytes per "page" so document cost scales with size instead of file count
+BYTES_PER_PAGE = {
+    ".pdf": 60_000,
+    ".docx": 15_000,
+    ".doc": 25_000,
+    ".pptx": 120_000,
+    ".xlsx": 20_000,
+}
+# Plain-text formats (see extractors.TEXT_EXTENSIONS)
+TEXT_BYTES_PER_PAGE = 3_000
+
+# Typical bytes per second of media, used to guess duration when it cannot be probed
+MEDIA_BYTES_PER_SEC = {
+    ".mp3": 16_000,
+    ".m4a": 16_000,
+    ".aac": 16_000,
+    ".flac": 90_000,
+    ".wav": 176_000,
+    ".mp4": 500_000,
+    ".mov": 800_000,
+    ".mkv": 500_000,
+    ".avi": 600_000,
+    ".webm": 300_000,
+}
+
+# Starting guesses (seconds per work unit) - replaced by measured rates as the run goes
+PRIOR_SECONDS_PER_UNIT = {
+    "Documents": 0.05,   # per page
+    "Images": 0.8,       # per megapixel
+    "Audio": 0.3,        # per second of audio
+    "Video": 0.35,       # per second of audio track
+    "Archives": 0.05,    # per MB of uncompressed data read
+    "Others": 0.002,     # per file (extension lookup only)
+    "Copy": 0.02,        # per MB copied
+}
+
+# Weight of the newest observation in the moving average
+RATE_SMOOTHING = 0.3
+
+
+def estimate_work_units(file_path, category, size=None, ext=None, stat=os.stat):
+    """
+    Estimate how much work analyzing one file will take.
+
+    Documents, code and other plain text are measured in pages, images in
+    megapixels, audio/video in seconds (probed duration, capped at the
+    transcription cutoff)
+    and archives in megabytes (capped at the archive byte budget).
+    Everything else is one unit.
+
+    Args:
+        file_path: Path to the file
+        category: Extension-based category from scan_folder
+        size: File size in bytes if already known
+        ext: Real type if it differs from the extension (sniffed content)
+        stat: os.stat or a cached equivalent, used to look up media probes
+
+    Returns:
+        (modality, units) tuple
+    """
+    ext = ext or os.path.splitext(file_path)[1].lower()
+    if size is None:
+        try:
+            size = os.path.getsize(file_path)
+        except OSError:
+            size = 0
+
+    if category in ("Documents", "Code") or ext in TEXT_EXTENSIONS:
+        if ext in TEXT_EXTENSIONS:
+            # Plain text is sampled within a fixed byte budget
+            size = min(size, TEXT_SAMPLE_BYTES)
+        pages = size / BYTES_PER_PAGE.get(ext, TEXT_BYTES_PER_PAGE if ext in TEXT_EXTENSIONS else 20_000)
+        return "Documents", max(pages, 1.0)
+
+    if category == "Images":
+        try:
+            # Image.open only parses the header, pixels are not decoded
+            with Image.open(file_path) as img:
+                width, height = img.size
+            return "Images", max(width * height / 1_000_000, 0.1)
+        except Exception:
+            return "Images", max(size / 300_000, 0.1)
+
+    if category in ("Audio", "Video"):
+        # The probe is cached, and extraction needs it for this file anyway
+        info = media_probe.probe(file_path, stat=stat)
+        if info is not None and info["duration"] is not None:
+            seconds = info["duration"]
+        else:
+            seconds = size / MEDIA_BYTES_PER_SEC.get(ext, 200_000)
+        return category, min(max(seconds, 1.0), MEDIA_CUTOFF_SEC)
+
+    if category == "Archives":
+        # Reading stops at the archive byte budget
+        return "Archives", max(min(size, MAX_ARCHIVE_BYTES) / 1_000_000, 0.1)
+
+    return "Others", 1.0
+
+
+class ProgressTracker:
+    """
+    Determinate progress model for a run.
+
+    Every pending item is weighted by its modality and size. Throughput per
+    modality is learned from finished items, so the ETA converges on the
+    real speed of this machine as the run goes on. Thread-safe: workers call
+    start/finish while the UI polls snapshot().
+
+    Args:
+        include_copy: If True, scan_folder also plans the copy work of the
+            organize phase so the bar covers the whole run
+    """
+    def __init__(self, include_copy=False):
+        self.include_copy = include_copy
+        self._lock = threading.Lock()
+        self._pending = {}          # key -> (modality, units)
+        self._started = {}          # key -> start time
+        self._pending_units = {}    # modality -> units still to do
+        self._done_units = {}       # modality -> units finished
+        self._done_count = 0
+        self._rates = dict(PRIOR_SECONDS_PER_UNIT)
+        self._start_time = time.time()
+        self.stage = ""
+
+    def plan(self, key, modality, units):
+        """Register an item of work. Planning the same key twice is a no-op."""
+        with self._lock:
+            if key in self._pending:
+                return
+            self._pending[key] = (modality, units)
+            self._pending_units[modality] = self._pending_units.get(modality, 0.0) + units
+
+    def set_stage(self, stage):
+        """Set the label of the stage that is currently running."""
+        with self._lock:
+            self.stage = stage
+
+    def start(self, key):
+        """Mark an item as started (used to time it)."""
+        with self._lock:
+            self._started[key] = time.time()
+
+    def finish(self, key):
+        """Mark an item as finished and update the learned rate for its modality."""
+        with self._lock:
+            item = self._pending.pop(key, None)
+            if item is None:
+                return
+            modality, units = item
+            self._pending_units[modality] -= units
+            self._done_units[modality] = self._done_units.get(modality, 0.0) + units
+            self._done_count += 1
+
+            started = self._started.pop(key, None)
+            if started is not None and units > 0:
+                observed = (time.time() - started) / units
+                previous = self._rates.get(modality, observed)
+                self._rates[modality] = (1 - RATE_SMOOTHING) * previous + RATE_SMOOTHING * observed
+
+    def _cost(self, units_by_modality):
+        return sum(units * self._rates.get(modality, 0.0) for modality, units in units_by_modality.items())
+
+    def snapshot(self):
+        """
+        Current progress figures.
+
+        Returns:
+            Dict with fraction (0-1), eta_seconds, elapsed_seconds,
+            items_per_sec, done, total and stage
+        """
+        with self._lock:
+            elapsed = time.time() - self._start_time
+            remaining = self._cost(self._pending_units)
+            finished = self._cost(self._done_units)
+            done = self._done_count
+            total = done + len(self._pending)
+            stage = self.stage
+
+        total_cost = remaining + finished
+        fraction = finished / total_cost if total_cost > 0 else 0.0
+        return {
+            "fraction": fraction,
+            "eta_seconds": remaining,
+            "elapsed_seconds": elapsed,
+            "items_per_sec": done / elapsed if elapsed > 0 else 0.0,
+            "done": done,
+            "total": total,
+            "stage": stage,
+        }
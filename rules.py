@@ -0,0 +1,252 @@
+import fnmatch
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+from storage import app_data_path
+
+# Rule file read by every run; override with $SMART_ORGANIZER_RULES or 'cli.py --rules'
+RULES_PATH = os.environ.get("SMART_ORGANIZER_RULES") or app_data_path("rules.json")
+
+SIZE_UNITS = {"": 1, "B": 1, "KB": 1_000, "MB": 1_000_000, "GB": 1_000_000_000, "TB": 1_000_000_000_000}
+_SIZE = re.compile(r"^\s*([0-9]*\.?[0-9]+)\s*([KMGT]?B?)\s*$", re.IGNORECASE)
+DAY_SECONDS = 86_400
+
+# Keys a rule may have (anything else is reported as a typo)
+RULE_KEYS = {"name", "category", "path", "filename", "glob", "extensions", "ignore_case",
+             "min_size", "max_size", "modified_after", "modified_before", "older_than_days", "newer_than_days"}
+
+
+def parse_size(value):
+    """Bytes from a number or a string like "10MB" or "1.5 GB" (decimal units)."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = _SIZE.match(str(value))
+    if not match:
+        raise ValueError(f"invalid size '{value}' (e.g. 500KB, 10MB, 1.5GB)")
+    number, unit = match.groups()
+    unit = unit.upper()
+    return float(number) * SIZE_UNITS[unit if unit.endswith("B") or not unit else unit + "B"]
+
+
+def parse_date(value):
+    """Local timestamp of an ISO date ("2023-01-31" or "2023-01-31T12:00")."""
+    try:
+        return datetime.fromisoformat(str(value)).timestamp()
+    except ValueError:
+        raise ValueError(f"invalid date '{value}' (e.g. 2023-01-31)") from None
+
+
+class Rule:
+    """
+    One compiled rule: every condition it has must hold.
+
+    Args:
+        spec: Dict from the rule file
+        position: Position in the file (names unnamed rules)
+    """
+    def __init__(self, spec, position):
+        unknown = set(spec) - RULE_KEYS
+        if unknown:
+            raise ValueError(f"rule {position}: unknown key(s) {', '.join(sorted(unknown))}")
+        self.name = spec.get("name") or f"rule {position}"
+        self.category = spec.get("category", "")
+        if (not isinstance(self.category, str) or not self.category.strip() or self.category in (".", "..")
+                or "/" in self.category or "\\" in self.category):
+            raise ValueError(f"{self.name}: 'category' must be a folder name")
+        flags = re.IGNORECASE if spec.get("ignore_case") else 0
+        try:
+            # Folder separators are matched as "/" on every platform
+            self.path = re.compile(spec["path"], flags) if spec.get("path") else None
+            self.filename = re.compile(spec["filename"], flags) if spec.get("filename") else None
+            # Globs match the whole name, case-insensitively
+            self.glob = (re.compile("^" + fnmatch.translate(spec["glob"]), re.IGNORECASE)
+                         if spec.get("glob") else None)
+        except re.error as e:
+            raise ValueError(f"{self.name}: invalid pattern ({e})") from None
+        extensions = spec.get("extensions", [])
+        if isinstance(extensions, str):
+            extensions = [extensions]
+        self.extensions = {e.lower() if e.startswith(".") else "." + e.lower() for e in extensions} or None
+        self.min_size = parse_size(spec["min_size"]) if "min_size" in spec else None
+        self.max_size = parse_size(spec["max_size"]) if "max_size" in spec else None
+        self.modified_after = parse_date(spec["modified_after"]) if "modified_after" in spec else None
+        self.modified_before = parse_date(spec["modified_before"]) if "modified_before" in spec else None
+        self.older_than_days = spec.get("older_than_days")
+        self.newer_than_days = spec.get("newer_than_days")
+        if not (self.path or self.filename or self.glob or self.extensions or self.uses_stat):
+            raise ValueError(f"{self.name}: no condition (it would take every file)")
+
+    @property
+    def uses_stat(self):
+        return any(v is not None for v in (self.min_size, self.max_size, self.modified_after,
+                                           self.modified_before, self.older_than_days, self.newer_than_days))
+
+    def stat_mask(self, sizes, mtimes, now):
+        """Size and date conditions over whole arrays (files that could not be stat'ed never match)."""
+        mask = ~np.isnan(sizes)
+        if self.min_size is not None:
+            mask &= sizes >= self.min_size
+        if self.max_size is not None:
+            mask &= sizes <= self.max_size
+        if self.modified_after is not None:
+            mask &= mtimes >= self.modified_after
+        if self.modified_before is not None:
+            mask &= mtimes < self.modified_before
+        if self.older_than_days is not None:
+            mask &= mtimes <= now - self.older_than_days * DAY_SECONDS
+        if self.newer_than_days is not None:
+            mask &= mtimes >= now - self.newer_than_days * DAY_SECONDS
+        return mask
+
+
+def _combined(patterns):
+    """One regex matching wherever any of the patterns matches (None if it cannot be built)."""
+    try:
+        return re.compile("|".join(
+            f"(?i:{p.pattern})" if p.flags & re.IGNORECASE else f"(?:{p.pattern})" for p in patterns))
+    except re.error:
+        return None  # e.g. the same group name in two rules
+
+
+def _search_all(regex, strings):
+    return np.fromiter((regex.search(s) is not None for s in strings), dtype=bool, count=len(strings))
+
+
+class RuleSet:
+    """
+    Ordered user rules that decide a file's category before any model runs.
+
+    The rule file is a JSON object with a "rules" list; the first rule
+    whose conditions all hold decides. Files decided by a rule are never
+    extracted or embedded. Each path and filename is searched once with
+    a combined regex of all rules, so per-rule patterns only run on the
+    few files that can match; size and date conditions are compared as
+    arrays over all files at once.
+
+    The file is re-read when it changes, so edits apply to the next run.
+
+    Args:
+        path: Rule file (default: rules.json in the app data folder)
+    """
+    def __init__(self, path=RULES_PATH):
+        self.path = path
+        self.rules = []
+        self._mtime = None
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def load(self, path=None):
+        """Read and compile the rule file (raises ValueError if it is invalid)."""
+        with self._lock:
+            self.path = path or self.path
+            self._mtime = None
+            self._refresh()
+        return self.rules
+
+    def _refresh(self):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            self.rules, self._mtime = [], None
+            return
+        if mtime == self._mtime:
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                specs = json.load(f).get("rules", [])
+        except (OSError, ValueError, AttributeError) as e:
+            raise ValueError(f"cannot read {self.path}: {e}") from None
+        self.rules = [Rule(spec, position) for position, spec in enumerate(specs, start=1)]
+        self._mtime = mtime
+        self.hits = np.zeros(len(self.rules), dtype=np.int64)
+
+    def match(self, file_paths, exts=None, stat=os.stat):
+        """
+        Category of the first matching rule for every file.
+
+        Args:
+            file_paths: Paths to classify
+            exts: Real extension per file (see logic.detect_extensions);
+                default: the extension of the name
+            stat: os.stat-like callable (e.g. a metadata cache)
+
+        Returns:
+            List with the rule's category per file, None where no rule matches
+        """
+        with self._lock:
+            self._refresh()
+            rules = self.rules
+        if not rules or not len(file_paths):
+            return [None] * len(file_paths)
+        count = len(file_paths)
+        paths = [p.replace(os.sep, "/") for p in file_paths] if os.sep != "/" else list(file_paths)
+        filenames = [p.rpartition("/")[2] for p in paths]
+        exts = np.array([e.lower() for e in exts] if exts is not None else
+                        [os.path.splitext(name)[1].lower() for name in filenames], dtype=object)
+
+        sizes = mtimes = None
+        if any(rule.uses_stat for rule in rules):
+            sizes = np.full(count, np.nan)
+            mtimes = np.full(count, np.nan)
+            for i, file_path in enumerate(file_paths):
+                try:
+                    st = stat(file_path)
+                except OSError:
+                    continue
+                sizes[i], mtimes[i] = st.st_size, st.st_mtime
+
+        # One pass per field over all files: which files can any pattern match at all
+        fields = (("path", paths), ("filename", filenames), ("glob", filenames))
+        possible = {}
+        for field, strings in fields:
+            patterns = [getattr(rule, field) for rule in rules if getattr(rule, field) is not None]
+            combined = _combined(patterns) if len(patterns) > 1 else None
+            possible[field] = _search_all(combined, strings) if combined else np.ones(count, dtype=bool)
+
+        decided = np.full(count, -1, dtype=np.int64)
+        now = time.time()
+        for index, rule in enumerate(rules):
+            mask = decided < 0
+            if not mask.any():
+                break
+            if rule.extensions is not None:
+                mask &= np.isin(exts, list(rule.extensions))
+            if rule.uses_stat:
+                mask &= rule.stat_mask(sizes, mtimes, now)
+            # Patterns last, on the files every cheaper condition left
+            for field, strings in fields:
+                regex = getattr(rule, field)
+                if regex is not None:
+                    mask &= possible[field]
+                    candidates = np.flatnonzero(mask)
+                    mask[candidates] = _search_all(regex, [strings[i] for i in candidates])
+            decided[mask] = index
+
+        counts = np.bincount(decided[decided >= 0], minlength=len(rules))
+        with self._lock:
+            if len(self.hits) == len(counts):
+                self.hits += counts
+        return [rules[i].category if i >= 0 else None for i in decided.tolist()]
+
+    # ===== REPORTING =====
+
+    def reset_stats(self):
+        self.hits = np.zeros(len(self.rules), dtype=np.int64)
+
+    def report(self):
+        """Files decided by each rule in this run ("" if there are no rules)."""
+        if not self.rules:
+            return ""
+        lines = [f"📏 Rules decided {int(self.hits.sum())} files (no extraction or embedding):"]
+        lines.extend(f"   • {rule.name} → {rule.category}: {hits}" for rule, hits in zip(self.rules, self.hits.tolist()))
+        return "\n".join(lines)
+
+
+# Shared by all stages of a run (reset by logic.reset_run_stats)
+rules = RuleSet()
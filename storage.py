@@ -0,0 +1,14 @@
+import os
+
+# Local state (search index, caches, ...) lives here; override with SMART_ORGANIZER_HOME
+APP_DATA_DIR = os.environ.get(
+    "SMART_ORGANIZER_HOME",
+    os.path.join(os.path.expanduser("~"), ".smart_file_organizer")
+)
+
+
+def app_data_path(*parts):
+    """Path inside the app data folder (parent folders are created)."""
+    path = os.path.join(APP_DATA_DIR, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
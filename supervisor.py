@@ -0,0 +1,345 @@
+import json
+import multiprocessing
+import os
+import threading
+import time
+
+from extractor_registry import registry
+from metadata import stat_cache
+from models import current_rss_mb
+from storage import app_data_path
+from thread_budget import get_thread_budget
+
+# (wall-clock seconds, worker RSS growth in MB) allowed per file, by modality.
+# Both are measured from when the file's models are loaded: the clock starts
+# after loading, and RSS is compared with the worker's size at that point.
+EXTRACTION_LIMITS = {
+    "Documents": (60, 2000),
+    "Images": (90, 3000),
+    "Audio": (300, 3000),
+    "Video": (300, 3000),
+    "Archives": (60, 1500),
+}
+DEFAULT_LIMITS = (60, 2000)
+
+# How long a new worker may take to start (importing the pipeline)
+STARTUP_TIMEOUT = 120
+# How long a worker may take to load the models of a file (a first download included)
+MODEL_LOAD_TIMEOUT = 900
+# Interval between checks of a running extraction
+POLL_INTERVAL = 0.2
+
+QUARANTINE_PATH = app_data_path("quarantine.json")
+
+
+# ===== QUARANTINE =====
+
+class Quarantine:
+    """
+    Files that hung, crashed or exhausted memory during extraction.
+
+    Later runs skip them (they keep their extension category). An entry
+    is only valid while the file's size and mtime are unchanged, so a
+    replaced or repaired file is tried again.
+
+    Args:
+        path: JSON file (default: quarantine.json in the app data folder)
+    """
+    def __init__(self, path=QUARANTINE_PATH):
+        self.path = path
+        self._entries = None
+        self._lock = threading.Lock()
+        self.skipped = 0
+
+    def _read(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write(self, entries):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entries, f, indent=1)
+        os.replace(tmp_path, self.path)
+
+    def reload(self):
+        """Re-read the list (other processes may have added files) and reset the skip count."""
+        with self._lock:
+            self._entries = None
+            self.skipped = 0
+
+    def _loaded(self):
+        if self._entries is None:
+            self._entries = self._read()
+        return self._entries
+
+    def contains(self, file_path):
+        """True if the file is quarantined and unchanged since (counted as skipped)."""
+        file_path = os.path.abspath(file_path)
+        with self._lock:
+            entry = self._loaded().get(file_path)
+        if entry is None:
+            return False
+        try:
+            st = stat_cache.stat(file_path)
+        except OSError:
+            return False
+        if (st.st_size, st.st_mtime_ns) != (entry["size"], entry["mtime_ns"]):
+            return False
+        with self._lock:
+            self.skipped += 1
+        return True
+
+    def add(self, file_path, category, reason):
+        """Record a file that could not be extracted."""
+        file_path = os.path.abspath(file_path)
+        try:
+            st = stat_cache.stat(file_path)
+        except OSError:
+            return
+        with self._lock:
+            # Merge with entries other processes wrote since we loaded
+            entries = self._read()
+            entries[file_path] = {
+                "size": st.st_size,
+                "mtime_ns": st.st_mtime_ns,
+                "category": category,
+                "reason": reason,
+                "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+            }
+            self._write(entries)
+            self._entries = entries
+
+    def entries(self):
+        """{path: entry} of all quarantined files."""
+        with self._lock:
+            return dict(self._loaded())
+
+    def clear(self, file_paths=None):
+        """Remove the given files (all if None) from the quarantine; returns how many were removed."""
+        with self._lock:
+            entries = self._read()
+            if file_paths is None:
+                removed = len(entries)
+                entries = {}
+            else:
+                keys = {os.path.abspath(p) for p in file_paths}
+                removed = len(keys & entries.keys())
+                entries = {p: e for p, e in entries.items() if p not in keys}
+            self._write(entries)
+            self._entries = entries
+        return removed
+
+
+# ===== WORKER =====
+
+def _worker_main(conn, cores, workers):
+    """Extraction loop of the worker process: one request at a time over the pipe."""
+    import logic
+    from thread_budget import configure_thread_budget
+    from throttle import background_mode, lower_priority
+
+    if background_mode():
+        lower_priority()
+    configure_thread_budget(cores, workers)
+    # The worker is the isolation boundary - never hand extraction on to the daemon
+    logic.models.use_daemon = False
+    conn.send("ready")
+    while True:
+        try:
+            op, *args = conn.recv()
+        except (EOFError, OSError):
+            return
+        if op == "extract":
+            conn.send(logic._extract_text_local(*args))
+        elif op == "load":
+            for name in args[0]:
+                try:
+                    logic.models.get(name)
+                except Exception:
+                    pass  # the extractor reports it for the file
+            conn.send("loaded")
+        elif op == "release":
+            logic.models.release(*args[0])
+        elif op == "stop":
+            return
+
+
+class ExtractionSupervisor:
+    """
+    Runs extract_text in a separate worker process and watches it.
+
+    A file that runs past its modality's time limit, pushes the worker
+    over its memory limit or crashes it (segfault in a native decoder)
+    gets the worker killed; the file is quarantined and yields no preview.
+    The next file starts a fresh worker. Models stay loaded in the worker
+    between files, so isolation costs one pipe round-trip per file.
+
+    A file's models (as its extractor declares) are loaded before its
+    limits apply: loading Whisper or EasyOCR does not count against the
+    first file that needs them, and neither do models resident for other
+    modalities.
+
+    Set SMART_ORGANIZER_ISOLATE=0 to extract in-process instead.
+
+    Args:
+        quarantine: Quarantine that offending files are added to
+        limits: {modality: (seconds, MB)} overriding EXTRACTION_LIMITS
+    """
+    def __init__(self, quarantine, limits=None):
+        self.quarantine = quarantine
+        self.limits = dict(EXTRACTION_LIMITS, **(limits or {}))
+        self.enabled = os.environ.get("SMART_ORGANIZER_ISOLATE", "1") != "0"
+        self.events = []        # (path, category, reason) of this run
+        self.start_failed = False
+        self._process = None
+        self._conn = None
+        self._loaded = set()    # models loaded in the current worker
+        self._lock = threading.Lock()
+
+    # ----- worker lifecycle -----
+
+    def _start(self):
+        budget = get_thread_budget()
+        context = multiprocessing.get_context("spawn")
+        parent_conn, child_conn = context.Pipe()
+        process = context.Process(target=_worker_main, args=(child_conn, budget.cores, budget.workers), daemon=True)
+        process.start()
+        child_conn.close()
+        try:
+            ready = parent_conn.poll(STARTUP_TIMEOUT) and parent_conn.recv() == "ready"
+        except (EOFError, OSError):
+            ready = False
+        if not ready:
+            process.kill()
+            raise RuntimeError("Extraction worker did not start")
+        self._process, self._conn = process, parent_conn
+
+    def _kill(self):
+        if self._process is not None:
+            self._process.kill()
+            self._process.join(5)
+            self._conn.close()
+        self._process = self._conn = None
+        self._loaded = set()
+
+    def _alive(self):
+        return self._process is not None and self._process.is_alive()
+
+    def stop(self):
+        """Stop the worker (it is restarted on the next file)."""
+        with self._lock:
+            if self._alive():
+                try:
+                    self._conn.send(("stop",))
+                    self._process.join(5)
+                except OSError:
+                    pass
+            self._kill()
+
+    def _load(self, names):
+        """Load models in the running worker and wait for it (False if it died or hung)."""
+        self._conn.send(("load", list(names)))
+        try:
+            loaded = self._conn.poll(MODEL_LOAD_TIMEOUT) and self._conn.recv() == "loaded"
+        except (EOFError, OSError):
+            loaded = False
+        if loaded:
+            self._loaded.update(names)
+        return loaded
+
+    def load(self, *names):
+        """Load models in the worker ahead of the first file (starts it)."""
+        with self._lock:
+            if not self._alive():
+                self._start()
+            if not self._load(names):
+                self._kill()
+                raise RuntimeError(f"Extraction worker could not load {', '.join(names)}")
+
+    def release(self, *names):
+        """Unload models in the worker, if it is running."""
+        with self._lock:
+            if names and self._alive():
+                self._conn.send(("release", list(names)))
+                self._loaded.difference_update(names)
+
+    # ----- extraction -----
+
+    def extract(self, file_type, file_path, ext=None):
+        """
+        Preview text of one file, extracted in the worker.
+
+        Returns:
+            The text, "" if the file broke a limit (it is then quarantined),
+            or None if no worker can be started or load the file's models
+            (the file is then extracted in-process; without a worker,
+            isolation is turned off)
+        """
+        timeout, memory_mb = self.limits.get(file_type, DEFAULT_LIMITS)
+        extractor = registry.find(ext)
+        with self._lock:
+            if not self._alive():
+                self._kill()
+                try:
+                    self._start()
+                except RuntimeError:
+                    self.enabled = False
+                    self.start_failed = True
+                    return None
+            needed = [name for name in (extractor.models if extractor else ()) if name not in self._loaded]
+            # Not the file's fault: a worker that cannot load its models is not a reason to quarantine it
+            if needed and not self._load(needed):
+                self._kill()
+                return None
+            baseline_mb = current_rss_mb(self._process.pid) or 0
+            self._conn.send(("extract", file_type, os.path.abspath(file_path), ext))
+            deadline = time.monotonic() + timeout
+            while True:
+                if self._conn.poll(POLL_INTERVAL):
+                    try:
+                        return self._conn.recv()
+                    except (EOFError, OSError):
+                        reason = "worker crashed"
+                        break
+                if not self._process.is_alive():
+                    reason = f"worker crashed (exit code {self._process.exitcode})"
+                    break
+                if time.monotonic() > deadline:
+                    reason = f"timed out after {timeout}s"
+                    break
+                rss = current_rss_mb(self._process.pid)
+                if rss is not None and rss - baseline_mb > memory_mb:
+                    reason = f"grew by {rss - baseline_mb:.0f} MB (limit {memory_mb} MB)"
+                    break
+            self._kill()
+            self.events.append((file_path, file_type, reason))
+        self.quarantine.add(file_path, file_type, reason)
+        return ""
+
+    # ----- reporting -----
+
+    def reset_stats(self):
+        self.events = []
+        self.quarantine.reload()
+
+    def report(self):
+        """Summary of quarantined and skipped files of this run ("" if none)."""
+        lines = []
+        if self.start_failed:
+            lines.append("⚠️ Extraction worker could not start - files were extracted in-process, without limits")
+        if self.events:
+            lines.append(f"🚧 Quarantined {len(self.events)} file(s) this run:")
+            lines.extend(f"   {os.path.basename(path)} ({category}): {reason}"
+                         for path, category, reason in self.events)
+        if self.quarantine.skipped:
+            lines.append(f"🚧 Skipped {self.quarantine.skipped} quarantined file(s) "
+                         f"(see 'cli.py quarantine list')")
+        return "\n".join(lines)
+
+
+quarantine = Quarantine()
+# Shared by all stages of a run (reset by logic.reset_run_stats)
+supervisor = ExtractionSupervisor(quarantine)
@@ -0,0 +1,139 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Env vars read by BLAS/OpenMP runtimes (spaCy's blis, numpy, onnxruntime, child processes)
+THREAD_ENV_VARS = ["OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS", "BLIS_NUM_THREADS"]
+
+# spaCy only pays off with extra processes on large batches (each process reloads the model)
+SPACY_DOCS_PER_PROCESS = 2000
+SPACY_MAX_PROCESSES = 4
+
+
+def available_cores():
+    """Cores this process may run on (respects CPU affinity / container limits where visible)."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+class ThreadBudget:
+    """
+    One "use N cores" setting, divided between worker processes and
+    intra-op threads so torch (EasyOCR, embeddings), CTranslate2 (Whisper),
+    ONNX Runtime and spaCy never oversubscribe the machine.
+
+    workers × threads_per_worker never exceeds cores. Wall and CPU time of
+    each stage are measured with measure(), and report() shows how many
+    cores each stage actually kept busy.
+
+    Args:
+        cores: Cores the run may use (default: all)
+        workers: Parallel extraction workers sharing those cores
+    """
+    def __init__(self, cores=None, workers=1):
+        self.cores = max(1, int(cores or available_cores()))
+        self.workers = max(1, min(int(workers), self.cores))
+        self.threads_per_worker = max(1, self.cores // self.workers)
+        self.stats = {}     # stage -> [wall seconds, cpu seconds]
+        self._lock = threading.Lock()
+
+    # ===== ALLOCATION =====
+
+    @property
+    def whisper_cpu_threads(self):
+        return self.threads_per_worker
+
+    @property
+    def whisper_num_workers(self):
+        # Transcription calls are sequential per worker process
+        return 1
+
+    @property
+    def io_threads(self):
+        # I/O-bound threads (stat, copy) mostly wait, so they may exceed the core count
+        return min(32, self.cores * 4)
+
+    def spacy_processes(self, n_docs):
+        """Processes for nlp.pipe on n_docs documents."""
+        return max(1, min(self.cores, SPACY_MAX_PROCESSES, n_docs // SPACY_DOCS_PER_PROCESS))
+
+    def as_dict(self):
+        return {
+            "cores": self.cores,
+            "workers": self.workers,
+            "threads_per_worker": self.threads_per_worker,
+            "whisper_cpu_threads": self.whisper_cpu_threads,
+            "whisper_num_workers": self.whisper_num_workers,
+            "io_threads": self.io_threads,
+        }
+
+    def apply(self):
+        """Apply the intra-op thread count to the runtimes of this process."""
+        for var in THREAD_ENV_VARS:
+            os.environ[var] = str(self.threads_per_worker)
+        try:
+            import torch
+            torch.set_num_threads(self.threads_per_worker)
+        except ImportError:
+            pass
+        return self
+
+    # ===== MEASUREMENT =====
+
+    @staticmethod
+    def _cpu_seconds():
+        # Includes finished child processes (ffmpeg, worker processes)
+        times = os.times()
+        return times.user + times.system + times.children_user + times.children_system
+
+    @contextmanager
+    def measure(self, stage):
+        """Context manager that records wall and CPU time of a stage."""
+        wall_start = time.perf_counter()
+        cpu_start = self._cpu_seconds()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = self._cpu_seconds() - cpu_start
+            with self._lock:
+                totals = self.stats.setdefault(stage, [0.0, 0.0])
+                totals[0] += wall
+                totals[1] += cpu
+
+    def reset_stats(self):
+        """Forget measurements of previous runs."""
+        with self._lock:
+            self.stats = {}
+
+    def report(self):
+        """One line per measured stage: wall time, cores kept busy and utilization of the budget."""
+        lines = [f"🧮 Thread budget: {self.cores} cores = {self.workers} worker(s) × {self.threads_per_worker} threads"]
+        with self._lock:
+            stats = list(self.stats.items())
+        for stage, (wall, cpu) in stats:
+            busy = cpu / wall if wall > 0 else 0.0
+            lines.append(f"   • {stage}: {wall:.1f}s wall, {busy:.1f} cores busy ({busy / self.cores:.0%} of budget)")
+        return "\n".join(lines)
+
+
+_budget = None
+
+
+def configure_thread_budget(cores=None, workers=1):
+    """
+    Set the process-wide thread budget and apply it.
+
+    cores defaults to $SMART_ORGANIZER_CORES, then to all cores.
+    """
+    global _budget
+    cores = cores or os.environ.get("SMART_ORGANIZER_CORES") or None
+    _budget = ThreadBudget(cores, workers).apply()
+    return _budget
+
+
+def get_thread_budget():
+    """Current thread budget (configured with defaults on first use)."""
+    return _budget or configure_thread_budget()
@@ -0,0 +1,263 @@
+import json
+import os
+import shutil
+import subprocess
+import threading
+import time
+
+from storage import app_data_path
+
+# Limits written by 'cli.py throttle set' - picked up by every running process
+CONTROL_PATH = app_data_path("throttle.json")
+# How often a running process checks the control file for new limits
+CONTROL_POLL_SECONDS = 1.0
+
+# Burst allowed by a bucket, in seconds of its rate
+BURST_SECONDS = 1.0
+# Copies are split into chunks of this size while a byte limit is set
+COPY_CHUNK_BYTES = 1 << 20
+
+# Niceness of background runs (19 = lowest priority)
+BACKGROUND_NICE = 19
+
+
+def _env_rate(name, scale=1):
+    value = os.environ.get(name)
+    return float(value) * scale if value else None
+
+
+class TokenBucket:
+    """
+    Token bucket: at most rate units per second, with bursts of up to
+    BURST_SECONDS worth of tokens. A request larger than the burst runs
+    the bucket into debt, so later requests wait until it is paid off.
+
+    Args:
+        rate: Units per second (None = unlimited)
+    """
+    def __init__(self, rate=None):
+        self._lock = threading.Lock()
+        self.set_rate(rate)
+
+    def set_rate(self, rate):
+        """Change the rate (takes effect for the next request)."""
+        with self._lock:
+            self.rate = rate if rate and rate > 0 else None
+            self._tokens = self.rate * BURST_SECONDS if self.rate else 0.0
+            self._updated = time.monotonic()
+
+    def consume(self, amount):
+        """Take amount tokens, sleeping as long as needed; returns the seconds waited."""
+        with self._lock:
+            if self.rate is None or amount <= 0:
+                return 0.0
+            now = time.monotonic()
+            self._tokens = min(self._tokens + (now - self._updated) * self.rate, self.rate * BURST_SECONDS)
+            self._updated = now
+            self._tokens -= amount
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class Throttle:
+    """
+    Byte and file rate limits for the reads and copies of a run.
+
+    Limits come from $SMART_ORGANIZER_MAX_MB_PER_SEC and
+    $SMART_ORGANIZER_MAX_FILES_PER_SEC, can be changed with set_limits
+    (e.g. from the UI) and are overridden while a run is going by the
+    control file written by 'cli.py throttle set'. Measured rates and the
+    time spent waiting are reported per run.
+    """
+    def __init__(self, control_path=CONTROL_PATH):
+        self.control_path = control_path
+        self.bytes = TokenBucket()
+        self.files = TokenBucket()
+        # Processes sharing the limits (job queue workers on one host)
+        self.shares = 1
+        self._limits = (None, None)
+        self._control_mtime = None
+        self._checked = 0.0
+        self._stats_lock = threading.Lock()
+        self.set_limits(*self._env_limits())
+        self.reset_stats()
+
+    @staticmethod
+    def _env_limits():
+        return (_env_rate("SMART_ORGANIZER_MAX_MB_PER_SEC", 1_000_000),
+                _env_rate("SMART_ORGANIZER_MAX_FILES_PER_SEC"))
+
+    def set_limits(self, bytes_per_sec=None, files_per_sec=None):
+        """Set both limits (None = unlimited); applies immediately, also mid-run."""
+        self._limits = (bytes_per_sec, files_per_sec)
+        self.bytes.set_rate(bytes_per_sec / self.shares if bytes_per_sec else None)
+        self.files.set_rate(files_per_sec / self.shares if files_per_sec else None)
+
+    def share(self, processes):
+        """Split the limits evenly between this many processes on the host."""
+        self.shares = max(1, processes)
+        self.set_limits(*self._limits)
+
+    @property
+    def limits(self):
+        """(bytes per second, files per second) - None where unlimited."""
+        return self._limits
+
+    @property
+    def active(self):
+        return self.bytes.rate is not None or self.files.rate is not None
+
+    def _poll_control(self):
+        now = time.monotonic()
+        if now - self._checked < CONTROL_POLL_SECONDS:
+            return
+        self._checked = now
+        try:
+            mtime = os.stat(self.control_path).st_mtime_ns
+        except OSError:
+            if self._control_mtime is not None:
+                # Control file removed ('cli.py throttle clear'): back to the configured limits
+                self._control_mtime = None
+                self.set_limits(*self._env_limits())
+            return
+        if mtime == self._control_mtime:
+            return
+        self._control_mtime = mtime
+        try:
+            with open(self.control_path, encoding="utf-8") as f:
+                control = json.load(f)
+        except (OSError, ValueError):
+            return
+        mb_per_sec = control.get("mb_per_sec")
+        self.set_limits(mb_per_sec * 1_000_000 if mb_per_sec else None, control.get("files_per_sec"))
+
+    def acquire(self, nbytes=0, files=0):
+        """Wait until nbytes and files may be processed, and count them."""
+        self._poll_control()
+        waited = self.files.consume(files) + self.bytes.consume(nbytes)
+        with self._stats_lock:
+            self._bytes_done += nbytes
+            self._files_done += files
+            self._waited += waited
+
+    def copy_file(self, source_path, dest_path, size=None, hasher=None):
+        """
+        shutil.copy2 within the limits.
+
+        Copies in chunks while a byte limit is set or a hasher is given
+        (updated with the data as it is copied, so hashing needs no second
+        read); otherwise shutil.copy2 keeps its zero-copy fast path.
+        """
+        self._poll_control()
+        self.acquire(files=1)
+        if self.bytes.rate is None and hasher is None:
+            shutil.copy2(source_path, dest_path)
+            self.acquire(nbytes=size or 0)  # counted for the report only
+            return
+        buffer = bytearray(COPY_CHUNK_BYTES)
+        view = memoryview(buffer)
+        with open(source_path, "rb") as src, open(dest_path, "wb") as dst:
+            while True:
+                length = src.readinto(buffer)
+                if not length:
+                    break
+                self.acquire(nbytes=length)
+                if hasher is not None:
+                    hasher.update(view[:length])
+                dst.write(view[:length])
+        shutil.copystat(source_path, dest_path)
+
+    # ===== REPORTING =====
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self._bytes_done = 0
+            self._files_done = 0
+            self._waited = 0.0
+            self._started = time.monotonic()
+
+    def report(self):
+        """Measured rates of this run against the limits ("" if no limit was set)."""
+        if not self.active:
+            return ""
+        with self._stats_lock:
+            elapsed = max(time.monotonic() - self._started, 1e-9)
+            mb_rate = self._bytes_done / elapsed / 1_000_000
+            file_rate = self._files_done / elapsed
+            waited = self._waited
+        bytes_limit, files_limit = self.limits
+        mb_limit = f"{bytes_limit / 1_000_000:.1f}" if bytes_limit else "none"
+        files_limit = f"{files_limit:.1f}" if files_limit else "none"
+        return (f"🐢 Throttle: {mb_rate:.1f} MB/s (limit {mb_limit}), "
+                f"{file_rate:.1f} files/s (limit {files_limit}), waited {waited:.0f}s")
+
+
+def write_control(mb_per_sec=None, files_per_sec=None):
+    """Set the limits of all running and later processes on this host (None = unlimited)."""
+    tmp_path = CONTROL_PATH + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"mb_per_sec": mb_per_sec, "files_per_sec": files_per_sec}, f)
+    os.replace(tmp_path, CONTROL_PATH)
+
+
+def read_control():
+    """Limits of the control file as a dict, or None if none are set."""
+    try:
+        with open(CONTROL_PATH, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def clear_control():
+    """Remove the control file; running processes return to their own limits."""
+    try:
+        os.remove(CONTROL_PATH)
+    except FileNotFoundError:
+        pass
+
+
+def lower_priority():
+    """
+    Run this process at the lowest CPU and idle I/O priority.
+
+    Worker processes started afterwards inherit it. The priority cannot be
+    raised again without privileges, so this lasts for the process.
+
+    Returns:
+        True if the priority was lowered
+    """
+    try:
+        import psutil
+        process = psutil.Process()
+        if os.name == "nt":
+            process.nice(psutil.IDLE_PRIORITY_CLASS)
+            process.ionice(psutil.IOPRIO_VERYLOW)
+        else:
+            process.nice(BACKGROUND_NICE)
+            if hasattr(process, "ionice"):
+                process.ionice(psutil.IOPRIO_CLASS_IDLE)
+        return True
+    except ImportError:
+        pass
+    except Exception:
+        return False
+    if not hasattr(os, "nice"):
+        return False
+    # os.nice adds to the current value
+    os.nice(max(0, BACKGROUND_NICE - os.nice(0)))
+    if shutil.which("ionice"):
+        subprocess.run(["ionice", "-c", "3", "-p", str(os.getpid())],
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+    return True
+
+
+def background_mode():
+    """True if $SMART_ORGANIZER_BACKGROUND asks for lowered priority."""
+    return os.environ.get("SMART_ORGANIZER_BACKGROUND") == "1"
+
+
+# Shared by all stages of a run (reset by logic.reset_run_stats)
+throttle = Throttle()
@@ -10,8 +10,18 @@ from logic import (
     refine_categories_with_semantic_search,
     organize_files_into_folders,
     extract_keywords_from_preview,
-    get_categories_from_query
+    get_categories_from_query,
+    organize_files_streaming,
+    log_cascade_report,
+    index_files,
+    search_index,
+    run_stage,
+    reset_run_stats,
+    log_run_report,
+    log_model_source,
+    preview_scan
 )
+from progress import ProgressTracker
 import pandas as pd
 
 # Set appearance mode and color theme
@@ -35,9 +45,20 @@ class AnimatedProgressBar(ctk.CTkFrame):
     def start(self, message="Processing..."):
         """Start the animated progress bar"""
         self.label.configure(text=message)
+        self.progress.configure(mode="indeterminate")
         self.progress.start()
         self.is_running = True
     
+    def set_progress(self, fraction, message=None):
+        """Switch to determinate mode and show the given fraction (0-1)"""
+        if self.is_running:
+            self.progress.stop()
+            self.is_running = False
+        self.progress.configure(mode="determinate")
+        self.progress.set(max(0.0, min(fraction, 1.0)))
+        if message is not None:
+            self.label.configure(text=message)
+    
     def stop(self):
         """Stop the animated progress bar"""
         self.progress.stop()
@@ -51,7 +72,7 @@ class SettingsWindow(ctk.CTkToplevel):
         super().__init__(parent)
         
         self.title("Settings")
-        self.geometry("450x220")  # Reduced height since we removed action mode
+        self.geometry("450x410")
         self.resizable(False, False)
         
         # Make it modal
@@ -61,7 +82,7 @@ class SettingsWindow(ctk.CTkToplevel):
         # Center the window
         self.update_idletasks()
         x = (self.winfo_screenwidth() // 2) - (450 // 2)
-        y = (self.winfo_screenheight() // 2) - (220 // 2)
+        y = (self.winfo_screenheight() // 2) - (410 // 2)
         self.geometry(f"+{x}+{y}")
         
         self.settings_dict = settings_dict
@@ -117,6 +138,74 @@ class SettingsWindow(ctk.CTkToplevel):
         if self.settings_dict.get("include_subfolders", True):
             self.include_subfolders_switch.select()
         
+        # Streaming Pipeline Toggle
+        streaming_frame = ctk.CTkFrame(content_frame, fg_color="#2b2b2b", corner_radius=10)
+        streaming_frame.pack(fill="x", pady=(0, 10))
+        
+        streaming_inner = ctk.CTkFrame(streaming_frame, fg_color="transparent")
+        streaming_inner.pack(fill="x", padx=15, pady=15)
+        
+        streaming_left = ctk.CTkFrame(streaming_inner, fg_color="transparent")
+        streaming_left.pack(side="left", fill="both", expand=True)
+        
+        ctk.CTkLabel(
+            streaming_left,
+            text="Streaming Pipeline",
+            font=("Roboto", 14, "bold")
+        ).pack(anchor="w")
+        
+        ctk.CTkLabel(
+            streaming_left,
+            text="Organize files while content analysis continues",
+            font=("Roboto", 11),
+            text_color="#888888"
+        ).pack(anchor="w")
+        
+        self.streaming_switch = ctk.CTkSwitch(
+            streaming_inner,
+            text="",
+            onvalue=True,
+            offvalue=False
+        )
+        self.streaming_switch.pack(side="right")
+        
+        if self.settings_dict.get("streaming", False):
+            self.streaming_switch.select()
+        
+        # Lexical Matching Toggle
+        lexical_frame = ctk.CTkFrame(content_frame, fg_color="#2b2b2b", corner_radius=10)
+        lexical_frame.pack(fill="x", pady=(0, 10))
+        
+        lexical_inner = ctk.CTkFrame(lexical_frame, fg_color="transparent")
+        lexical_inner.pack(fill="x", padx=15, pady=15)
+        
+        lexical_left = ctk.CTkFrame(lexical_inner, fg_color="transparent")
+        lexical_left.pack(side="left", fill="both", expand=True)
+        
+        ctk.CTkLabel(
+            lexical_left,
+            text="Lightweight Matching",
+            font=("Roboto", 14, "bold")
+        ).pack(anchor="w")
+        
+        ctk.CTkLabel(
+            lexical_left,
+            text="Match queries by keywords and synonyms (no AI model)",
+            font=("Roboto", 11),
+            text_color="#888888"
+        ).pack(anchor="w")
+        
+        self.lexical_switch = ctk.CTkSwitch(
+            lexical_inner,
+            text="",
+            onvalue=True,
+            offvalue=False
+        )
+        self.lexical_switch.pack(side="right")
+        
+        if self.settings_dict.get("lexical_matching", False):
+            self.lexical_switch.select()
+        
         # Info about automatic workflow
         info_frame = ctk.CTkFrame(content_frame, fg_color="#1e3a28", corner_radius=10)
         info_frame.pack(fill="x", pady=10)
@@ -151,27 +240,101 @@ class SettingsWindow(ctk.CTkToplevel):
     def _save_settings(self):
         """Save settings and close window"""
         self.settings_dict["include_subfolders"] = self.include_subfolders_switch.get()
+        self.settings_dict["streaming"] = self.streaming_switch.get()
+        self.settings_dict["lexical_matching"] = self.lexical_switch.get()
         self.destroy()
 
 
+class SearchWindow(ctk.CTkToplevel):
+    """Free-text search over every file indexed by previous runs"""
+    def __init__(self, parent):
+        super().__init__(parent)
+        
+        self.title("Search Files")
+        self.geometry("650x450")
+        self.transient(parent)
+        
+        self._create_widgets()
+    
+    def _create_widgets(self):
+        ctk.CTkLabel(
+            self,
+            text="🔎 Search Organized Files",
+            font=("Roboto", 24, "bold")
+        ).pack(anchor="w", padx=20, pady=(20, 10))
+        
+        search_frame = ctk.CTkFrame(self, fg_color="transparent")
+        search_frame.pack(fill="x", padx=20, pady=(0, 10))
+        
+        self.search_entry = ctk.CTkEntry(
+            search_frame,
+            placeholder_text="e.g. 'find my dental bills'",
+            height=40,
+            font=("Roboto", 12)
+        )
+        self.search_entry.pack(side="left", fill="x", expand=True, padx=(0, 10))
+        self.search_entry.bind("<Return>", lambda e: self._search())
+        
+        ctk.CTkButton(
+            search_frame,
+            text="Search",
+            command=self._search,
+            width=100,
+            height=40,
+            font=("Roboto", 13, "bold")
+        ).pack(side="right")
+        
+        self.results_text = ctk.CTkTextbox(
+            self,
+            font=("Consolas", 11),
+            fg_color="#1e1e1e",
+            wrap="none",
+            state="disabled"
+        )
+        self.results_text.pack(fill="both", expand=True, padx=20, pady=(0, 20))
+    
+    def _search(self):
+        """Run the query against the local vector index"""
+        query = self.search_entry.get().strip()
+        if not query:
+            return
+        
+        start = time.time()
+        try:
+            results = search_index(query, k=25)
+            lines = [f"{r['score']:.3f}  [{r['category']}]  {r['path']}" for r in results]
+            if not lines:
+                lines = ["No indexed files yet - organize a folder first."]
+            lines.append(f"\n{len(results)} results in {(time.time() - start) * 1000:.0f} ms")
+        except Exception as e:
+            lines = [f"❌ Search failed: {e}"]
+        
+        self.results_text.configure(state="normal")
+        self.results_text.delete("1.0", "end")
+        self.results_text.insert("end", "\n".join(lines))
+        self.results_text.configure(state="disabled")
+
+
 class FileOrganizerApp(ctk.CTk):
     def __init__(self):
         super().__init__()
         
         # Window configuration
         self.title("Smart File Organizer")
-        self.geometry("900x720")  # Reduced from 750 to 720
-        self.minsize(800, 620)    # Reduced from 650 to 620
+        self.geometry("900x764")  # Room for the preview button
+        self.minsize(800, 664)
         
         # Center window
         self.update_idletasks()
         x = (self.winfo_screenwidth() // 2) - (900 // 2)
-        y = (self.winfo_screenheight() // 2) - (720 // 2)  # Updated for new height
+        y = (self.winfo_screenheight() // 2) - (764 // 2)  # Updated for new height
         self.geometry(f"+{x}+{y}")
         
         # Settings dictionary (removed action setting - always automatic copy-verify-delete)
         self.settings = {
-            "include_subfolders": True
+            "include_subfolders": True,
+            "streaming": False,
+            "lexical_matching": False
         }
         
         # State variables
@@ -179,6 +342,11 @@ class FileOrganizerApp(ctk.CTk):
         self.is_processing = False
         self.df_result = None
         self.extracted_categories = None
+        self.tracker = None
+        
+        # Preview: scanned + keyword-extracted folder kept for re-querying (logic.QueryPreview)
+        self.preview = None
+        self.preview_key = None          # (folder, include_subfolders) it was scanned with
         
         self._create_widgets()
     
@@ -221,6 +389,19 @@ class FileOrganizerApp(ctk.CTk):
         )
         self.settings_btn.pack(side="right")
         
+        # Search button
+        self.search_btn = ctk.CTkButton(
+            header_frame,
+            text="🔎 Search",
+            command=self._open_search,
+            width=120,
+            height=40,
+            font=("Roboto", 13, "bold"),
+            fg_color="#2b2b2b",
+            hover_color="#3b3b3b"
+        )
+        self.search_btn.pack(side="right", padx=(0, 10))
+        
         # ========== FOLDER SELECTION ==========
         folder_frame = ctk.CTkFrame(main_container, fg_color="#2b2b2b", corner_radius=15)
         folder_frame.pack(fill="x", pady=(0, 15))
@@ -370,6 +551,18 @@ class FileOrganizerApp(ctk.CTk):
         button_frame = ctk.CTkFrame(main_container, fg_color="transparent")
         button_frame.pack(fill="x", pady=(10, 0))  # Increased top padding
         
+        self.preview_btn = ctk.CTkButton(
+            button_frame,
+            text="👁️ Preview Categories (no files moved)",
+            command=self._start_preview,
+            height=36,
+            font=("Roboto", 13, "bold"),
+            fg_color="#3a3a3a",
+            hover_color="#4a4a4a",
+            state="disabled"
+        )
+        self.preview_btn.pack(fill="x", padx=0, pady=(0, 8))
+        
         self.organize_btn = ctk.CTkButton(
             button_frame,
             text="🚀 Start Organizing (Copy-Verify-Delete)",
@@ -381,10 +574,18 @@ class FileOrganizerApp(ctk.CTk):
         )
         self.organize_btn.pack(fill="x", padx=0, pady=0)
     
+    def _matching_engine(self):
+        """Query matching engine selected in the settings."""
+        return "lexical" if self.settings.get("lexical_matching") else "embedding"
+    
     def _open_settings(self):
         """Open settings window"""
         SettingsWindow(self, self.settings)
     
+    def _open_search(self):
+        """Open search window"""
+        SearchWindow(self)
+    
     def _browse_folder(self):
         """Browse and select folder"""
         folder = filedialog.askdirectory(title="Select Folder to Organize")
@@ -395,6 +596,8 @@ class FileOrganizerApp(ctk.CTk):
             self.folder_entry.insert(0, folder)
             self.folder_entry.configure(state="readonly")
             self.organize_btn.configure(state="normal")
+            self.preview_btn.configure(state="normal")
+            self._discard_preview()
             self._add_status(f"Selected folder: {folder}", "success")
     
     def _send_query(self):
@@ -406,6 +609,8 @@ class FileOrganizerApp(ctk.CTk):
             self.categories_display_frame.pack_forget()
             self.extracted_categories = None
             self._add_status("⚠️ Query cleared - will use auto-categorization", "info")
+            if self._has_preview():
+                self._start_requery()
             return
         
         # Extract categories from query
@@ -439,6 +644,10 @@ class FileOrganizerApp(ctk.CTk):
                 # Log to status
                 self._add_status(f"✅ Query analyzed - found {len(categories)} categories: {', '.join(categories)}", "success")
                 
+                # Folder already scanned: show the breakdown for this query right away
+                if self._has_preview():
+                    self._start_requery()
+                
         except Exception as e:
             self.categories_display_frame.pack_forget()
             self.extracted_categories = None
@@ -486,6 +695,147 @@ class FileOrganizerApp(ctk.CTk):
         
         self.after(0, update)
     
+    def _poll_progress(self):
+        """Refresh the determinate progress bar, ETA and throughput while processing"""
+        if not self.is_processing or self.tracker is None:
+            return
+        
+        snap = self.tracker.snapshot()
+        if snap["total"] > 0:
+            percent = int(snap["fraction"] * 100)
+            self.progress_bar.set_progress(
+                snap["fraction"],
+                f"{snap['stage']} • {snap['done']}/{snap['total']} items • {percent}%"
+            )
+            elapsed = timedelta(seconds=int(snap["elapsed_seconds"]))
+            eta = timedelta(seconds=int(snap["eta_seconds"]))
+            self.time_label.configure(
+                text=f"⏱️ Elapsed: {elapsed} • ETA: {eta} • {snap['items_per_sec']:.1f} items/s"
+            )
+        
+        self.after(500, self._poll_progress)
+    
+    # ===== PREVIEW: SCAN ONCE, RE-QUERY WITHOUT RESCANNING =====
+    
+    def _has_preview(self):
+        """True if a preview scan of the selected folder (with the current settings) is in memory."""
+        return (self.preview is not None and
+                self.preview_key == (self.selected_folder, self.settings["include_subfolders"]))
+    
+    def _discard_preview(self):
+        """Forget the preview scan (folder changed or its files were moved)."""
+        self.preview = None
+        self.preview_key = None
+    
+    def _set_busy(self, busy_text):
+        """Disable the controls while a background task runs"""
+        self.organize_btn.configure(state="disabled", text=busy_text, text_color="white")
+        self.preview_btn.configure(state="disabled")
+        self.browse_btn.configure(state="disabled")
+        self.settings_btn.configure(state="disabled")
+        self.send_query_btn.configure(state="disabled")
+    
+    def _show_breakdown(self, df):
+        """Log how many files go to each category"""
+        self._add_status("=" * 60, "info")
+        self._add_status("📊 CATEGORY BREAKDOWN:", "info")
+        
+        category_counts = df['Category'].value_counts()
+        for category, count in category_counts.items():
+            self._add_status(f"   • {category}: {count} files", "success")
+    
+    def _start_preview(self):
+        """Scan and extract the selected folder once, without moving files"""
+        if not self.selected_folder:
+            messagebox.showwarning("No Folder", "Please select a folder first!")
+            return
+        
+        if self.is_processing:
+            messagebox.showinfo("Processing", "Already processing files...")
+            return
+        
+        self._set_busy("⏳ Scanning for preview...")
+        self._clear_status()
+        self.progress_bar.pack(fill="x", pady=(0, 15))
+        self.progress_bar.start("Initializing...")
+        
+        self.tracker = ProgressTracker()
+        self.is_processing = True
+        
+        thread = threading.Thread(target=self._preview_thread, daemon=True)
+        thread.start()
+        self.after(500, self._poll_progress)
+    
+    def _preview_thread(self):
+        """Preview scan (runs in separate thread): extraction and keywords, then the current query"""
+        start_time = time.time()
+        reset_run_stats()
+        log_model_source(lambda msg: self._add_status(msg, "info"))
+        
+        def preview_callback(msg):
+            self._add_status(msg, "info")
+        
+        try:
+            self._discard_preview()
+            self._add_status("=" * 60, "info")
+            self._add_status("👁️ PREVIEW: Scanning and extracting keywords (no files are moved)...", "info")
+            
+            folder = self.selected_folder
+            include_subfolders = self.settings["include_subfolders"]
+            preview = preview_scan(folder, preview_callback, include_subfolders, tracker=self.tracker)
+            
+            elapsed = time.time() - start_time
+            self._update_time_label(elapsed)
+            self._add_status(f"✅ Found {len(preview.df)} files", "success")
+            
+            if len(preview.df) == 0:
+                self._add_status("⚠️ No files found in the selected folder", "warning")
+                return
+            
+            self.preview = preview
+            self.preview_key = (folder, include_subfolders)
+            self._requery(preview_callback)
+            
+            self._add_run_report()
+            self._add_status("=" * 60, "success")
+            self._add_status("✅ Preview ready - change the query and press Analyze to compare, "
+                             "or Start Organizing to move the files", "success")
+        
+        except Exception as e:
+            self._discard_preview()
+            self._add_status(f"❌ ERROR: {str(e)}", "error")
+            self.after(0, lambda: messagebox.showerror("Error", f"An error occurred:\n{str(e)}"))
+        
+        finally:
+            self._finish_processing()
+    
+    def _requery(self, progress_callback):
+        """Match the preview scan to the current query and show the breakdown"""
+        user_query = self.query_entry.get().strip()
+        started = time.perf_counter()
+        df = self.preview.match(user_query, progress_callback, engine=self._matching_engine())
+        self._show_breakdown(df)
+        self._add_status(f"⚡ Matched {len(df)} files in {time.perf_counter() - started:.2f}s "
+                         f"(no rescan)", "success")
+        return df
+    
+    def _start_requery(self):
+        """Re-run only the matching step on the preview scan for the new query"""
+        if self.is_processing:
+            return
+        self._set_busy("⏳ Matching...")
+        self.is_processing = True
+        
+        def run():
+            try:
+                self._requery(lambda msg: None)
+            except Exception as e:
+                self._add_status(f"❌ Error matching query: {str(e)}", "error")
+            finally:
+                self._finish_processing()
+        
+        threading.Thread(target=run, daemon=True).start()
+    
     def _start_organizing(self):
         """Start the organization process in a separate thread"""
         if not self.selected_folder:
@@ -512,41 +862,58 @@ class FileOrganizerApp(ctk.CTk):
             return
         
         # Disable buttons
-        self.organize_btn.configure(state="disabled", text="⏳ Processing...", text_color="white")
-        self.browse_btn.configure(state="disabled")
-        self.settings_btn.configure(state="disabled")
-        self.send_query_btn.configure(state="disabled")
+        self._set_busy("⏳ Processing...")
         
         # Clear and prepare UI
         self._clear_status()
         self.progress_bar.pack(fill="x", pady=(0, 15))
         self.progress_bar.start("Initializing...")
         
-        # Start processing in thread
-        thread = threading.Thread(target=self._organize_files_thread, daemon=True)
+        # Cost model covers both scanning and copying
+        self.tracker = ProgressTracker(include_copy=True)
+        self.is_processing = True
+        
+        # Start processing in thread (a previewed folder is organized without rescanning)
+        target = self._commit_preview_thread if self._has_preview() else self._organize_files_thread
+        thread = threading.Thread(target=target, daemon=True)
         thread.start()
+        self.after(500, self._poll_progress)
     
     def _organize_files_thread(self):
         """Main organization logic (runs in separate thread)"""
         self.is_processing = True
         start_time = time.time()
+        reset_run_stats()
+        log_model_source(lambda msg: self._add_status(msg, "info"))
         
         try:
+            if self.settings["streaming"]:
+                self._organize_streaming(start_time)
+                return
+            
             # Step 1: Scan folder
             self._add_status("=" * 60, "info")
             subfolder_msg = "including subfolders" if self.settings["include_subfolders"] else "top-level only"
             self._add_status(f"📂 STEP 1: Scanning folder ({subfolder_msg})...", "info")
-            self.after(0, lambda: self.progress_bar.start("📂 Scanning folder..."))
             
             # Define progress callback for real-time updates
             def scan_callback(msg):
                 self._add_status(msg, "info")
             
-            df = scan_folder(
-                self.selected_folder, 
-                progress_callback=scan_callback,
-                include_subfolders=self.settings["include_subfolders"]
-            )
+            # Query categories let the scan skip extraction for files whose
+            # filename or folder already decides the category
+            user_query = self.query_entry.get().strip()
+            target_categories = get_categories_from_query(user_query) if user_query else None
+            
+            with run_stage("Scan + extraction", release=["markitdown", "ocr", "whisper"]):
+                df = scan_folder(
+                    self.selected_folder, 
+                    progress_callback=scan_callback,
+                    include_subfolders=self.settings["include_subfolders"],
+                    tracker=self.tracker,
+                    target_categories=target_categories,
+                    engine=self._matching_engine()
+                )
             
             elapsed = time.time() - start_time
             self._update_time_label(elapsed)
@@ -558,11 +925,8 @@ class FileOrganizerApp(ctk.CTk):
                 return
             
             # Step 2: Category Assignment
-            time.sleep(0.5)
             self._add_status("=" * 60, "info")
             
-            user_query = self.query_entry.get().strip()
-            
             if user_query:
                 # Query provided → Match to query categories
                 self._add_status("🎯 STEP 2: Matching files to query categories...", "info")
@@ -573,13 +937,16 @@ class FileOrganizerApp(ctk.CTk):
                 else:
                     self._add_status("⚠️ Query not analyzed - analyzing now...", "warning")
                 
-                self.after(0, lambda: self.progress_bar.start("🔍 Semantic matching..."))
+                self.tracker.set_stage("Semantic matching")
                 
                 # Progress callback for semantic search
                 def semantic_callback(msg):
                     self._add_status(msg, "info")
                 
-                df = refine_categories_with_semantic_search(df, user_query, progress_callback=semantic_callback)
+                with run_stage("Keywords + semantic matching", uses=["nlp", "embedder"], release=["nlp"]):
+                    df = refine_categories_with_semantic_search(df, user_query, progress_callback=semantic_callback,
+                                                                engine=self._matching_engine())
+                log_cascade_report(df, semantic_callback)
                 
                 elapsed = time.time() - start_time
                 self._update_time_label(elapsed)
@@ -590,52 +957,36 @@ class FileOrganizerApp(ctk.CTk):
                 self._add_status("   (Documents, Images, Videos, Audio, etc.)", "info")
             
             # Display category breakdown
-            time.sleep(0.5)
-            self._add_status("=" * 60, "info")
-            self._add_status("📊 CATEGORY BREAKDOWN:", "info")
-            
-            category_counts = df['Category'].value_counts()
-            for category, count in category_counts.items():
-                self._add_status(f"   • {category}: {count} files", "success")
+            self._show_breakdown(df)
             
             # Step 3: Organize files (automatic copy-verify-delete)
-            time.sleep(0.5)
-            self._add_status("=" * 60, "info")
-            
-            destination = os.path.join(
-                os.path.dirname(self.selected_folder),
-                "Organized_Files"
-            )
-            
-            self._add_status(f"📦 STEP 3: Organizing files → {destination}", "info")
-            self._add_status("   Workflow: Copy → Verify → Delete originals", "info")
-            self.after(0, lambda: self.progress_bar.start("📦 Copying and organizing..."))
-            
-            # Progress callback for file organization
-            def organize_callback(msg):
-                self._add_status(msg, "info")
-            
-            # NOTE: No action parameter - function always does copy-verify-delete
-            organize_files_into_folders(df, destination, progress_callback=organize_callback)
+            self._organize_and_index(df, start_time)
             
-            elapsed = time.time() - start_time
-            self._update_time_label(elapsed)
+        except Exception as e:
+            self._add_status(f"❌ ERROR: {str(e)}", "error")
+            self.after(0, lambda: messagebox.showerror("Error", f"An error occurred:\n{str(e)}"))
+        
+        finally:
+            self._finish_processing()
+    
+    def _commit_preview_thread(self):
+        """Organize the previewed folder (runs in separate thread): only copy-verify-delete, no rescan"""
+        start_time = time.time()
+        reset_run_stats()
+        
+        try:
+            self._add_status("=" * 60, "info")
+            self._add_status("👁️ Using the preview scan - no files are extracted again", "info")
             
-            # Success message
-            self._add_status("=" * 60, "success")
-            self._add_status("✅ ORGANIZATION COMPLETE!", "success")
-            self._add_status(f"⏱️  Total time: {timedelta(seconds=int(elapsed))}", "success")
-            self._add_status(f"📁 Files organized in: {destination}", "success")
-            self._add_status("=" * 60, "success")
+            # The query (or engine) may have changed without Analyze being pressed
+            df = self.preview.result
+            if df is None or (self.preview.query, self.preview.engine) != (self.query_entry.get().strip(),
+                                                                           self._matching_engine()):
+                df = self._requery(lambda msg: self._add_status(msg, "info"))
             
-            # Show success dialog
-            self.after(0, lambda: messagebox.showinfo(
-                "Success!",
-                f"Successfully organized {len(df)} files!\n\n"
-                f"Location: {destination}\n"
-                f"Time: {timedelta(seconds=int(elapsed))}\n\n"
-                f"All files were copied, verified, and originals deleted."
-            ))
+            # The moved files are gone from the scanned folder
+            self._discard_preview()
+            self._organize_and_index(df, start_time)
             
         except Exception as e:
             self._add_status(f"❌ ERROR: {str(e)}", "error")
@@ -644,6 +995,113 @@ class FileOrganizerApp(ctk.CTk):
         finally:
             self._finish_processing()
     
+    def _organize_and_index(self, df, start_time):
+        """Copy → Verify → Delete the files of df into their category folders, then index them"""
+        self._add_status("=" * 60, "info")
+        
+        destination = os.path.join(
+            os.path.dirname(self.selected_folder),
+            "Organized_Files"
+        )
+        
+        self._add_status(f"📦 STEP 3: Organizing files → {destination}", "info")
+        self._add_status("   Workflow: Copy → Verify → Delete originals", "info")
+        
+        # Progress callback for file organization
+        def organize_callback(msg):
+            self._add_status(msg, "info")
+        
+        # NOTE: No action parameter - function always does copy-verify-delete
+        with run_stage("Organizing"):
+            organize_files_into_folders(df, destination, progress_callback=organize_callback, tracker=self.tracker)
+        self.df_result = df
+        
+        # Keep previews/keywords searchable after the files were moved
+        self.tracker.set_stage("Indexing")
+        with run_stage("Indexing", uses=["embedder"], release=["embedder"]):
+            index_files(df, progress_callback=organize_callback)
+        
+        elapsed = time.time() - start_time
+        self._update_time_label(elapsed)
+        
+        # Success message
+        self._add_status("=" * 60, "success")
+        self._add_status("✅ ORGANIZATION COMPLETE!", "success")
+        self._add_status(f"⏱️  Total time: {timedelta(seconds=int(elapsed))}", "success")
+        self._add_status(f"📁 Files organized in: {destination}", "success")
+        self._add_run_report()
+        self._add_status("=" * 60, "success")
+        
+        # Show success dialog
+        self.after(0, lambda: messagebox.showinfo(
+            "Success!",
+            f"Successfully organized {len(df)} files!\n\n"
+            f"Location: {destination}\n"
+            f"Time: {timedelta(seconds=int(elapsed))}\n\n"
+            f"All files were copied, verified, and originals deleted."
+        ))
+    
+    def _organize_streaming(self, start_time):
+        """Streaming mode: files are organized while content analysis continues"""
+        destination = os.path.join(
+            os.path.dirname(self.selected_folder),
+            "Organized_Files"
+        )
+        user_query = self.query_entry.get().strip()
+        
+        self._add_status("=" * 60, "info")
+        self._add_status(f"⚡ Streaming: Scan → Analyze → Organize → {destination}", "info")
+        
+        def stream_callback(msg):
+            self._add_status(msg, "info")
+        
+        reset_run_stats()
+        with run_stage("Streaming pipeline", release=["markitdown", "ocr", "whisper", "nlp"]):
+            df = organize_files_streaming(
+                self.selected_folder,
+                destination,
+                user_query=user_query or None,
+                include_subfolders=self.settings["include_subfolders"],
+                progress_callback=stream_callback,
+                tracker=self.tracker,
+                engine=self._matching_engine()
+            )
+        self.df_result = df
+        
+        # Keep previews/keywords searchable after the files were moved
+        self.tracker.set_stage("Indexing")
+        with run_stage("Indexing", uses=["embedder"], release=["embedder"]):
+            index_files(df, progress_callback=stream_callback)
+        
+        elapsed = time.time() - start_time
+        self._update_time_label(elapsed)
+        
+        if len(df) == 0:
+            self._add_status("⚠️ No files found in the selected folder", "warning")
+            return
+        
+        self._add_status("=" * 60, "success")
+        self._add_status("✅ ORGANIZATION COMPLETE!", "success")
+        self._add_status(f"⏱️  Total time: {timedelta(seconds=int(elapsed))}", "success")
+        self._add_status(f"📁 Files organized in: {destination}", "success")
+        self._add_run_report()
+        self._add_status("=" * 60, "success")
+        
+        self.after(0, lambda: messagebox.showinfo(
+            "Success!",
+            f"Successfully organized {len(df)} files!\n\n"
+            f"Location: {destination}\n"
+            f"Time: {timedelta(seconds=int(elapsed))}"
+        ))
+    
+    def _add_run_report(self):
+        """Show CPU and memory usage per stage of the last run"""
+        def report_callback(report):
+            for line in report.splitlines():
+                self._add_status(line, "info")
+        
+        log_run_report(report_callback)
+    
     def _finish_processing(self):
         """Clean up after processing"""
         def cleanup():
@@ -651,6 +1109,7 @@ class FileOrganizerApp(ctk.CTk):
             self.progress_bar.stop()
             self.progress_bar.pack_forget()
             self.organize_btn.configure(state="normal", text="🚀 Start Organizing (Copy-Verify-Delete)", text_color="white")
+            self.preview_btn.configure(state="normal")
             self.browse_btn.configure(state="normal")
             self.settings_btn.configure(state="normal")
             self.send_query_btn.configure(state="normal")
@@ -0,0 +1,283 @@
+import json
+import os
+import sqlite3
+import threading
+
+import numpy as np
+
+from storage import APP_DATA_DIR
+
+DEFAULT_INDEX_DIR = os.path.join(APP_DATA_DIR, "index")
+
+# Below this size a flat scan is already fast; above it a coarse clustering layer is built
+IVF_MIN_VECTORS = 50_000
+# Rebuild clusters once this fraction of vectors was added after the last build
+IVF_REBUILD_FRACTION = 0.2
+# Clusters probed per query
+DEFAULT_NPROBE = 8
+# Vectors scored per block in a flat scan
+SCAN_BLOCK = 65_536
+
+
+class FileVectorIndex:
+    """
+    Persistent file-level vector index, no external database needed.
+
+    Layout of index_dir:
+        index.json     - dim, count, quantization and cluster info
+        vectors.f32    - raw float32 vectors (or vectors.i8 + scales.f32
+                         when quantized to int8), appended and read via mmap
+        files.sqlite   - id → path, filename, category, keywords, snippet
+        centroids.npy, order.npy, offsets.npy - coarse clustering layer
+                         (inverted lists) for large indexes
+
+    Vectors are expected to be L2-normalized so the dot product is the
+    cosine similarity. Re-adding a path deactivates its previous entry.
+
+    Args:
+        index_dir: Folder holding the index (created if needed)
+        quantize: Store vectors as int8 with one scale per vector (4x smaller).
+            Only used when a new index is created.
+    """
+    def __init__(self, index_dir=None, quantize=False):
+        self.index_dir = index_dir or DEFAULT_INDEX_DIR
+        os.makedirs(self.index_dir, exist_ok=True)
+        self._lock = threading.Lock()
+
+        self._info_path = os.path.join(self.index_dir, "index.json")
+        if os.path.exists(self._info_path):
+            with open(self._info_path) as f:
+                self.info = json.load(f)
+        else:
+            self.info = {"dim": None, "count": 0, "quantized": bool(quantize), "clusters": 0, "clustered_count": 0}
+
+        self.db = sqlite3.connect(os.path.join(self.index_dir, "files.sqlite"), check_same_thread=False)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            "id INTEGER PRIMARY KEY, path TEXT, filename TEXT, category TEXT,"
+            "keywords TEXT, snippet TEXT, active INTEGER DEFAULT 1)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS files_path ON files(path)")
+        self.db.commit()
+
+        self._vectors = None
+        self._scales = None
+        self._clusters = None
+
+    def __len__(self):
+        return self.info["count"]
+
+    # ===== STORAGE =====
+
+    def _file(self, name):
+        return os.path.join(self.index_dir, name)
+
+    def _save_info(self):
+        tmp_path = self._info_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.info, f)
+        os.replace(tmp_path, self._info_path)
+
+    def _truncate(self, count):
+        """Cut the vector files back to their first count entries."""
+        dim = self.info["dim"]
+        files = [("vectors.i8", dim), ("scales.f32", 4)] if self.info["quantized"] else [("vectors.f32", 4 * dim)]
+        for name, entry_bytes in files:
+            path = self._file(name)
+            if os.path.exists(path) and os.path.getsize(path) > count * entry_bytes:
+                os.truncate(path, count * entry_bytes)
+
+    def _load_vectors(self):
+        """Memory-map the stored vectors (cached until the next add)."""
+        if self._vectors is None and self.info["count"]:
+            count, dim = self.info["count"], self.info["dim"]
+            if self.info["quantized"]:
+                self._vectors = np.memmap(self._file("vectors.i8"), dtype=np.int8, mode="r", shape=(count, dim))
+                self._scales = np.memmap(self._file("scales.f32"), dtype=np.float32, mode="r", shape=(count,))
+            else:
+                self._vectors = np.memmap(self._file("vectors.f32"), dtype=np.float32, mode="r", shape=(count, dim))
+        return self._vectors
+
+    def _load_clusters(self):
+        if self._clusters is None and self.info["clusters"]:
+            self._clusters = (
+                np.load(self._file("centroids.npy")),
+                np.load(self._file("order.npy"), mmap_mode="r"),
+                np.load(self._file("offsets.npy")),
+            )
+        return self._clusters
+
+    def add(self, paths, filenames, categories, keywords, snippets, vectors):
+        """
+        Append one entry per file.
+
+        Args:
+            paths, filenames, categories, keywords, snippets: Equal-length sequences
+            vectors: float32 array of shape (n, dim), L2-normalized
+        """
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if len(vectors) == 0:
+            return
+        with self._lock:
+            if self.info["dim"] is None:
+                self.info["dim"] = int(vectors.shape[1])
+            if vectors.shape[1] != self.info["dim"]:
+                raise ValueError(f"Vector size {vectors.shape[1]} does not match index size {self.info['dim']}")
+
+            start = self.info["count"]
+            # A crashed add may have left vectors or rows past count: drop them,
+            # so the new ids line up with their vectors again
+            self._truncate(start)
+            self.db.execute("DELETE FROM files WHERE id >= ?", (start,))
+            if self.info["quantized"]:
+                scales = np.abs(vectors).max(axis=1) / 127.0
+                scales[scales == 0] = 1.0
+                quantized = np.round(vectors / scales[:, None]).astype(np.int8)
+                with open(self._file("vectors.i8"), "ab") as f:
+                    f.write(quantized.tobytes())
+                with open(self._file("scales.f32"), "ab") as f:
+                    f.write(scales.astype(np.float32).tobytes())
+            else:
+                with open(self._file("vectors.f32"), "ab") as f:
+                    f.write(vectors.tobytes())
+
+            self.db.executemany("UPDATE files SET active = 0 WHERE path = ?", [(p,) for p in paths])
+            self.db.executemany(
+                "INSERT INTO files (id, path, filename, category, keywords, snippet) VALUES (?, ?, ?, ?, ?, ?)",
+                [(start + i, p, f, c, k, s) for i, (p, f, c, k, s)
+                 in enumerate(zip(paths, filenames, categories, keywords, snippets))]
+            )
+            self.db.commit()
+
+            self.info["count"] = start + len(vectors)
+            self._save_info()
+            self._vectors = None
+            self._scales = None
+
+        unclustered = self.info["count"] - self.info["clustered_count"]
+        if self.info["count"] >= IVF_MIN_VECTORS and unclustered > IVF_REBUILD_FRACTION * self.info["count"]:
+            self.build_clusters()
+
+    # ===== COARSE CLUSTERING LAYER =====
+
+    def _float_vectors(self, ids):
+        """float32 copies of the vectors at ids (a slice or an index array)."""
+        vectors = self._load_vectors()[ids]
+        if self.info["quantized"]:
+            return vectors.astype(np.float32) * self._scales[ids][:, None]
+        return np.asarray(vectors, dtype=np.float32)
+
+    def build_clusters(self, n_clusters=None, iterations=8, sample_size=100_000, seed=0):
+        """
+        Build the coarse layer: spherical k-means on a sample, then every
+        vector is assigned to its nearest centroid and ids are stored grouped
+        by cluster (inverted lists). Search then only scores a few clusters.
+        """
+        with self._lock:
+            count = self.info["count"]
+            if count == 0:
+                return
+            n_clusters = n_clusters or max(1, int(np.sqrt(count)))
+            rng = np.random.default_rng(seed)
+
+            sample_ids = np.sort(rng.choice(count, size=min(sample_size, count), replace=False))
+            sample = self._float_vectors(sample_ids)
+            n_clusters = min(n_clusters, len(sample))
+            centroids = sample[rng.choice(len(sample), size=n_clusters, replace=False)].copy()
+
+            for _ in range(iterations):
+                assign = np.argmax(sample @ centroids.T, axis=1)
+                sums = np.zeros_like(centroids)
+                np.add.at(sums, assign, sample)
+                norms = np.linalg.norm(sums, axis=1, keepdims=True)
+                filled = norms[:, 0] > 0
+                centroids[filled] = sums[filled] / norms[filled]
+
+            assignments = np.empty(count, dtype=np.int32)
+            for start in range(0, count, SCAN_BLOCK):
+                block = self._float_vectors(slice(start, min(start + SCAN_BLOCK, count)))
+                assignments[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+
+            order = np.argsort(assignments, kind="stable").astype(np.int32)
+            offsets = np.searchsorted(assignments[order], np.arange(n_clusters + 1)).astype(np.int64)
+
+            np.save(self._file("centroids.npy"), centroids.astype(np.float32))
+            np.save(self._file("order.npy"), order)
+            np.save(self._file("offsets.npy"), offsets)
+            self.info["clusters"] = int(n_clusters)
+            self.info["clustered_count"] = int(count)
+            self._save_info()
+            self._clusters = None
+
+    # ===== SEARCH =====
+
+    def _score_ids(self, ids, query):
+        vectors = self._load_vectors()[ids]
+        if self.info["quantized"]:
+            return (vectors.astype(np.float32) @ query) * self._scales[ids]
+        return vectors @ query
+
+    def search(self, query_vector, k=10, nprobe=DEFAULT_NPROBE):
+        """
+        Most similar active files to query_vector.
+
+        Returns:
+            List of dicts (path, filename, category, keywords, snippet, score),
+            best match first
+        """
+        with self._lock:
+            count = self.info["count"]
+            if count == 0:
+                return []
+            query = np.asarray(query_vector, dtype=np.float32).ravel()
+            self._load_vectors()
+            clusters = self._load_clusters()
+
+            if clusters is not None:
+                centroids, order, offsets = clusters
+                probe = np.argsort(centroids @ query)[::-1][:nprobe]
+                candidates = [np.asarray(order[offsets[c]:offsets[c + 1]]) for c in probe]
+                # Vectors added after the last build are scanned directly
+                candidates.append(np.arange(self.info["clustered_count"], count, dtype=np.int32))
+                ids = np.sort(np.concatenate(candidates))
+                scores = self._score_ids(ids, query) if len(ids) else np.empty(0, dtype=np.float32)
+            else:
+                ids = np.arange(count)
+                scores = np.concatenate([
+                    self._score_ids(slice(start, min(start + SCAN_BLOCK, count)), query)
+                    for start in range(0, count, SCAN_BLOCK)
+                ])
+
+            if len(scores) == 0:
+                return []
+            
+            # Over-fetch so deactivated (re-indexed) entries can be dropped,
+            # and fetch more until k active entries are found
+            results = []
+            checked = set()
+            fetch = min(len(scores), k * 4)
+            while True:
+                top = np.argpartition(-scores, fetch - 1)[:fetch]
+                top = top[np.argsort(-scores[top], kind="stable")]
+                for i in top:
+                    if i in checked:
+                        continue
+                    checked.add(i)
+                    row = self.db.execute(
+                        "SELECT path, filename, category, keywords, snippet FROM files WHERE id = ? AND active = 1",
+                        (int(ids[i]),)
+                    ).fetchone()
+                    if row:
+                        path, filename, category, keywords, snippet = row
+                        results.append({
+                            "path": path, "filename": filename, "category": category,
+                            "keywords": keywords, "snippet": snippet, "score": float(scores[i])
+                        })
+                        if len(results) == k:
+                            return results
+                if fetch == len(scores):
+                    return results
+                fetch = min(len(scores), fetch * 4)
+
+    def close(self):
+        self.db.close()